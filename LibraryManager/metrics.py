@@ -0,0 +1,413 @@
+"""
+Per-request timings and per-route latency histograms.
+
+``RequestMetricsMiddleware`` times every request. A database execute wrapper
+adds up the query count and query time. The results go back to the client in
+a ``Server-Timing`` header and are aggregated per route. Database
+connections are counted as Django opens them, and PostgreSQL connection pools
+report their own checkout and wait figures. ``metrics_view`` serves all of it
+in the Prometheus text format.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+
+from book.cache import catalog_cache_stats
+
+from LibraryManager.throttling import TIERS, load_monitor
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+UNMATCHED_ROUTE = "<unmatched>"
+METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+
+class RequestTimings:
+    __slots__ = ("start", "queries", "db", "view_start", "view_db")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db = 0.0
+        self.view_start = None
+        self.view_db = 0.0
+
+
+_current = ContextVar("request_timings", default=None)
+
+
+def _time_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db += time.perf_counter() - start
+        timings.queries += 1
+
+
+def _count_connection(connection, **kwargs):
+    request_metrics.record_connection(connection.alias)
+
+
+def _install_query_timer(connection, **kwargs):
+    # Wrappers live on the per-thread connection object and survive
+    # reconnects, so each connection is only wrapped once.
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+class RouteStats:
+    __slots__ = ("buckets", "count", "total", "db", "view_non_db", "queries")
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.db = 0.0
+        self.view_non_db = 0.0
+        self.queries = 0
+
+
+class RequestMetrics:
+    """Per-process request aggregates, keyed by route name and method."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+        self._connections = {}
+
+    def record(self, route, method, total, db, view_non_db, queries):
+        bucket = bisect_left(BUCKETS, total)
+        with self._lock:
+            stats = self._routes.get((route, method))
+            if stats is None:
+                stats = self._routes[(route, method)] = RouteStats()
+            stats.buckets[bucket] += 1
+            stats.count += 1
+            stats.total += total
+            stats.db += db
+            stats.view_non_db += view_non_db
+            stats.queries += queries
+
+    def record_connection(self, alias):
+        with self._lock:
+            self._connections[alias] = self._connections.get(alias, 0) + 1
+
+    def connections(self):
+        with self._lock:
+            return dict(self._connections)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                key: (
+                    list(stats.buckets),
+                    stats.count,
+                    stats.total,
+                    stats.db,
+                    stats.view_non_db,
+                    stats.queries,
+                )
+                for key, stats in self._routes.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self._connections.clear()
+
+
+request_metrics = RequestMetrics()
+
+
+class RequestMetricsMiddleware:
+    """
+    Time requests and record them in ``request_metrics``.
+
+    ``view_non_db`` is the time from the view being called until the
+    response is rendered, minus the database time in that span: the view's
+    own Python work, serializers and the renderer together. Streaming
+    bodies, such as CSV exports, are produced after the response leaves the
+    middleware and are not included.
+
+    Disabled, along with the query timer, when ``REQUEST_METRICS_ENABLED`` is
+    false.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_METRICS_ENABLED", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # Django would otherwise run the sync hook in a thread.
+            self.process_view = self._aprocess_view
+        self.server_timing = getattr(settings, "REQUEST_METRICS_SERVER_TIMING", True)
+        connection_created.connect(_install_query_timer)
+        connection_created.connect(_count_connection)
+        for connection in connections.all(initialized_only=True):
+            _install_query_timer(connection)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = _current.get()
+        if timings is not None:
+            timings.view_start = time.perf_counter()
+            timings.view_db = timings.db
+
+    async def _aprocess_view(self, *args):
+        RequestMetricsMiddleware.process_view(self, *args)
+
+    def finish(self, request, response, timings):
+        end = time.perf_counter()
+        total = end - timings.start
+        view_non_db = 0.0
+        if timings.view_start is not None:
+            view_db = timings.db - timings.view_db
+            view_non_db = max(end - timings.view_start - view_db, 0.0)
+
+        match = request.resolver_match
+        route = match.view_name if match is not None else UNMATCHED_ROUTE
+        # Labels come from a fixed set so clients cannot grow the histograms.
+        method = request.method if request.method in METHODS else "OTHER"
+        request_metrics.record(
+            route, method, total, timings.db, view_non_db, timings.queries
+        )
+
+        if self.server_timing:
+            response["Server-Timing"] = (
+                f'db;dur={timings.db * 1000:.2f};desc="{timings.queries} queries", '
+                f"view_non_db;dur={view_non_db * 1000:.2f}, "
+                f"total;dur={total * 1000:.2f}"
+            )
+        return response
+
+
+def _labels(route, method):
+    route = route.replace("\\", "\\\\").replace('"', '\\"')
+    return f'route="{route}",method="{method}"'
+
+
+def render_metrics():
+    lines = [
+        "# HELP library_request_duration_seconds Request latency by route.",
+        "# TYPE library_request_duration_seconds histogram",
+    ]
+    snapshot = sorted(request_metrics.snapshot().items())
+    for (route, method), (buckets, count, total, *_) in snapshot:
+        labels = _labels(route, method)
+        cumulative = 0
+        for bound, observed in zip(BUCKETS, buckets):
+            cumulative += observed
+            lines.append(
+                f'library_request_duration_seconds_bucket{{{labels},le="{bound}"}} '
+                f"{cumulative}"
+            )
+        lines.append(
+            f'library_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}'
+        )
+        lines.append(f"library_request_duration_seconds_sum{{{labels}}} {total}")
+        lines.append(f"library_request_duration_seconds_count{{{labels}}} {count}")
+
+    for index, name, help_text in (
+        (3, "library_request_db_seconds_total", "Time spent in queries."),
+        (
+            4,
+            "library_request_view_non_db_seconds_total",
+            "Time in views and rendering outside queries.",
+        ),
+        (5, "library_request_queries_total", "Database queries run."),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for (route, method), values in snapshot:
+            lines.append(f"{name}{{{_labels(route, method)}}} {values[index]}")
+
+    cache = catalog_cache_stats.snapshot()
+    lines.append("# HELP library_catalog_cache_requests_total Catalog cache lookups.")
+    lines.append("# TYPE library_catalog_cache_requests_total counter")
+    lines.append(
+        f'library_catalog_cache_requests_total{{result="hit"}} {cache["hits"]}'
+    )
+    lines.append(
+        f'library_catalog_cache_requests_total{{result="miss"}} {cache["misses"]}'
+    )
+    lines.extend(_load_metrics())
+    lines.extend(_connection_metrics())
+    return "\n".join(lines) + "\n"
+
+
+def _load_metrics():
+    load = load_monitor.snapshot()
+    lines = [
+        "# HELP library_requests_in_flight Requests being served.",
+        "# TYPE library_requests_in_flight gauge",
+        f"library_requests_in_flight {load['in_flight']}",
+        "# HELP library_request_latency_average_seconds Decaying average latency "
+        "that load shedding compares with its target.",
+        "# TYPE library_request_latency_average_seconds gauge",
+        f"library_request_latency_average_seconds {load['latency']}",
+        "# HELP library_requests_rejected_total Requests throttled (429) or "
+        "shed (503) by tier.",
+        "# TYPE library_requests_rejected_total counter",
+    ]
+    for tier in TIERS:
+        for reason in ("throttled", "shed"):
+            count = load["rejected"].get((tier, reason), 0)
+            lines.append(
+                f'library_requests_rejected_total{{tier="{tier}",reason="{reason}"}} '
+                f"{count}"
+            )
+    return lines
+
+
+# psycopg_pool statistics exported per pool: (stat, metric, type, scale, help).
+POOL_STATS = (
+    (
+        "pool_size",
+        "library_db_pool_connections",
+        "gauge",
+        1,
+        "Connections held by the pool.",
+    ),
+    (
+        "pool_available",
+        "library_db_pool_idle_connections",
+        "gauge",
+        1,
+        "Idle connections in the pool.",
+    ),
+    (
+        "requests_waiting",
+        "library_db_pool_waiting",
+        "gauge",
+        1,
+        "Checkouts waiting for a connection.",
+    ),
+    (
+        "requests_num",
+        "library_db_pool_checkouts_total",
+        "counter",
+        1,
+        "Connections handed out.",
+    ),
+    (
+        "requests_wait_ms",
+        "library_db_pool_wait_seconds_total",
+        "counter",
+        0.001,
+        "Time checkouts spent waiting for a connection.",
+    ),
+    (
+        "requests_errors",
+        "library_db_pool_checkout_errors_total",
+        "counter",
+        1,
+        "Checkouts that timed out or failed.",
+    ),
+    (
+        "connections_num",
+        "library_db_pool_connects_total",
+        "counter",
+        1,
+        "Server connections the pool opened.",
+    ),
+    (
+        "connections_ms",
+        "library_db_pool_connect_seconds_total",
+        "counter",
+        0.001,
+        "Time spent opening server connections.",
+    ),
+)
+
+
+def _connection_metrics():
+    lines = [
+        "# HELP library_db_connections_total Connections Django opened; "
+        "pool checkouts when pooled.",
+        "# TYPE library_db_connections_total counter",
+    ]
+    for alias, count in sorted(request_metrics.connections().items()):
+        lines.append(f'library_db_connections_total{{alias="{alias}"}} {count}')
+
+    pools = {}
+    for alias in connections:
+        connection = connections[alias]
+        if not connection.settings_dict["OPTIONS"].get("pool"):
+            continue
+        # Read pools the PostgreSQL backend already opened. Its ``pool``
+        # property would create and open one for an idle alias.
+        pool = getattr(connection, "_connection_pools", {}).get(alias)
+        if pool is not None:
+            pools[alias] = pool.get_stats()
+    if not pools:
+        return lines
+    for stat, name, kind, scale, help_text in POOL_STATS:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for alias, stats in pools.items():
+            lines.append(f'{name}{{alias="{alias}"}} {stats.get(stat, 0) * scale}')
+    return lines
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Serve ``request_metrics`` in the Prometheus text format.
+
+    Figures are per process, so scrape every worker. When ``METRICS_TOKEN``
+    is set, scrapers must send it as a bearer token. Without one the view
+    is only served with ``DEBUG`` on, so route names and traffic figures
+    are not public in production by default.
+    """
+    if not getattr(settings, "REQUEST_METRICS_ENABLED", True):
+        raise Http404
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if not token and not settings.DEBUG:
+        raise Http404
+    if token:
+        header = request.headers.get("Authorization", "")
+        if not constant_time_compare(header, f"Bearer {token}"):
+            return HttpResponse(status=401, headers={"WWW-Authenticate": "Bearer"})
+    return HttpResponse(
+        render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,101 @@
+"""
+Read replica routing with read-your-writes stickiness.
+
+Views with ``ReplicaReadMixin`` run the queries of safe requests on one of
+``READ_REPLICAS``. Everything else goes to the primary, including writes and
+the reads inside them, such as the borrow and return transactions. After a
+user's write succeeds, that user is pinned to the primary for
+``REPLICA_STICKY_SECONDS``. Their next reads then cannot hit a replica that
+has not replayed the write yet. Pins are kept in the default cache, which
+must be shared by every worker; settings refuse replicas with a per-process
+cache outside ``DEBUG``.
+"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS
+
+PIN_KEY = "replicas:pin:{}"
+
+_read_database = ContextVar("read_database", default=None)
+
+
+def pin_to_primary(user):
+    """Send ``user``'s reads to the primary for ``REPLICA_STICKY_SECONDS``."""
+    timeout = getattr(settings, "REPLICA_STICKY_SECONDS", 10)
+    if getattr(settings, "READ_REPLICAS", None) and timeout and user.is_authenticated:
+        cache.set(PIN_KEY.format(user.pk), True, timeout)
+
+
+async def apin_to_primary(user):
+    """``pin_to_primary()`` for async views."""
+    timeout = getattr(settings, "REPLICA_STICKY_SECONDS", 10)
+    if getattr(settings, "READ_REPLICAS", None) and timeout and user.is_authenticated:
+        await cache.aset(PIN_KEY.format(user.pk), True, timeout)
+
+
+def read_database_for(user):
+    """The replica to read from for ``user``, or None for the primary."""
+    replicas = getattr(settings, "READ_REPLICAS", None)
+    if not replicas:
+        return None
+    if user.is_authenticated and cache.get(PIN_KEY.format(user.pk)):
+        return None
+    return random.choice(replicas)
+
+
+def current_read_database():
+    """The replica the current request reads from, or None for the primary."""
+    return _read_database.get()
+
+
+class ReplicaRouter:
+    """
+    Reads go where the current request chose, writes go to the primary.
+
+    Both answers are explicit: when no router decides, Django saves an
+    instance to the database it was read from, which could be a replica.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_database.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+
+class ReplicaReadMixin:
+    """
+    Serve a view's safe requests from a read replica.
+
+    The replica is chosen once authentication has run, so pinned users stay
+    on the primary, and is kept for the whole request. Successful writes pin
+    the user.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            alias = read_database_for(request.user)
+            if alias is not None:
+                self._read_database_token = _read_database.set(alias)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "_read_database_token", None)
+        if token is not None:
+            _read_database.reset(token)
+            self._read_database_token = None
+        elif request.method not in SAFE_METHODS and status.is_success(
+            response.status_code
+        ):
+            pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
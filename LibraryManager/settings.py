@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 from datetime import timedelta
 from decouple import config, Csv
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -54,6 +55,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "LibraryManager.metrics.RequestMetricsMiddleware",
+    "LibraryManager.throttling.LoadSheddingMiddleware",
+    "user.hashers.HashingUnavailableMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -96,9 +100,107 @@ DATABASES = {
         "PASSWORD": config("DB_PASSWORD", default=""),
         "HOST": config("DB_HOST", default=""),
         "PORT": config("DB_PORT", default=""),
+        "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", default=60, cast=int),
+        "CONN_HEALTH_CHECKS": config("DB_CONN_HEALTH_CHECKS", default=True, cast=bool),
     }
 }
 
+# PostgreSQL connection pooling (psycopg 3). Each worker process keeps its own
+# pool, so size it to the threads that query concurrently in one process:
+# 1-2 for sync gunicorn workers, the thread count for gthread workers, and
+# the expected concurrent ORM calls for ASGI servers. Keep workers x
+# DB_POOL_MAX_SIZE below the server's max_connections. Pooled connections
+# cannot also be persistent, so CONN_MAX_AGE is ignored while the pool is on;
+# with DB_CONN_HEALTH_CHECKS the pool checks each connection on checkout.
+DB_POOL = config("DB_POOL", default=True, cast=bool)
+
+if not DEBUG and DB_POOL:
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": config("DB_POOL_MIN_SIZE", default=2, cast=int),
+            "max_size": config("DB_POOL_MAX_SIZE", default=4, cast=int),
+            # Seconds a request waits for a free connection before failing.
+            "timeout": config("DB_POOL_TIMEOUT", default=10, cast=float),
+            "max_idle": config("DB_POOL_MAX_IDLE", default=300, cast=float),
+            "max_lifetime": config("DB_POOL_MAX_LIFETIME", default=1800, cast=float),
+        }
+    }
+
+# Read replicas. DB_REPLICAS lists replica hosts (host or host:port) sharing
+# the primary's name and credentials; with the SQLite development database it
+# lists database files instead, for trying the routing locally. Safe requests
+# to the catalog, loan and profile views read from a random replica, and a
+# user is kept on the primary for DB_REPLICA_STICKY_SECONDS after a write.
+DB_REPLICAS = config("DB_REPLICAS", default="", cast=Csv())
+READ_REPLICAS = []
+for index, replica in enumerate(DB_REPLICAS, start=1):
+    alias = f"replica{index}"
+    if DEBUG:
+        DATABASES[alias] = {**DATABASES["default"], "NAME": BASE_DIR / replica}
+    else:
+        host, _, port = replica.partition(":")
+        DATABASES[alias] = {
+            **DATABASES["default"],
+            "HOST": host,
+            "PORT": port or DATABASES["default"]["PORT"],
+        }
+    READ_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["LibraryManager.replicas.ReplicaRouter"]
+REPLICA_STICKY_SECONDS = config("DB_REPLICA_STICKY_SECONDS", default=10, cast=int)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Use a shared backend (e.g. Redis or Memcached) in production so catalog
+# invalidations reach every worker; a local-memory cache only bounds
+# cross-worker staleness by CATALOG_CACHE_TIMEOUT.
+
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", default=""),
+    }
+}
+
+# Read-your-writes pins live in the default cache, so a user pinned by one
+# worker must be seen as pinned by all of them.
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+if READ_REPLICAS and not DEBUG and CACHES["default"]["BACKEND"] in PROCESS_LOCAL_CACHES:
+    raise ImproperlyConfigured(
+        "DB_REPLICAS needs a CACHE_BACKEND shared by all workers, such as "
+        "Redis or Memcached."
+    )
+
+# Seconds a cached catalog response may be served; also the upper bound on
+# staleness if an invalidation is missed. 0 disables the catalog cache.
+CATALOG_CACHE_TIMEOUT = config("CATALOG_CACHE_TIMEOUT", default=60, cast=int)
+
+
+# Password hashing
+# Django's default hashers, with concurrent PBKDF2 hashes bounded per process.
+PASSWORD_HASHERS = [
+    "user.hashers.BoundedPBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
+# Hashes that may run at once per worker process (0 for no limit) and how many
+# more may wait before logins and registrations get a 503. Keep the sum well
+# below the worker's thread count so reads always find a thread.
+PASSWORD_HASHING_CONCURRENCY = config(
+    "PASSWORD_HASHING_CONCURRENCY", default=1, cast=int
+)
+PASSWORD_HASHING_QUEUE = config("PASSWORD_HASHING_QUEUE", default=2, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -150,11 +252,15 @@ AUTH_USER_MODEL = "user.User"
 # REST Framework
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "book.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_FILTER_BACKENDS": (
@@ -163,8 +269,27 @@ REST_FRAMEWORK = {
         "rest_framework.filters.OrderingFilter",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_THROTTLE_CLASSES": ("LibraryManager.throttling.TierThrottle",),
+    "EXCEPTION_HANDLER": "user.hashers.exception_handler",
 }
 
+# Throttling and load shedding (LibraryManager.throttling)
+# Per-client token buckets for each tier, as "<requests>/<s|m|h|d>"; the
+# count is also the burst. An empty rate turns that tier's bucket off.
+THROTTLE_RATES = {
+    "circulation": config("THROTTLE_RATE_CIRCULATION", default="120/min"),
+    "user": config("THROTTLE_RATE_USER", default="600/min"),
+    "anon": config("THROTTLE_RATE_ANON", default="120/min"),
+}
+THROTTLE_MAX_CLIENTS = config("THROTTLE_MAX_CLIENTS", default=100000, cast=int)
+
+# Anonymous requests get a 503 once a worker's average latency reaches
+# LOAD_SHED_LATENCY seconds or LOAD_SHED_MAX_IN_FLIGHT requests run in it at
+# once, other authenticated requests at twice that. Borrowing, returning and
+# logging in are never shed. 0 turns a signal off.
+LOAD_SHED_LATENCY = config("LOAD_SHED_LATENCY", default=1.0, cast=float)
+LOAD_SHED_MAX_IN_FLIGHT = config("LOAD_SHED_MAX_IN_FLIGHT", default=64, cast=int)
+
 # SWAGGER_SETTINGS = {
 #     "SECURITY_DEFINITIONS": {
 #         "Bearer": {
@@ -204,8 +329,50 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
+    # Tokens carry a hash of the password, so changing it revokes them; the
+    # claim also versions the authentication user cache. Tokens issued
+    # before this was enabled lack the claim and are rejected.
+    "CHECK_REVOKE_TOKEN": True,
+    # Enforces BLACKLIST_AFTER_ROTATION without simplejwt's blacklist app.
+    "TOKEN_REFRESH_SERIALIZER": "user.serializers.RotatingTokenRefreshSerializer",
 }
 
+# Rotated refresh tokens are screened by an in-memory Bloom filter sized for
+# this many live entries (~1.2 MB per million) and synced from the database
+# every TOKEN_BLACKLIST_SYNC_INTERVAL seconds. Prune expired rows with
+# ``manage.py prune_revoked_tokens``.
+TOKEN_BLACKLIST_CAPACITY = config(
+    "TOKEN_BLACKLIST_CAPACITY", default=10_000_000, cast=int
+)
+TOKEN_BLACKLIST_SYNC_INTERVAL = config(
+    "TOKEN_BLACKLIST_SYNC_INTERVAL", default=5, cast=int
+)
+
+# Book and loan listings build their rows from values_list() through a
+# precompiled field plan (book.rows) instead of the serializers; the output is
+# identical. Set to False to go back to the serializers.
+FAST_LIST_RESPONSES = config("FAST_LIST_RESPONSES", default=True, cast=bool)
+
+# Loans returned more than this many days ago are moved to the archive table
+# by ``manage.py archive_loans``; run it from cron.
+LOAN_ARCHIVE_DAYS = config("LOAN_ARCHIVE_DAYS", default=180, cast=int)
+
+# Authenticated users are cached per process for this many seconds (0
+# disables); saves to a user evict the entry in the saving process.
+AUTH_USER_CACHE_TIMEOUT = config("AUTH_USER_CACHE_TIMEOUT", default=30, cast=int)
+AUTH_USER_CACHE_SIZE = config("AUTH_USER_CACHE_SIZE", default=10000, cast=int)
+
+# Request metrics
+# Per-request query count, DB, view time outside the DB and total time,
+# returned in a Server-Timing header and aggregated per route at /metrics.
+# Set METRICS_TOKEN to require it as a bearer token when scraping; with
+# DEBUG off, /metrics is only served when it is set.
+REQUEST_METRICS_ENABLED = config("REQUEST_METRICS_ENABLED", default=True, cast=bool)
+REQUEST_METRICS_SERVER_TIMING = config(
+    "REQUEST_METRICS_SERVER_TIMING", default=True, cast=bool
+)
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
 # CORS Settings
 CORS_ALLOWED_ORIGINS = config(
     "CORS_ALLOWED_ORIGINS", default="http://localhost:3000,http://127.0.0.1:3000"
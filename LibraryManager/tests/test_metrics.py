@@ -0,0 +1,126 @@
+import re
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient
+from rest_framework.test import APIClient
+
+from book.models import Book
+from LibraryManager.metrics import request_metrics
+
+SERVER_TIMING = re.compile(
+    r'db;dur=[\d.]+;desc="(\d+) queries", view_non_db;dur=[\d.]+, total;dur=[\d.]+'
+)
+
+
+@pytest.fixture
+def scraper(settings):
+    settings.METRICS_TOKEN = "scrape-me"
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION="Bearer scrape-me")
+    return client
+
+
+@pytest.fixture
+def book():
+    return Book.objects.create(
+        title="Timed Book",
+        author="Author",
+        isbn="1234567890123",
+        page_count=100,
+        available_copies=1,
+        total_copies=1,
+    )
+
+
+@pytest.mark.django_db
+class TestRequestMetrics:
+    def test_server_timing_counts_queries(self, api_client, book):
+        response = api_client.get(f"/api/books/{book.id}/")
+        match = SERVER_TIMING.fullmatch(response["Server-Timing"])
+        assert match and match.group(1) == "1"
+
+        # Served from the catalog cache, so no queries this time.
+        response = api_client.get(f"/api/books/{book.id}/")
+        assert SERVER_TIMING.fullmatch(response["Server-Timing"]).group(1) == "0"
+
+    def test_async_views_are_timed(self, book):
+        response = async_to_sync(AsyncClient().get)(f"/api/async/books/{book.id}/")
+        assert response.status_code == 200
+        assert SERVER_TIMING.fullmatch(response["Server-Timing"]).group(1) == "1"
+
+    def test_requests_are_aggregated_per_route(self, api_client, scraper, book):
+        api_client.get("/api/books/")
+        api_client.get("/api/books/", {"author": "Author"})
+        api_client.get(f"/api/books/{book.id}/")
+        api_client.get("/no-such-page/")
+
+        body = scraper.get("/metrics").content.decode()
+        assert (
+            'library_request_duration_seconds_count{route="book-list",method="GET"} 2'
+            in body
+        )
+        assert (
+            'library_request_duration_seconds_bucket{route="book-detail",'
+            'method="GET",le="+Inf"} 1' in body
+        )
+        assert (
+            'library_request_queries_total{route="book-detail",method="GET"} 1' in body
+        )
+        assert 'route="<unmatched>"' in body
+        assert 'library_catalog_cache_requests_total{result="miss"}' in body
+
+    def test_unknown_methods_share_a_label(self, api_client, book):
+        api_client.generic("BREW", f"/api/books/{book.id}/")
+        assert list(request_metrics.snapshot()) == [("book-detail", "OTHER")]
+
+    def test_metrics_token(self, api_client, settings):
+        settings.METRICS_TOKEN = "scrape-me"
+        assert api_client.get("/metrics").status_code == 401
+        response = api_client.get("/metrics", HTTP_AUTHORIZATION="Bearer scrape-me")
+        assert response.status_code == 200
+
+    def test_only_served_without_a_token_in_debug(self, api_client, settings):
+        assert api_client.get("/metrics").status_code == 404
+        settings.DEBUG = True
+        assert api_client.get("/metrics").status_code == 200
+
+    def test_disabled(self, book, settings):
+        settings.REQUEST_METRICS_ENABLED = False
+        api_client = APIClient()
+        response = api_client.get(f"/api/books/{book.id}/")
+        assert "Server-Timing" not in response
+        assert request_metrics.snapshot() == {}
+        assert api_client.get("/metrics").status_code == 404
+
+    def test_connections_are_counted(self, scraper):
+        scraper.get("/metrics")
+        connection_created.send(sender=type(connection), connection=connection)
+        body = scraper.get("/metrics").content.decode()
+        assert 'library_db_connections_total{alias="default"} 1' in body
+
+    def test_pool_stats(self, scraper, monkeypatch):
+        class Pool:
+            def get_stats(self):
+                return {"pool_size": 4, "requests_num": 12, "requests_wait_ms": 250}
+
+        default = connections["default"]
+        monkeypatch.setitem(default.settings_dict["OPTIONS"], "pool", True)
+        pools = {"default": Pool()}
+        monkeypatch.setattr(type(default), "_connection_pools", pools, raising=False)
+        body = scraper.get("/metrics").content.decode()
+        assert 'library_db_pool_connections{alias="default"} 4' in body
+        assert 'library_db_pool_checkouts_total{alias="default"} 12' in body
+        assert 'library_db_pool_wait_seconds_total{alias="default"} 0.25' in body
+        assert 'library_db_pool_checkout_errors_total{alias="default"} 0' in body
+
+    def test_pool_stats_do_not_open_pools(self, scraper, monkeypatch):
+        default = connections["default"]
+        monkeypatch.setitem(default.settings_dict["OPTIONS"], "pool", True)
+        pools = {}
+        monkeypatch.setattr(type(default), "_connection_pools", pools, raising=False)
+        body = scraper.get("/metrics").content.decode()
+        assert "library_db_pool_connections" not in body
+        assert pools == {}
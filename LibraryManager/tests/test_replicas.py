@@ -0,0 +1,149 @@
+import pytest
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from book.models import Book, Loan
+
+replica_db = pytest.mark.django_db(databases=["default", "replica"])
+
+
+@pytest.fixture
+def replica(settings):
+    settings.READ_REPLICAS = ["replica"]
+    settings.CATALOG_CACHE_TIMEOUT = 0
+    return connections["replica"]
+
+
+@pytest.fixture
+def api_client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def make_book(using="default", **fields):
+    defaults = {
+        "title": "Replicated",
+        "author": "Author",
+        "isbn": "1234567890123",
+        "page_count": 100,
+        "available_copies": 1,
+        "total_copies": 1,
+    }
+    return Book.objects.using(using).create(**{**defaults, **fields})
+
+
+@replica_db
+class TestReplicaRouting:
+    def test_catalog_reads_go_to_a_replica(self, api_client, replica):
+        make_book(title="Primary copy")
+        make_book("replica", title="Replica copy")
+
+        with CaptureQueriesContext(replica) as queries:
+            response = api_client.get("/api/books/")
+        assert [row["title"] for row in response.data["results"]] == ["Replica copy"]
+        assert queries.captured_queries
+
+    def test_writes_and_their_reads_go_to_the_primary(self, api_client, replica):
+        book = make_book()
+        # The replica has not caught up with the book yet.
+        with CaptureQueriesContext(replica) as queries:
+            response = api_client.post("/api/books/loans/borrow/", {"book_id": book.pk})
+        assert response.status_code == 201
+        assert not queries.captured_queries
+        assert Loan.objects.using("default").count() == 1
+
+    def test_writers_read_their_writes(self, api_client, replica, user):
+        book = make_book()
+        make_book("replica", pk=book.pk)
+        api_client.post("/api/books/loans/borrow/", {"book_id": book.pk})
+
+        # The stale replica still shows the copy on the shelf.
+        response = APIClient().get(f"/api/books/{book.pk}/")
+        assert response.data["available_copies"] == 1
+
+        response = api_client.get(f"/api/books/{book.pk}/")
+        assert response.data["available_copies"] == 0
+        response = api_client.get("/api/books/loans/")
+        assert len(response.data["results"]) == 1
+
+    def test_pin_expires(self, api_client, replica, settings):
+        settings.REPLICA_STICKY_SECONDS = 0
+        book = make_book()
+        api_client.post("/api/books/loans/borrow/", {"book_id": book.pk})
+
+        response = api_client.get("/api/books/loans/")
+        assert response.data["results"] == []
+
+    def test_export_streams_from_the_replica(self, api_client, replica):
+        make_book("replica")
+        response = api_client.get("/api/books/export/")
+        assert len(b"".join(response.streaming_content).splitlines()) == 1
+
+    def test_profile_updates_pin_the_user(self, api_client, replica):
+        response = api_client.patch("/api/users/profile/", {"first_name": "Ann"})
+        assert response.status_code == 200
+
+        with CaptureQueriesContext(replica) as queries:
+            api_client.get("/api/books/")
+        assert not queries.captured_queries
+
+    def test_async_borrow_pins_the_user(self, user, replica):
+        book = make_book()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        response = client.post(
+            "/api/async/books/loans/borrow/", {"book_id": book.pk}, format="json"
+        )
+        assert response.status_code == 201
+
+        with CaptureQueriesContext(replica) as queries:
+            response = client.get("/api/books/loans/")
+        assert not queries.captured_queries
+        assert len(response.data["results"]) == 1
+
+
+@replica_db
+class TestReplicaCatalogCache:
+    @pytest.fixture
+    def replica(self, replica, settings):
+        settings.CATALOG_CACHE_TIMEOUT = 60
+        return replica
+
+    def test_replica_reads_right_after_a_write_are_not_cached(
+        self, api_client, replica, user
+    ):
+        book = make_book()
+        make_book("replica", pk=book.pk)
+        api_client.post("/api/books/loans/borrow/", {"book_id": book.pk})
+
+        # The replica has not replayed the borrow yet.
+        response = APIClient().get(f"/api/books/{book.pk}/")
+        assert response.data["available_copies"] == 1
+        Book.objects.using("replica").filter(pk=book.pk).update(available_copies=0)
+        response = APIClient().get(f"/api/books/{book.pk}/")
+        assert response["X-Cache"] == "MISS"
+        assert response.data["available_copies"] == 0
+
+    def test_replica_reads_are_cached_once_replicas_caught_up(
+        self, api_client, replica, settings
+    ):
+        settings.REPLICA_STICKY_SECONDS = 0
+        book = make_book()
+        make_book("replica", pk=book.pk)
+        api_client.post("/api/books/loans/borrow/", {"book_id": book.pk})
+
+        APIClient().get(f"/api/books/{book.pk}/")
+        assert APIClient().get(f"/api/books/{book.pk}/")["X-Cache"] == "HIT"
+
+    def test_pinned_reads_fill_the_cache_from_the_primary(self, api_client, replica):
+        book = make_book()
+        make_book("replica", pk=book.pk)
+        api_client.post("/api/books/loans/borrow/", {"book_id": book.pk})
+
+        assert api_client.get(f"/api/books/{book.pk}/").data["available_copies"] == 0
+        response = APIClient().get(f"/api/books/{book.pk}/")
+        assert response["X-Cache"] == "HIT"
+        assert response.data["available_copies"] == 0
@@ -0,0 +1,162 @@
+import time
+
+import pytest
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from LibraryManager.metrics import render_metrics
+from LibraryManager.throttling import LoadMonitor, TokenBuckets, load_monitor
+from user.models import User
+
+
+@pytest.fixture
+def rates(settings):
+    settings.THROTTLE_RATES = {"circulation": "3/min", "user": "2/min", "anon": "2/min"}
+    return settings.THROTTLE_RATES
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def books(make_books):
+    return make_books(5, available_copies=5, total_copies=5)
+
+
+def borrow(client, book):
+    return client.post("/api/books/loans/borrow/", {"book_id": book.pk})
+
+
+class TestTokenBuckets:
+    def test_bursts_then_refills(self):
+        buckets = TokenBuckets()
+        assert [buckets.take("key", 2, 60, now=0) for _ in range(2)] == [0, 0]
+        assert buckets.take("key", 2, 60, now=0) == pytest.approx(30)
+        assert buckets.take("key", 2, 60, now=30) == 0
+        assert buckets.take("key", 2, 60, now=30) > 0
+
+    def test_keeps_only_recent_clients(self, settings):
+        settings.THROTTLE_MAX_CLIENTS = 2
+        buckets = TokenBuckets()
+        for key in ("a", "b", "c"):
+            buckets.take(key, 1, 60, now=0)
+        # "a" was evicted and starts over with a full bucket.
+        assert buckets.take("a", 1, 60, now=0) == 0
+        assert buckets.take("c", 1, 60, now=0) > 0
+
+
+class TestLoadMonitor:
+    def test_latency_pressure_decays(self, settings):
+        settings.LOAD_SHED_LATENCY = 0.1
+        settings.LOAD_SHED_MAX_IN_FLIGHT = 0
+        monitor = LoadMonitor()
+        now = time.monotonic()
+        for _ in range(50):
+            monitor.finished(monitor.started() - 2, now=now)
+        assert monitor.pressure(now=now) > 10
+        assert monitor.pressure(now=now + 60) < 1
+
+    def test_in_flight_pressure(self, settings):
+        settings.LOAD_SHED_LATENCY = 0
+        settings.LOAD_SHED_MAX_IN_FLIGHT = 4
+        monitor = LoadMonitor()
+        for _ in range(2):
+            monitor.started()
+        assert monitor.pressure() == 0.5
+
+
+@pytest.mark.django_db
+class TestThrottling:
+    def test_anonymous_clients_get_429_with_retry_after(self, rates, books):
+        client = APIClient()
+        assert [client.get("/api/books/").status_code for _ in range(3)] == [
+            200,
+            200,
+            429,
+        ]
+        response = client.get("/api/async/books/")
+        assert response.status_code == 429
+        assert int(response["Retry-After"]) > 0
+
+    def test_circulation_has_its_own_bucket(self, rates, client, books):
+        for _ in range(2):
+            assert client.get("/api/books/").status_code == 200
+        assert client.get("/api/books/").status_code == 429
+        assert [borrow(client, book).status_code for book in books[:4]] == [
+            201,
+            201,
+            201,
+            429,
+        ]
+
+    def test_buckets_are_per_user(self, rates, client, books):
+        for _ in range(3):
+            client.get("/api/books/")
+        other = User.objects.create_user(
+            username="other", email="other@example.com", password="x"
+        )
+        client.force_authenticate(user=other)
+        assert client.get("/api/books/").status_code == 200
+
+    def test_login_is_circulation(self, rates, user):
+        client = APIClient()
+        for _ in range(3):
+            assert client.get("/api/books/").status_code in (200, 429)
+        response = client.post(
+            "/api/users/login/", {"username": "reader", "password": "testpass123"}
+        )
+        assert response.status_code == 200
+
+    def test_unset_rate_disables_the_bucket(self, settings, books):
+        settings.THROTTLE_RATES = {"anon": ""}
+        client = APIClient()
+        assert all(client.get("/api/books/").status_code == 200 for _ in range(5))
+
+
+@pytest.mark.django_db
+class TestLoadShedding:
+    @pytest.fixture
+    def pressure(self, monkeypatch):
+        def set_pressure(value):
+            monkeypatch.setattr(load_monitor, "pressure", lambda now=None: value)
+
+        return set_pressure
+
+    def test_sheds_anonymous_reads_first(self, pressure, client, books):
+        pressure(1.5)
+        response = APIClient().get("/api/books/")
+        assert response.status_code == 503
+        assert response["Retry-After"] == "1"
+        assert APIClient().get("/api/async/books/").status_code == 503
+        assert client.get("/api/books/").status_code == 200
+
+    def test_never_sheds_circulation(self, pressure, client, user, books):
+        pressure(5)
+        assert client.get("/api/books/").status_code == 503
+        assert borrow(client, books[0]).status_code == 201
+        token = AccessToken.for_user(user)
+        async_client = APIClient()
+        async_client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = async_client.post(
+            "/api/async/books/loans/borrow/", {"book_id": books[1].pk}, format="json"
+        )
+        assert response.status_code == 201
+
+    def test_middleware_tracks_requests(self, books):
+        assert load_monitor.snapshot()["in_flight"] == 0
+        APIClient().get("/api/books/")
+        load = load_monitor.snapshot()
+        assert load["in_flight"] == 0
+        assert load["latency"] > 0
+
+    def test_rejections_are_exported(self, pressure, books):
+        pressure(1)
+        APIClient().get("/api/books/")
+        assert (
+            'library_requests_rejected_total{tier="anon",reason="shed"} 1'
+            in render_metrics()
+        )
@@ -0,0 +1,268 @@
+"""
+Token-bucket throttling with priority tiers, and adaptive load shedding.
+
+Every API request belongs to one of three tiers, most important first:
+
+* ``circulation``: borrowing, returning, logging in and refreshing tokens;
+* ``user``: any other request from an authenticated user;
+* ``anon``: anonymous requests, mostly catalog reads and searches.
+
+Each client (the user, or the IP address when anonymous) has a token bucket
+per tier that holds the tier's ``THROTTLE_RATES`` count and refills over its
+period; an empty bucket answers 429. Because the tiers have separate
+buckets, a client that exhausts its catalog reads can still borrow.
+
+``LoadSheddingMiddleware`` tracks the requests in flight and a decaying
+average of their latency. Their ratio to ``LOAD_SHED_MAX_IN_FLIGHT`` and
+``LOAD_SHED_LATENCY`` is the process's pressure: at 1 anonymous requests
+are turned away with a 503, at 2 the rest of the ``user`` tier too, and
+circulation is never shed. Rejections happen before the view runs, so they
+cost microseconds and no database work.
+
+All state is per process, so the limits apply per worker.
+"""
+
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException, Throttled
+from rest_framework.throttling import BaseThrottle
+
+CIRCULATION = "circulation"
+USER = "user"
+ANON = "anon"
+TIERS = (CIRCULATION, USER, ANON)
+
+# Pressure at which each tier is shed; circulation never is.
+SHED_AT = {USER: 2.0, ANON: 1.0}
+
+# Weight of a new sample in the latency average, and the half-life in
+# seconds over which the average decays when no requests finish.
+LATENCY_WEIGHT = 0.1
+LATENCY_HALF_LIFE = 2.0
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+class Overloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "The server is busy, please retry shortly."
+    default_code = "overloaded"
+    # Sent as Retry-After by DRF's exception handler.
+    wait = 1
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """A DRF-style ``"<count>/<period>"`` rate as (count, seconds), or None."""
+    if not rate:
+        return None
+    count, period = rate.split("/")
+    return int(count), PERIODS[period[0]]
+
+
+class TokenBuckets:
+    """
+    Token buckets keyed by tier and client.
+
+    Only the ``THROTTLE_MAX_CLIENTS`` most recently used buckets are kept, so a flood
+    of new IP addresses cannot grow the table; an evicted client starts over
+    with a full bucket.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+
+    def take(self, key, count, period, now=None):
+        """Take a token; returns 0, or the seconds until one is available."""
+        if now is None:
+            now = time.monotonic()
+        refill = count / period
+        max_clients = getattr(settings, "THROTTLE_MAX_CLIENTS", 100_000)
+        with self._lock:
+            bucket = self._buckets.pop(key, None)
+            if bucket is None:
+                tokens = count
+            else:
+                tokens, updated = bucket
+                tokens = min(count, tokens + (now - updated) * refill)
+            wait = 0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / refill
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > max_clients:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+token_buckets = TokenBuckets()
+
+
+class LoadMonitor:
+    """Requests in flight, their average latency and the rejections per tier."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def started(self):
+        with self._lock:
+            self._in_flight += 1
+        return time.perf_counter()
+
+    def finished(self, started, sample=True, now=None):
+        if now is None:
+            now = time.monotonic()
+        duration = time.perf_counter() - started
+        with self._lock:
+            self._in_flight -= 1
+            if sample:
+                latency = self._decayed(now)
+                self._latency = latency + (duration - latency) * LATENCY_WEIGHT
+                self._updated = now
+
+    def _decayed(self, now):
+        elapsed = max(now - self._updated, 0.0)
+        return self._latency * 0.5 ** (elapsed / LATENCY_HALF_LIFE)
+
+    def pressure(self, now=None):
+        """The larger of latency over its target and in-flight over its limit."""
+        if now is None:
+            now = time.monotonic()
+        target = getattr(settings, "LOAD_SHED_LATENCY", 1.0)
+        max_in_flight = getattr(settings, "LOAD_SHED_MAX_IN_FLIGHT", 64)
+        with self._lock:
+            latency = self._decayed(now)
+            in_flight = self._in_flight
+        pressure = 0.0
+        if target:
+            pressure = latency / target
+        if max_in_flight:
+            pressure = max(pressure, in_flight / max_in_flight)
+        return pressure
+
+    def record_rejection(self, tier, reason):
+        with self._lock:
+            self._rejected[(tier, reason)] += 1
+
+    def snapshot(self, now=None):
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "latency": self._decayed(now),
+                "rejected": dict(self._rejected),
+            }
+
+    def reset(self):
+        with self._lock:
+            self._in_flight = 0
+            self._latency = 0.0
+            self._updated = time.monotonic()
+            self._rejected = Counter()
+
+
+load_monitor = LoadMonitor()
+
+
+def client_ident(request):
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    return f"ip:{BaseThrottle().get_ident(request)}"
+
+
+def default_tier(request):
+    user = getattr(request, "user", None)
+    return USER if user is not None and user.is_authenticated else ANON
+
+
+def check_request(request, tier):
+    """Raise ``Overloaded`` (503) or ``Throttled`` (429) unless ``request`` may run."""
+    shed_at = SHED_AT.get(tier)
+    if shed_at is not None and load_monitor.pressure() >= shed_at:
+        load_monitor.record_rejection(tier, "shed")
+        raise Overloaded()
+    rate = parse_rate(getattr(settings, "THROTTLE_RATES", {}).get(tier))
+    if rate is None:
+        return
+    wait = token_buckets.take((tier, client_ident(request)), *rate)
+    if wait:
+        load_monitor.record_rejection(tier, "throttled")
+        raise Throttled(wait=math.ceil(wait))
+
+
+class TierThrottle(BaseThrottle):
+    """
+    Apply ``check_request`` to DRF views.
+
+    Views pick their tier with ``throttle_tier``, or per action with
+    ``throttle_tiers``; others get ``user`` or ``anon`` by who is asking.
+    """
+
+    def allow_request(self, request, view):
+        tiers = getattr(view, "throttle_tiers", {})
+        tier = tiers.get(getattr(view, "action", None)) or getattr(
+            view, "throttle_tier", None
+        )
+        check_request(request, tier or default_tier(request))
+        return True
+
+
+class LoadSheddingMiddleware:
+    """
+    Feed every request into ``load_monitor``.
+
+    Throttled and shed responses are left out of the latency average, so
+    turning traffic away lets the average fall back under the target.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started = load_monitor.started()
+        response = None
+        try:
+            response = self.get_response(request)
+        finally:
+            load_monitor.finished(started, sample=self.sampled(response))
+        return response
+
+    async def __acall__(self, request):
+        started = load_monitor.started()
+        response = None
+        try:
+            response = await self.get_response(request)
+        finally:
+            load_monitor.finished(started, sample=self.sampled(response))
+        return response
+
+    @staticmethod
+    def sampled(response):
+        return response is not None and response.status_code not in (
+            status.HTTP_429_TOO_MANY_REQUESTS,
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
@@ -0,0 +1,44 @@
+"""
+Shared bootstrap for the benchmark scripts.
+
+Benchmarks never touch the configured database: they build a throwaway test
+database (file-backed on SQLite so worker threads share it) and drop it on
+exit.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "LibraryManager.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+# The in-process benchmarks send every request as one client; measure the
+# views rather than that client's throttles.
+settings.THROTTLE_RATES = {}
+settings.LOAD_SHED_LATENCY = settings.LOAD_SHED_MAX_IN_FLIGHT = 0
+
+
+@contextmanager
+def benchmark_database(keepdb=False):
+    if connection.vendor == "sqlite":
+        # Django fills in TEST["NAME"] = None, so setdefault() would keep
+        # the in-memory database that other processes cannot open.
+        test_settings = connection.settings_dict.setdefault("TEST", {})
+        if not test_settings.get("NAME"):
+            test_settings["NAME"] = os.path.join(
+                tempfile.gettempdir(), "librarymanager_bench.sqlite3"
+            )
+    setup_test_environment(debug=False)
+    old_name = connection.creation.create_test_db(verbosity=0, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
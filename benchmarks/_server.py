@@ -0,0 +1,109 @@
+"""
+Helpers for benchmarks that drive a real server over HTTP.
+
+The client is a minimal asyncio HTTP/1.1 client that opens one connection
+per request, so sync gunicorn workers (which close every connection) and
+keep-alive servers are measured the same way.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import signal
+import socket
+import subprocess
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def running_server(command, env=None, timeout=30):
+    """
+    Start ``command`` (with ``{port}`` filled in) against the benchmark
+    database and yield the port once it accepts connections.
+    """
+    port = free_port()
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": "benchmarks.server_settings",
+        "BENCH_DATABASE": json.dumps(connection.settings_dict, default=str),
+        **(env or {}),
+    }
+    process = subprocess.Popen([part.format(port=port) for part in command], env=env)
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if process.poll() is not None:
+                raise SystemExit(f"server exited with {process.returncode}")
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise SystemExit("server did not start")
+                time.sleep(0.1)
+        yield port
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=30)
+
+
+async def request(port, method, path, token=None, body=None):
+    """Send one request and return its status code."""
+    headers = [f"{method} {path} HTTP/1.1", "Host: 127.0.0.1", "Connection: close"]
+    if token:
+        headers.append(f"Authorization: Bearer {token}")
+    payload = b""
+    if body is not None:
+        payload = json.dumps(body).encode()
+        headers += ["Content-Type: application/json", f"Content-Length: {len(payload)}"]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(("\r\n".join(headers) + "\r\n\r\n").encode() + payload)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b" ", 2)[1])
+
+
+async def load(port, requests, concurrency, duration):
+    """
+    Keep ``concurrency`` requests in flight for ``duration`` seconds, cycling
+    through ``requests`` (tuples of ``request()`` arguments after the port).
+
+    Returns the latencies of 2xx responses, a count of every status code
+    (``None`` for connection errors) and the elapsed time.
+    """
+    latencies, statuses = [], {}
+    deadline = time.perf_counter() + duration
+    cycle = itertools.cycle(requests)
+
+    async def client():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                code = await request(port, *next(cycle))
+            except (OSError, IndexError, ValueError):
+                code = None
+            if code is not None and 200 <= code < 300:
+                latencies.append(time.perf_counter() - started)
+            statuses[code] = statuses.get(code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - started
+
+
+def percentile(latencies, fraction):
+    if not latencies:
+        return float("nan")
+    ordered = sorted(latencies)
+    return ordered[max(0, int(len(ordered) * fraction) - 1)]
@@ -0,0 +1,79 @@
+"""
+Time the admin loan and book changelists on a large loan history.
+
+Seeds loans with the circulation benchmark's generator, analyzes the tables
+and fetches a few changelist pages as a superuser, reporting the median
+time and query count of each::
+
+    python -m benchmarks.admin_changelist --loans 20000000
+"""
+
+import argparse
+import statistics
+import time
+
+from benchmarks._django import benchmark_database
+from benchmarks.circulation_stats import seed
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from user.models import User
+
+PAGES = [
+    ("loans", "/admin/book/loan/", {}),
+    ("loans, page 50", "/admin/book/loan/", {"p": 50}),
+    ("overdue loans", "/admin/book/loan/", {"status": "overdue"}),
+    ("loans, search", "/admin/book/loan/", {"q": "reader1"}),
+    ("books, search", "/admin/book/book/", {"q": "book 12"}),
+    (
+        "loan user picker",
+        "/admin/autocomplete/",
+        {
+            "app_label": "book",
+            "model_name": "loan",
+            "field_name": "user",
+            "term": "reader",
+        },
+    ),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--loans", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    settings.ALLOWED_HOSTS = ["*"]
+    settings.SECURE_SSL_REDIRECT = False
+    with benchmark_database():
+        seed(args.loans)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        admin = User.objects.create_superuser(
+            username="bench-admin", email="bench-admin@example.com", password="x"
+        )
+        client = Client()
+        client.force_login(admin)
+
+        print(f"backend: {connection.vendor}, {args.loans} loans")
+        print(f"{'page':<20} {'median ms':>10} {'queries':>8}")
+        for name, path, params in PAGES:
+            samples = []
+            for _ in range(args.repeat):
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    response = client.get(path, params)
+                    samples.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200, (path, response.status_code)
+            print(
+                f"{name:<20} {statistics.median(samples):>10.1f} "
+                f"{len(ctx.captured_queries):>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
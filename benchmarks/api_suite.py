@@ -0,0 +1,363 @@
+"""
+Reproducible API benchmark suite over large seeded catalogs.
+
+Seeds a catalog of each size with factory_boy, along with readers and a loan
+history, then drives the API through the test client. Sizes are seeded
+incrementally, so ``--sizes 10000,1000000`` seeds 10k books, benchmarks
+them, then tops the catalog up to 1M. Each scenario reports throughput,
+p50/p99 latency and queries per request. Results are written as JSON::
+
+    python -m benchmarks.api_suite run --sizes 10000,1000000,5000000 \\
+        --output before.json
+    python -m benchmarks.api_suite diff before.json after.json
+
+``diff`` exits with status 1 when a scenario's latency got worse by more
+than ``--threshold`` percent or it started running more queries. Latencies
+that were 0 ms before are shown as an absolute change instead.
+
+Requests are sent one at a time, so throughput is the single-client rate.
+The catalog cache is off unless ``--cache`` is given, so reads measure the
+database path. Seeding uses a fixed ``--seed``, so two runs at the same
+sizes benchmark identical data.
+"""
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+import factory.random
+
+from benchmarks._django import benchmark_database
+from benchmarks._server import percentile
+from benchmarks.factories import BookFactory, LoanFactory, UserFactory
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from book.models import Book, Loan
+from book.services import reconcile_active_loan_counts
+from user.models import User
+
+PASSWORD = "bench-pass-123"
+BOOKS_PER_READER = 20
+# Share of books whose latest loan is still out, and how far back those
+# loans start; with 14-day loans about a third of them are overdue.
+ACTIVE_SHARE = 0.15
+ACTIVE_WINDOW_DAYS = 21
+
+
+@contextmanager
+def historic_borrowed_dates():
+    # ``borrowed_date`` is auto_now_add, which would stamp every seeded loan
+    # with the current time.
+    field = Loan._meta.get_field("borrowed_date")
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def seed_readers(total, password, batch_size):
+    created = User.objects.count()
+    while created < total:
+        size = min(batch_size, total - created)
+        UserFactory.reset_sequence(created)
+        User.objects.bulk_create(UserFactory.build_batch(size, password=password))
+        created += size
+
+
+def loan_history(rng, book, reader_ids, loans_per_book, now):
+    """Yield a book's loans, newest first, leaving at most one out."""
+    count = round(rng.expovariate(1 / loans_per_book)) if loans_per_book else 0
+    returned_before = now
+    if count and rng.random() < ACTIVE_SHARE:
+        borrowed = now - timedelta(days=rng.uniform(0, ACTIVE_WINDOW_DAYS))
+        book.available_copies -= 1
+        count -= 1
+        returned_before = borrowed
+        yield LoanFactory.build(
+            user_id=rng.choice(reader_ids), book=book, borrowed_date=borrowed
+        )
+    for _ in range(count):
+        returned = returned_before - timedelta(days=rng.uniform(0, 60))
+        borrowed = returned - timedelta(days=rng.uniform(1, 20))
+        returned_before = borrowed
+        yield LoanFactory.build(
+            user_id=rng.choice(reader_ids),
+            book=book,
+            borrowed_date=borrowed,
+            returned_date=returned,
+        )
+
+
+def seed_catalog(total, loans_per_book, seed, batch_size):
+    """Top the catalog up to ``total`` books, with readers and loans."""
+    created = Book.objects.count()
+    if created > total:
+        sys.exit(f"The database already has {created} books; drop --keepdb.")
+    factory.random.reseed_random(seed + created)
+    rng = random.Random(seed + created)
+
+    seed_readers(
+        max(total // BOOKS_PER_READER, 100), make_password(PASSWORD), batch_size
+    )
+    reader_ids = list(User.objects.order_by("pk").values_list("pk", flat=True))
+    now = datetime.now(dt_timezone.utc)
+
+    started = time.perf_counter()
+    with historic_borrowed_dates():
+        while created < total:
+            size = min(batch_size, total - created)
+            BookFactory.reset_sequence(created)
+            books = BookFactory.build_batch(size)
+            loans = []
+            for book in books:
+                loans.extend(loan_history(rng, book, reader_ids, loans_per_book, now))
+            with transaction.atomic():
+                Book.objects.bulk_create(books)
+                Loan.objects.bulk_create(loans, batch_size=batch_size)
+            created += size
+            rate = created / (time.perf_counter() - started)
+            print(f"  seeded {created}/{total} books ({rate:.0f}/s)", end="\r")
+    print()
+    reconcile_active_loan_counts(batch_size)
+
+
+def sample_books(rng, count, *fields, **filters):
+    """``count`` rows spread over the table, picked by random primary key."""
+    top = Book.objects.order_by("-pk").values_list("pk", flat=True).first()
+    books = Book.objects.filter(**filters).order_by("pk").values(*fields)
+    samples = []
+    for _ in range(count * 10):
+        book = books.filter(pk__gte=rng.randint(1, top)).first()
+        if book and book not in samples:
+            samples.append(book)
+            if len(samples) == count:
+                break
+    return samples
+
+
+def catalog_samples(rng, count=50):
+    """Existing authors and title words, so filters and searches match."""
+    books = sample_books(rng, count, "title", "author")
+    authors = [book["author"].split()[-1] for book in books]
+    words = [rng.choice(book["title"].split()).lower() for book in books]
+    return authors, words
+
+
+def measure(send, requests, warmup=0):
+    for i in range(warmup):
+        send(i)
+    latencies, queries, errors = [], [], 0
+    started = time.perf_counter()
+    for i in range(requests):
+        with CaptureQueriesContext(connection) as captured:
+            request_started = time.perf_counter()
+            response = send(i)
+            latencies.append(time.perf_counter() - request_started)
+        queries.append(len(captured.captured_queries))
+        if response.status_code >= 400:
+            errors += 1
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "queries": max(queries),
+    }
+
+
+def run_scenarios(requests, login_requests, seed):
+    rng = random.Random(seed)
+    reader = User.objects.order_by("pk").first()
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(reader)}")
+    authors, words = catalog_samples(rng)
+    to_borrow = [
+        book["pk"] for book in sample_books(rng, requests, "pk", available_copies__gt=0)
+    ]
+    borrowed = []
+
+    def borrow(i):
+        response = client.post(
+            "/api/books/loans/borrow/", {"book_id": to_borrow[i]}, format="json"
+        )
+        if response.status_code == 201:
+            borrowed.append(response.data["id"])
+        return response
+
+    scenarios = [
+        ("book-list", lambda i: client.get("/api/books/"), requests),
+        (
+            "book-search",
+            lambda i: client.get("/api/books/", {"search": words[i % len(words)]}),
+            requests,
+        ),
+        (
+            "book-filter",
+            lambda i: client.get(
+                "/api/books/",
+                {"author": authors[i % len(authors)], "available_only": "true"},
+            ),
+            requests,
+        ),
+        ("profile", lambda i: client.get("/api/users/profile/"), requests),
+        ("borrow", borrow, len(to_borrow)),
+        (
+            "return",
+            lambda i: client.post(f"/api/books/loans/{borrowed[i]}/return_book/"),
+            None,
+        ),
+        (
+            "login",
+            lambda i: client.post(
+                "/api/users/login/",
+                {"username": reader.username, "password": PASSWORD},
+                format="json",
+            ),
+            login_requests,
+        ),
+    ]
+
+    results = {}
+    for name, send, count in scenarios:
+        if count is None:
+            count = len(borrowed)
+        writes = name in ("borrow", "return", "login")
+        results[name] = measure(send, count, warmup=0 if writes else 5)
+        print(f"  {name:<12} " + format_result(results[name]))
+    return results
+
+
+def format_result(result):
+    return (
+        f"{result['throughput']:>8.1f} req/s  p50 {result['p50_ms']:>8.2f} ms  "
+        f"p99 {result['p99_ms']:>8.2f} ms  {result['queries']:>2} queries"
+        + (f"  {result['errors']} errors" if result["errors"] else "")
+    )
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    sizes = [int(size) for size in args.sizes.split(",")]
+    report = {
+        "meta": {
+            "created": datetime.now(dt_timezone.utc).isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "seed": args.seed,
+            "requests": args.requests,
+            "loans_per_book": args.loans_per_book,
+            "catalog_cache": args.cache,
+        },
+        "results": {},
+    }
+    overrides = {} if args.cache else {"CATALOG_CACHE_TIMEOUT": 0}
+    with benchmark_database(keepdb=args.keepdb), override_settings(**overrides):
+        for size in sizes:
+            print(f"{size} books")
+            seed_catalog(size, args.loans_per_book, args.seed, args.batch_size)
+            report["results"][str(size)] = run_scenarios(
+                args.requests, args.login_requests, args.seed
+            )
+
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print(f"Results written to {args.output}")
+
+
+def diff(args):
+    with open(args.old) as old_file, open(args.new) as new_file:
+        old, new = json.load(old_file), json.load(new_file)
+
+    regressions = 0
+    print(f"{'size':>9} {'scenario':<12} {'p50 ms':>19} {'p99 ms':>19} {'queries':>9}")
+    for size, scenarios in new["results"].items():
+        for name, result in scenarios.items():
+            before = old["results"].get(size, {}).get(name)
+            if before is None:
+                continue
+            columns, worse = [], False
+            for metric in ("p50_ms", "p99_ms"):
+                delta = result[metric] - before[metric]
+                if before[metric]:
+                    change = delta / before[metric] * 100
+                    worse |= change > args.threshold
+                    columns.append(f"{result[metric]:>9.2f} ({change:+6.1f}%)")
+                else:
+                    # Below the 0.01 ms resolution before, so no percentage.
+                    columns.append(f"{result[metric]:>9.2f} ({delta:+5.2f}ms)")
+            worse |= result["queries"] > before["queries"]
+            columns.append(f"{before['queries']:>3} -> {result['queries']:<3}")
+            regressions += worse
+            flag = "  REGRESSION" if worse else ""
+            print(f"{size:>9} {name:<12} " + " ".join(columns) + flag)
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="seed catalogs and benchmark them")
+    run_parser.add_argument("--sizes", default="10000")
+    run_parser.add_argument("--requests", type=int, default=200)
+    run_parser.add_argument("--login-requests", type=int, default=10)
+    run_parser.add_argument("--loans-per-book", type=float, default=2.0)
+    run_parser.add_argument("--batch-size", type=int, default=5000)
+    run_parser.add_argument("--seed", type=int, default=1234)
+    run_parser.add_argument("--cache", action="store_true")
+    run_parser.add_argument(
+        "--keepdb",
+        action="store_true",
+        help="keep the seeded database for the next run at the same or larger sizes",
+    )
+    run_parser.add_argument(
+        "--output",
+        default=f"api-suite-{datetime.now():%Y%m%d-%H%M%S}.json",
+    )
+
+    diff_parser = commands.add_parser("diff", help="compare two result files")
+    diff_parser.add_argument("old")
+    diff_parser.add_argument("new")
+    diff_parser.add_argument("--threshold", type=float, default=10.0)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        sys.exit(diff(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Load test of the sync DRF views under gunicorn against the async views
+under uvicorn.
+
+Both servers get the same number of worker processes and the same seeded
+database; the client keeps ``--concurrency`` requests in flight for
+``--duration`` seconds against the catalog list, a book detail and the
+profile, then reports requests/sec and latency percentiles::
+
+    python -m benchmarks.asgi_load --concurrency 256 --workers 4
+
+The catalog cache is disabled unless ``--cache-timeout`` is given, so every
+request reaches the database.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+
+from benchmarks._django import benchmark_database
+from benchmarks._server import load, percentile, running_server
+
+from django.db import connection
+from rest_framework_simplejwt.tokens import AccessToken
+
+from book.models import Book
+from user.models import User
+
+SERVERS = {
+    "gunicorn (sync)": (
+        [
+            "gunicorn",
+            "LibraryManager.wsgi:application",
+            "--workers",
+            "{workers}",
+            "--bind",
+            "127.0.0.1:{port}",
+            "--log-level",
+            "warning",
+        ],
+        "/api/books/",
+        "/api/users/profile/",
+    ),
+    "uvicorn (async)": (
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "LibraryManager.asgi:application",
+            "--workers",
+            "{workers}",
+            "--port",
+            "{port}",
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        "/api/async/books/",
+        "/api/async/users/profile/",
+    ),
+}
+
+
+def seed(books):
+    rng = random.Random(0)
+    Book.objects.bulk_create(
+        (
+            Book(
+                title=f"Load Book {i}",
+                author=rng.choice(["Ann Author", "Bob Writer", "Cy Scribe"]),
+                isbn=f"{i:013d}",
+                page_count=100,
+                description="A book seeded for the load benchmark.",
+            )
+            for i in range(books)
+        ),
+        batch_size=5000,
+    )
+    user = User.objects.create_user(
+        username="loadtest", email="load@example.com", password=None
+    )
+    return list(Book.objects.values_list("pk", flat=True)), str(
+        AccessToken.for_user(user)
+    )
+
+
+def run_server(name, args, book_ids, token):
+    command, catalog, profile = SERVERS[name]
+    command = [part.format(workers=args.workers, port="{port}") for part in command]
+    rng = random.Random(1)
+    paths = [f"{catalog}?author=Ann", profile] + [
+        f"{catalog}{rng.choice(book_ids)}/" for _ in range(8)
+    ]
+    requests = [("GET", path, token) for path in paths]
+    env = {"BENCH_CACHE_TIMEOUT": str(args.cache_timeout)}
+    with running_server(command, env) as port:
+        # Warm up imports and connections before measuring.
+        asyncio.run(load(port, requests, args.workers, 1))
+        latencies, statuses, elapsed = asyncio.run(
+            load(port, requests, args.concurrency, args.duration)
+        )
+
+    errors = sum(count for code, count in statuses.items() if code != 200)
+    print(
+        f"{name:<18} {len(latencies) / elapsed:>10.1f} "
+        f"{percentile(latencies, 0.5) * 1000:>10.1f} "
+        f"{percentile(latencies, 0.99) * 1000:>10.1f} {errors:>8}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--books", type=int, default=10000)
+    parser.add_argument("--cache-timeout", type=int, default=0)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        book_ids, token = seed(args.books)
+        print(
+            f"backend: {connection.vendor}, workers: {args.workers}, "
+            f"concurrency: {args.concurrency}, books: {args.books}"
+        )
+        print(
+            f"{'server':<18} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'errors':>8}"
+        )
+        for name in SERVERS:
+            run_server(name, args, book_ids, token)
+
+
+if __name__ == "__main__":
+    main()
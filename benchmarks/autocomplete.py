@@ -0,0 +1,72 @@
+"""
+Compare typeahead over the ``icontains`` title/author filters with the
+prefix-indexed completions.
+
+Seeds a catalog of each requested size (the same generator as
+``benchmarks.search``) and times every keystroke of a few queries, both
+fields per keystroke::
+
+    python -m benchmarks.autocomplete --sizes 10000,1000000,5000000
+"""
+
+import argparse
+import statistics
+import time
+
+from benchmarks._django import benchmark_database
+from benchmarks.search import seed
+
+from django.db import connection
+
+from book.autocomplete import FIELDS, complete
+from book.models import Book
+
+QUERIES = ["ancient", "silver", "ka", "zzzz"]
+
+
+def icontains(field, prefix, limit):
+    return list(
+        Book.objects.filter(**{f"{field}__icontains": prefix})
+        .order_by(field)
+        .values_list(field, flat=True)
+        .distinct()[:limit]
+    )
+
+
+def time_keystrokes(func, query, repeat):
+    samples = []
+    for _ in range(repeat):
+        for end in range(1, len(query) + 1):
+            started = time.perf_counter()
+            for field in FIELDS:
+                func(field, query[:end], 10)
+            samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+
+    with benchmark_database():
+        print(f"backend: {connection.vendor}")
+        print(
+            f"{'books':>10} {'query':<10} {'icontains p50/max ms':>21} "
+            f"{'prefix p50/max ms':>18}"
+        )
+        for size in sizes:
+            seed(size)
+            for query in QUERIES:
+                slow = time_keystrokes(icontains, query, args.repeat)
+                fast = time_keystrokes(complete, query, args.repeat)
+                print(
+                    f"{size:>10} {query:<10} {slow[0]:>11.2f}/{slow[1]:<9.2f} "
+                    f"{fast[0]:>8.2f}/{fast[1]:<9.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
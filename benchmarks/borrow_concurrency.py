@@ -0,0 +1,110 @@
+"""
+Concurrency benchmark for the borrow engine.
+
+Many threads borrow copies of a single book at once. The run reports
+borrows/sec and checks that no copy was oversold::
+
+    python -m benchmarks.borrow_concurrency --threads 32 --copies 500
+"""
+
+import argparse
+import threading
+import time
+
+from benchmarks._django import benchmark_database
+
+from django.db import OperationalError, close_old_connections, connection
+
+from book.models import Book, Loan
+from book.services import BorrowError, borrow_book
+from user.models import User
+
+
+def run(threads, copies, attempts_per_thread):
+    book = Book.objects.create(
+        title="Contended Book",
+        author="Bench Author",
+        isbn="9990000000001",
+        page_count=100,
+        total_copies=copies,
+        available_copies=copies,
+    )
+    users = [
+        User.objects.create_user(
+            username=f"bench{i}", email=f"bench{i}@example.com", password=None
+        )
+        for i in range(threads)
+    ]
+
+    results = {"borrowed": 0, "rejected": 0, "retried": 0}
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker(user):
+        borrowed = rejected = retried = 0
+        barrier.wait()
+        try:
+            for _ in range(attempts_per_thread):
+                while True:
+                    try:
+                        borrow_book(user, book.pk)
+                        borrowed += 1
+                    except BorrowError:
+                        rejected += 1
+                    except OperationalError:
+                        # SQLite serialises writers; a busy database is a retry,
+                        # never a lost update.
+                        retried += 1
+                        continue
+                    break
+        finally:
+            connection.close()
+        with lock:
+            results["borrowed"] += borrowed
+            results["rejected"] += rejected
+            results["retried"] += retried
+
+    pool = [threading.Thread(target=worker, args=(user,)) for user in users]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    close_old_connections()
+    book.refresh_from_db()
+    loans = Loan.objects.filter(book=book).count()
+    oversold = max(0, loans - copies)
+
+    print(f"backend:          {connection.vendor}")
+    print(f"threads:          {threads}")
+    print(f"attempts:         {threads * attempts_per_thread}")
+    print(f"borrowed:         {results['borrowed']}")
+    print(f"rejected:         {results['rejected']}")
+    print(f"busy retries:     {results['retried']}")
+    print(f"elapsed:          {elapsed:.3f}s")
+    print(f"borrows/sec:      {results['borrowed'] / elapsed:.1f}")
+    print(f"loans recorded:   {loans}")
+    print(f"available_copies: {book.available_copies}")
+    print(f"oversold:         {oversold}")
+
+    if oversold or book.available_copies < 0 or loans != results["borrowed"]:
+        raise SystemExit("FAIL: copies were oversold")
+    if book.available_copies != copies - loans:
+        raise SystemExit("FAIL: available_copies drifted from the loan count")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--copies", type=int, default=200)
+    parser.add_argument("--attempts", type=int, default=10)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        run(args.threads, args.copies, args.attempts)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Compare the circulation statistics served from the rollup tables with the
+same numbers aggregated from the loans table on every request.
+
+Seeds a loan history of each requested size, rebuilds the rollups and times
+the 30-day daily breakdown and the top-10 most borrowed books both ways::
+
+    python -m benchmarks.circulation_stats --sizes 100000,1000000,10000000
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from benchmarks._django import benchmark_database
+
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from book.models import Book, Loan
+from book.stats import daily_stats, most_borrowed, rebuild_circulation_stats
+from user.models import User
+
+BOOKS = 20000
+READERS = 2000
+
+
+def seed(total, batch_size=10000):
+    rng = random.Random(1234)
+    if not Book.objects.exists():
+        Book.objects.bulk_create(
+            Book(
+                title=f"Book {i}",
+                author=f"Author {i % 997}",
+                isbn=f"{i:013d}",
+                page_count=200,
+            )
+            for i in range(BOOKS)
+        )
+        User.objects.bulk_create(
+            User(username=f"reader{i}", email=f"reader{i}@example.com")
+            for i in range(READERS)
+        )
+    book_ids = list(Book.objects.values_list("pk", flat=True))
+    user_ids = list(User.objects.values_list("pk", flat=True))
+    now = timezone.now()
+
+    def loan():
+        borrowed = now - timedelta(seconds=rng.randint(0, 2 * 365 * 86400))
+        due = borrowed + timedelta(days=14)
+        returned = borrowed + timedelta(days=rng.uniform(1, 30))
+        return Loan(
+            user_id=rng.choice(user_ids),
+            # Popular books get most of the loans.
+            book_id=book_ids[int(rng.paretovariate(1.2)) % len(book_ids)],
+            borrowed_date=borrowed,
+            due_date=due,
+            returned_date=returned if returned < now else None,
+        )
+
+    created = Loan.objects.count()
+    while created < total:
+        size = min(batch_size, total - created)
+        Loan.objects.bulk_create(loan() for _ in range(size))
+        created += size
+
+
+def aggregate_daily(start, end):
+    # Datetime bounds, so the date columns' indexes can be used.
+    since = timezone.make_aware(datetime.combine(start, datetime.min.time()))
+    until = timezone.make_aware(
+        datetime.combine(end + timedelta(days=1), datetime.min.time())
+    )
+    loans = dict(
+        Loan.objects.filter(borrowed_date__gte=since, borrowed_date__lt=until)
+        .values_list(TruncDate("borrowed_date"))
+        .annotate(Count("pk"))
+        .order_by()
+    )
+    returns = list(
+        Loan.objects.filter(returned_date__gte=since, returned_date__lt=until)
+        .values(day=TruncDate("returned_date"))
+        .annotate(
+            returns=Count("pk"),
+            late_returns=Count("pk", filter=Q(returned_date__gt=F("due_date"))),
+        )
+        .order_by()
+    )
+    return loans, returns
+
+
+def aggregate_most_borrowed(limit):
+    return list(
+        Book.objects.annotate(loan_count=Count("loans"))
+        .order_by("-loan_count", "pk")
+        .values("pk", "title", "author", "loan_count")[:limit]
+    )
+
+
+def median_ms(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="100000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+
+    with benchmark_database():
+        print(
+            f"{'loans':>10} {'rebuild s':>10} {'query':<14} "
+            f"{'aggregate ms':>13} {'rollup ms':>10}"
+        )
+        for size in sizes:
+            seed(size)
+            started = time.perf_counter()
+            rebuild_circulation_stats()
+            rebuild = time.perf_counter() - started
+
+            end = timezone.localdate()
+            start = end - timedelta(days=29)
+            queries = [
+                (
+                    "daily 30d",
+                    lambda: aggregate_daily(start, end),
+                    lambda: daily_stats(start, end),
+                ),
+                (
+                    "top 10",
+                    lambda: aggregate_most_borrowed(10),
+                    lambda: most_borrowed(10),
+                ),
+            ]
+            for name, slow, fast in queries:
+                print(
+                    f"{size:>10} {rebuild:>10.1f} {name:<14} "
+                    f"{median_ms(slow, args.repeat):>13.2f} "
+                    f"{median_ms(fast, args.repeat):>10.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Cost of opening a PostgreSQL connection per request.
+
+Runs gunicorn with a threaded worker against PostgreSQL three ways: a new
+connection for every request (``CONN_MAX_AGE = 0``), persistent connections
+with health checks, and the psycopg connection pool with and without a
+health check on every checkout. Short book reads are measured for each,
+along with the connections the worker opened::
+
+    DEBUG=False DB_NAME=library_db python -m benchmarks.db_connections --threads 8
+
+The figures come from one worker's ``/metrics``, so keep ``--workers 1``
+unless only the latencies matter.
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import urllib.request
+
+from benchmarks._django import benchmark_database
+from benchmarks._server import load, percentile, running_server
+
+from django.db import connection
+
+from book.models import Book
+
+
+def modes(threads):
+    base = dict(connection.settings_dict)
+    options = {
+        key: value for key, value in base.get("OPTIONS", {}).items() if key != "pool"
+    }
+    pool = {"min_size": threads, "max_size": threads}
+    return {
+        "new connection": {**base, "CONN_MAX_AGE": 0, "OPTIONS": options},
+        "persistent": {
+            **base,
+            "CONN_MAX_AGE": 600,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": options,
+        },
+        "pool": {
+            **base,
+            "CONN_MAX_AGE": 0,
+            "CONN_HEALTH_CHECKS": False,
+            "OPTIONS": {**options, "pool": pool},
+        },
+        "pool, checked": {
+            **base,
+            "CONN_MAX_AGE": 0,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {**options, "pool": pool},
+        },
+    }
+
+
+def seed(books):
+    Book.objects.bulk_create(
+        Book(title=f"Pool Book {i}", author="Author", isbn=f"{i:013d}", page_count=100)
+        for i in range(books)
+    )
+
+
+METRICS_TOKEN = "benchmark"
+
+
+def scrape(port, name):
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/metrics",
+        headers={"Authorization": f"Bearer {METRICS_TOKEN}"},
+    )
+    with urllib.request.urlopen(request) as response:
+        body = response.read().decode()
+    match = re.search(rf'^{name}{{alias="default"}} (\S+)$', body, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def run(args):
+    command = [
+        "gunicorn",
+        "LibraryManager.wsgi:application",
+        "--worker-class",
+        "gthread",
+        "--workers",
+        str(args.workers),
+        "--threads",
+        str(args.threads),
+        "--bind",
+        "127.0.0.1:{port}",
+        "--log-level",
+        "warning",
+    ]
+    pks = list(Book.objects.values_list("pk", flat=True)[:50])
+    requests = [("GET", f"/api/books/{pk}/") for pk in pks]
+    print(
+        f"workers: {args.workers}, threads: {args.threads}, "
+        f"clients: {args.concurrency}, {args.duration:.0f}s per mode"
+    )
+    print(
+        f"{'mode':<16} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} "
+        f"{'connects':>9} {'checkouts':>10}"
+    )
+    for name, database in modes(args.threads).items():
+        env = {
+            "BENCH_DATABASE": json.dumps(database, default=str),
+            "METRICS_TOKEN": METRICS_TOKEN,
+        }
+        with running_server(command, env) as port:
+            # Without a pool every connection Django opens is a new server
+            # connection; with one, the pool counts the server connections.
+            counters = ["library_db_connections_total"]
+            if "pool" in database["OPTIONS"]:
+                counters.append("library_db_pool_connects_total")
+            asyncio.run(load(port, requests, args.concurrency, 1))
+            before = [scrape(port, counter) for counter in counters]
+            latencies, statuses, elapsed = asyncio.run(
+                load(port, requests, args.concurrency, args.duration)
+            )
+            deltas = [
+                scrape(port, counter) - start
+                for counter, start in zip(counters, before)
+            ]
+            checkouts, connects = deltas[0], deltas[-1]
+        errors = sum(n for code, n in statuses.items() if code != 200)
+        print(
+            f"{name:<16} {len(latencies) / elapsed:>8.1f} "
+            f"{percentile(latencies, 0.5) * 1000:>8.2f} "
+            f"{percentile(latencies, 0.99) * 1000:>8.2f} "
+            f"{connects:>9.0f} {checkouts:>10.0f}"
+            + (f"  ({errors} errors)" if errors else "")
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--books", type=int, default=200)
+    args = parser.parse_args()
+
+    if connection.vendor != "postgresql":
+        raise SystemExit(
+            "run with DEBUG=False and the DB_* settings of a PostgreSQL server"
+        )
+    with benchmark_database():
+        seed(args.books)
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
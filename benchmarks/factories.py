@@ -0,0 +1,59 @@
+"""
+factory_boy factories for seeding benchmark catalogs.
+
+Objects are built in memory and saved with ``bulk_create``; the seeding code
+in ``benchmarks.api_suite`` fixes copies, loan dates and counters so the
+rows stay consistent with what the borrow and return services maintain.
+"""
+
+from datetime import timedelta
+from datetime import timezone as dt_timezone
+
+import factory
+from factory.django import DjangoModelFactory
+
+from book.models import Book, Loan
+from user.models import User
+
+
+class UserFactory(DjangoModelFactory):
+    class Meta:
+        model = User
+
+    username = factory.Sequence(lambda n: f"reader{n}")
+    email = factory.LazyAttribute(lambda user: f"{user.username}@example.com")
+    first_name = factory.Faker("first_name")
+    last_name = factory.Faker("last_name")
+    phone_number = factory.Faker("numerify", text="+1-###-###-####")
+    address = factory.Faker("address")
+    date_of_birth = factory.Faker("date_of_birth", minimum_age=12, maximum_age=90)
+
+
+class BookFactory(DjangoModelFactory):
+    class Meta:
+        model = Book
+
+    title = factory.Faker("catch_phrase")
+    author = factory.Faker("name")
+    isbn = factory.Sequence(lambda n: f"{n:013d}")
+    page_count = factory.Faker("pyint", min_value=40, max_value=1200)
+    publisher = factory.Faker("company")
+    publication_date = factory.Faker("date_between", start_date="-80y")
+    description = factory.Faker("paragraph", nb_sentences=6)
+    total_copies = factory.Faker("pyint", min_value=1, max_value=5)
+    available_copies = factory.SelfAttribute("total_copies")
+
+
+class LoanFactory(DjangoModelFactory):
+    """Loans need ``user`` (or ``user_id``) and ``book`` passed in."""
+
+    class Meta:
+        model = Loan
+
+    borrowed_date = factory.Faker(
+        "date_time_between", start_date="-2y", tzinfo=dt_timezone.utc
+    )
+    due_date = factory.LazyAttribute(
+        lambda loan: loan.borrowed_date + timedelta(days=14)
+    )
+    returned_date = None
@@ -0,0 +1,108 @@
+"""
+CPU cost of turning 1,000 rows into a JSON list response.
+
+Compares ``BookSerializer``/``LoanSerializer`` with DRF's ``JSONRenderer``
+against the ``values_list()`` row plans with ``FastJSONRenderer``. Rows are
+fetched once up front, so only Python time is measured::
+
+    python -m benchmarks.list_serialization --rows 1000 --repeat 20
+"""
+
+import argparse
+import statistics
+import time
+from datetime import timedelta
+
+from benchmarks._django import benchmark_database
+
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from book.models import Book, Loan
+from book.renderers import FastJSONRenderer
+from book.rows import BOOK_ROWS, LOAN_ROWS
+from book.serializers import BookSerializer, LoanSerializer
+from user.models import User
+
+
+def seed(rows):
+    user = User.objects.create_user(
+        username="bench", email="bench@example.com", password=None
+    )
+    books = Book.objects.bulk_create(
+        Book(
+            title=f"Benchmark Book {i}",
+            author=f"Author {i % 50}",
+            isbn=f"{i:013d}",
+            page_count=100 + i % 400,
+            publisher="Bench Press",
+            publication_date=timezone.now().date() - timedelta(days=i),
+            description="A reasonably long description of the book. " * 4,
+            available_copies=i % 3,
+            total_copies=2,
+        )
+        for i in range(rows)
+    )
+    now = timezone.now()
+    Loan.objects.bulk_create(
+        Loan(
+            user=user,
+            book=book,
+            due_date=now + timedelta(days=i % 28 - 14),
+            returned_date=now if i % 2 else None,
+        )
+        for i, book in enumerate(books)
+    )
+
+
+def timed(render, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.process_time()
+        render()
+        samples.append((time.process_time() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        seed(args.rows)
+        cases = [
+            ("books", Book.objects.all(), BookSerializer, BOOK_ROWS),
+            (
+                "loans",
+                Loan.objects.select_related("user", "book"),
+                LoanSerializer,
+                LOAN_ROWS,
+            ),
+        ]
+        scale = 1000 / args.rows
+        print(f"CPU ms per 1,000 rows ({args.rows} rows, median of {args.repeat})")
+        print(f"{'':<8} {'serializer':>11} {'row plan':>10} {'speedup':>8}")
+        for name, queryset, serializer_class, plan in cases:
+            instances = list(queryset)
+            rows = list(plan.values_list(queryset))
+
+            def slow():
+                data = serializer_class(instances, many=True).data
+                return JSONRenderer().render(data)
+
+            def fast():
+                return FastJSONRenderer().render(plan.to_representation(rows))
+
+            assert slow() == fast()
+            slow_ms = timed(slow, args.repeat) * scale
+            fast_ms = timed(fast, args.repeat) * scale
+            print(
+                f"{name:<8} {slow_ms:>11.2f} {fast_ms:>10.2f} "
+                f"{slow_ms / fast_ms:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
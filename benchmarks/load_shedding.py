@@ -0,0 +1,123 @@
+"""
+Borrow latency while anonymous scrapers flood catalog search.
+
+Runs gunicorn with threaded workers and keeps one reader borrowing books
+while many anonymous clients search the catalog, with no protection, with
+the per-client throttles and with latency-based load shedding. Reports
+borrows/sec and their p99, and how the scraper traffic was answered::
+
+    python -m benchmarks.load_shedding --workers 2 --threads 8 --scrapers 128
+
+All scrapers share one address, so the throttles alone stop them; load
+shedding is what still holds when they come from many addresses.
+"""
+
+import argparse
+import asyncio
+import json
+
+from benchmarks._django import benchmark_database
+from benchmarks._server import load, percentile, running_server
+
+from django.db import connection
+from rest_framework_simplejwt.tokens import AccessToken
+
+from book.models import Book
+from user.models import User
+
+SCENARIOS = {
+    "no protection": {},
+    "throttles": {"BENCH_THROTTLE_RATES": json.dumps({"anon": "120/min"})},
+    "load shedding": {
+        "BENCH_LOAD_SHED_LATENCY": "0.05",
+        "BENCH_LOAD_SHED_MAX_IN_FLIGHT": "0",
+    },
+}
+
+
+def seed(books):
+    books = Book.objects.bulk_create(
+        Book(
+            title=f"Scraped Book {i}",
+            author="Author",
+            isbn=f"{i:013d}",
+            page_count=100,
+            total_copies=1000000,
+            available_copies=1000000,
+        )
+        for i in range(books)
+    )
+    reader = User.objects.create_user(
+        username="reader", email="reader@example.com", password="x"
+    )
+    return [book.pk for book in books], str(AccessToken.for_user(reader))
+
+
+async def measure(port, args, book_ids, token):
+    borrows = [
+        ("POST", "/api/books/loans/borrow/", token, {"book_id": pk})
+        for pk in book_ids[:100]
+    ]
+    searches = [
+        ("GET", f"/api/books/?search=book&page={page}") for page in range(1, 51)
+    ]
+    return await asyncio.gather(
+        load(port, borrows, args.concurrency, args.duration),
+        load(port, searches, args.scrapers, args.duration),
+    )
+
+
+def run(args, book_ids, token):
+    command = [
+        "gunicorn",
+        "LibraryManager.wsgi:application",
+        "--worker-class",
+        "gthread",
+        "--workers",
+        str(args.workers),
+        "--threads",
+        str(args.threads),
+        "--bind",
+        "127.0.0.1:{port}",
+        "--log-level",
+        "warning",
+    ]
+    print(
+        f"backend: {connection.vendor}, workers: {args.workers}, "
+        f"threads: {args.threads}, borrowers: {args.concurrency}, "
+        f"scrapers: {args.scrapers}"
+    )
+    print(
+        f"{'scenario':<16} {'borrows/s':>10} {'p99 ms':>8} "
+        f"{'searches/s':>11} {'429s':>7} {'503s':>7}"
+    )
+    for name, env in SCENARIOS.items():
+        with running_server(command, env) as port:
+            borrow, search = asyncio.run(measure(port, args, book_ids, token))
+            latencies, _, elapsed = borrow
+            search_latencies, statuses, search_elapsed = search
+            print(
+                f"{name:<16} {len(latencies) / elapsed:>10.1f} "
+                f"{percentile(latencies, 0.99) * 1000:>8.1f} "
+                f"{len(search_latencies) / search_elapsed:>11.1f} "
+                f"{statuses.get(429, 0):>7} {statuses.get(503, 0):>7}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--scrapers", type=int, default=128)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--books", type=int, default=20000)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        book_ids, token = seed(args.books)
+        run(args, book_ids, token)
+
+
+if __name__ == "__main__":
+    main()
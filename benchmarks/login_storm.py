@@ -0,0 +1,113 @@
+"""
+Catalog latency during a login storm.
+
+Runs gunicorn with threaded workers, keeps catalog reads going and measures
+their p99 alone and while many clients log in at once. This is done with
+no limit on concurrent password hashes and with the default limit::
+
+    python -m benchmarks.login_storm --workers 2 --threads 8 --logins 64
+"""
+
+import argparse
+import asyncio
+
+from benchmarks._django import benchmark_database
+from benchmarks._server import load, percentile, running_server
+
+from django.db import connection
+
+from book.models import Book
+from user.models import User
+
+SCENARIOS = {
+    "unbounded hashing": {"PASSWORD_HASHING_CONCURRENCY": "0"},
+    "bounded hashing": {},
+}
+
+
+def seed(books):
+    Book.objects.bulk_create(
+        Book(title=f"Storm Book {i}", author="Author", isbn=f"{i:013d}", page_count=100)
+        for i in range(books)
+    )
+    User.objects.create_user(
+        username="storm", email="storm@example.com", password="storm-pass-123"
+    )
+
+
+async def measure(port, args, storm):
+    catalog = [("GET", f"/api/books/?page={page}") for page in range(1, 6)]
+    login = [
+        (
+            "POST",
+            "/api/users/login/",
+            None,
+            {"username": "storm", "password": "storm-pass-123"},
+        )
+    ]
+    jobs = [load(port, catalog, args.concurrency, args.duration)]
+    if storm:
+        jobs.append(load(port, login, args.logins, args.duration))
+    return await asyncio.gather(*jobs)
+
+
+def run(args):
+    command = [
+        "gunicorn",
+        "LibraryManager.wsgi:application",
+        "--worker-class",
+        "gthread",
+        "--workers",
+        str(args.workers),
+        "--threads",
+        str(args.threads),
+        "--bind",
+        "127.0.0.1:{port}",
+        "--log-level",
+        "warning",
+    ]
+    print(
+        f"backend: {connection.vendor}, workers: {args.workers}, "
+        f"threads: {args.threads}, catalog clients: {args.concurrency}, "
+        f"login clients: {args.logins}"
+    )
+    print(
+        f"{'scenario':<34} {'catalog/s':>10} {'p99 ms':>8} "
+        f"{'logins/s':>9} {'503s':>6}"
+    )
+    for name, env in SCENARIOS.items():
+        with running_server(command, env) as port:
+            asyncio.run(measure(port, args, storm=False))
+            for storm in (False, True):
+                results = asyncio.run(measure(port, args, storm))
+                latencies, _, elapsed = results[0]
+                logins = rejected = 0
+                if storm:
+                    login_latencies, statuses, _ = results[1]
+                    logins = len(login_latencies) / elapsed
+                    rejected = statuses.get(503, 0)
+                label = f"{name}, {'login storm' if storm else 'catalog only'}"
+                print(
+                    f"{label:<34} {len(latencies) / elapsed:>10.1f} "
+                    f"{percentile(latencies, 0.99) * 1000:>8.1f} "
+                    f"{logins:>9.1f} {rejected:>6}"
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--books", type=int, default=2000)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        seed(args.books)
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Measure what request metrics cost per request.
+
+Times catalog detail and listing requests (cache disabled, so every request
+queries) through the test client with ``RequestMetricsMiddleware`` enabled
+and disabled::
+
+    python -m benchmarks.metrics_overhead --requests 2000
+"""
+
+import argparse
+import statistics
+import time
+
+from benchmarks._django import benchmark_database
+
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from book.models import Book
+
+
+def seed(total=100):
+    return Book.objects.bulk_create(
+        Book(
+            title=f"Book {i}",
+            author=f"Author {i % 7}",
+            isbn=f"{i:013d}",
+            page_count=100,
+        )
+        for i in range(total)
+    )
+
+
+def time_requests(path, requests, enabled):
+    with override_settings(REQUEST_METRICS_ENABLED=enabled):
+        client = APIClient()
+        client.get(path)
+        samples = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            client.get(path)
+            samples.append((time.perf_counter() - started) * 1_000_000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with benchmark_database(), override_settings(CATALOG_CACHE_TIMEOUT=0):
+        books = seed()
+        print(f"{'path':<24} {'off (us)':>10} {'on (us)':>10} {'overhead':>10}")
+        for path in (f"/api/books/{books[0].pk}/", "/api/books/"):
+            # Alternate the two modes and keep the best round of each, so
+            # machine noise does not land on one side only.
+            off, on = [], []
+            for _ in range(args.rounds):
+                off.append(time_requests(path, args.requests, enabled=False))
+                on.append(time_requests(path, args.requests, enabled=True))
+            off, on = min(off), min(on)
+            print(f"{path:<24} {off:>10.0f} {on:>10.0f} {(on - off) / off:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
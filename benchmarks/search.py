@@ -0,0 +1,98 @@
+"""
+Compare the full-text search backend with the old icontains filter.
+
+Seeds a catalog of each requested size and times the first page of
+``?search=`` results (page query plus COUNT) for a fixed set of queries::
+
+    python -m benchmarks.search --sizes 10000,1000000,5000000
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks._django import benchmark_database
+
+from django.db import connection
+
+from book.models import Book
+from book.search import IContainsSearchBackend, get_search_backend
+
+COMMON_WORDS = (
+    "ancient river winter garden shadow empire silver machine ocean forest "
+    "memory letter kingdom signal harbor engine mountain theory stranger "
+    "journey python history dragon science night promise island voice war"
+).split()
+SYLLABLES = "ka lo mi ren sha tor vel qua zin dor ith per ul an bre".split()
+
+
+def vocabulary(rng, size=20000):
+    words = set(COMMON_WORDS)
+    while len(words) < size:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    words = sorted(words)
+    rng.shuffle(words)
+    # Zipf-like weights: a few words are everywhere, most are rare.
+    return words, [1 / (rank + 1) for rank in range(len(words))]
+
+QUERIES = ["dragon", "silver harbor", "history of science", "pyth", "zzzz"]
+
+
+def seed(total, batch_size=5000):
+    rng = random.Random(1234)
+    words, weights = vocabulary(rng)
+
+    def text(count):
+        return " ".join(rng.choices(words, weights=weights, k=count))
+
+    created = Book.objects.count()
+    while created < total:
+        size = min(batch_size, total - created)
+        Book.objects.bulk_create(
+            Book(
+                title=text(3).title(),
+                author=text(2).title(),
+                isbn=f"{created + i:013d}",
+                page_count=rng.randint(50, 900),
+                description=text(rng.randint(40, 120)),
+            )
+            for i in range(size)
+        )
+        created += size
+
+
+def time_backend(backend, terms, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        queryset = backend.search(Book.objects.all(), terms)
+        queryset.count()
+        list(queryset[:10])
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+
+    with benchmark_database():
+        fulltext = get_search_backend(connection.alias)
+        icontains = IContainsSearchBackend()
+        print(f"backend: {connection.vendor} ({type(fulltext).__name__})")
+        print(f"{'books':>10} {'query':<20} {'icontains ms':>13} {'fulltext ms':>12}")
+        for size in sizes:
+            seed(size)
+            for query in QUERIES:
+                terms = query.split()
+                slow = time_backend(icontains, terms, args.repeat)
+                fast = time_backend(fulltext, terms, args.repeat)
+                print(f"{size:>10} {query:<20} {slow:>13.2f} {fast:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
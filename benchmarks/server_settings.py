@@ -0,0 +1,22 @@
+"""
+Settings for the servers started by the HTTP benchmarks.
+
+The benchmarks pass their throwaway database, cache timeout and throttling
+settings through the environment so the servers never touch the configured
+database.
+"""
+
+import json
+import os
+
+from LibraryManager.settings import *  # noqa: F401,F403
+
+DEBUG = False
+ALLOWED_HOSTS = ["127.0.0.1", "localhost"]
+SECURE_SSL_REDIRECT = False
+DATABASES = {"default": json.loads(os.environ["BENCH_DATABASE"])}
+CATALOG_CACHE_TIMEOUT = int(os.environ.get("BENCH_CACHE_TIMEOUT", "0"))
+# Throttling and load shedding are off unless a benchmark turns them on.
+THROTTLE_RATES = json.loads(os.environ.get("BENCH_THROTTLE_RATES", "{}"))
+LOAD_SHED_LATENCY = float(os.environ.get("BENCH_LOAD_SHED_LATENCY", "0"))
+LOAD_SHED_MAX_IN_FLIGHT = int(os.environ.get("BENCH_LOAD_SHED_MAX_IN_FLIGHT", "0"))
@@ -0,0 +1,83 @@
+"""
+Refresh-token rotation throughput as the revoked-token table grows.
+
+Fills ``RevokedToken`` up to each requested size with random entries, then
+rotates fresh refresh tokens through the refresh serializer and reports
+refreshes/sec. The time for a process's first full filter load is reported
+separately::
+
+    python -m benchmarks.token_refresh --sizes 100000,1000000,10000000
+"""
+
+import argparse
+import random
+import time
+from datetime import timedelta
+
+from benchmarks._django import benchmark_database
+
+from django.db import connection
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from user.blacklist import token_blacklist
+from user.models import RevokedToken, User
+from user.serializers import RotatingTokenRefreshSerializer
+
+
+def grow(rng, current, target, batch_size=50000):
+    expires_at = timezone.now() + timedelta(days=1)
+    while current < target:
+        count = min(batch_size, target - current)
+        RevokedToken.objects.bulk_create(
+            (
+                RevokedToken(
+                    jti_hash=rng.getrandbits(64) - 2**63, expires_at=expires_at
+                )
+                for _ in range(count)
+            ),
+            ignore_conflicts=True,
+        )
+        current += count
+    return current
+
+
+def run(sizes, refreshes):
+    rng = random.Random(0)
+    user = User.objects.create_user(
+        username="bench", email="bench@example.com", password=None
+    )
+    tokens = [str(RefreshToken.for_user(user)) for _ in range(refreshes)]
+
+    print(f"backend: {connection.vendor}, refreshes per size: {refreshes}")
+    print(f"{'revoked rows':>14} {'first load s':>13} {'refreshes/s':>12}")
+    current = 0
+    for size in sizes:
+        current = grow(rng, current, size)
+        token_blacklist.reset()
+        started = time.perf_counter()
+        token_blacklist.sync(force=True)
+        loaded = time.perf_counter() - started
+
+        batch, tokens = tokens, []
+        started = time.perf_counter()
+        for token in batch:
+            serializer = RotatingTokenRefreshSerializer(data={"refresh": token})
+            serializer.is_valid(raise_exception=True)
+            tokens.append(serializer.validated_data["refresh"])
+        elapsed = time.perf_counter() - started
+        print(f"{current:>14} {loaded:>13.2f} {len(batch) / elapsed:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--refreshes", type=int, default=2000)
+    args = parser.parse_args()
+
+    with benchmark_database():
+        run([int(size) for size in args.sizes.split(",")], args.refreshes)
+
+
+if __name__ == "__main__":
+    main()
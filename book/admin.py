@@ -1,5 +1,13 @@
 from django.contrib import admin
-from .models import Book, Loan
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+
+from LibraryManager.paginators import EstimatedCountPaginator
+
+from .autocomplete import starting_with
+from .models import ArchivedLoan, Book, Loan
+from .search import get_search_backend
+from .services import delete_loans, save_loan
 
 
 @admin.register(Book)
@@ -15,10 +23,77 @@ class BookAdmin(admin.ModelAdmin):
     list_filter = ("created_at", "publication_date")
     search_fields = ("title", "author", "isbn")
     readonly_fields = ("created_at", "updated_at")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # The API's full-text index, instead of icontains over every column.
+        terms = search_term.split()
+        backend = get_search_backend(queryset.db) if terms else None
+        if backend is None:
+            return super().get_search_results(request, queryset, search_term)
+        return backend.search(queryset, terms), False
+
+
+class LoanStatusFilter(admin.SimpleListFilter):
+    title = "status"
+    parameter_name = "status"
+
+    def lookups(self, request, model_admin):
+        return [
+            ("active", "Active"),
+            ("overdue", "Overdue"),
+            ("returned", "Returned"),
+        ]
+
+    def queryset(self, request, queryset):
+        if self.value() == "active":
+            return queryset.active()
+        if self.value() == "overdue":
+            return queryset.overdue()
+        if self.value() == "returned":
+            return queryset.returned()
+        return queryset
+
+
+class LoanSearchMixin:
+    """
+    Loan search answered from indexes.
+
+    A term matches the loan with that id, the loans of users whose username
+    starts with it and the loans of books whose title starts with it, up to
+    ``search_match_limit`` users and books.
+    """
+
+    search_fields = ("user__username", "book__title")
+    search_help_text = "Loan id, or the start of a username or book title."
+    search_match_limit = 100
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        limit = self.search_match_limit
+        users = (
+            get_user_model()
+            .objects.filter(username__startswith=term)
+            .order_by("username")
+            .values_list("pk", flat=True)[:limit]
+        )
+        books = (
+            starting_with(Book.objects.all(), "title", term)
+            .order_by("key")
+            .values_list("pk", flat=True)[:limit]
+        )
+        # Literal id lists keep every branch of the OR on a loan index.
+        condition = Q(user__in=list(users)) | Q(book__in=list(books))
+        if term.isdigit():
+            condition |= Q(pk=int(term))
+        return queryset.filter(condition), False
 
 
 @admin.register(Loan)
-class LoanAdmin(admin.ModelAdmin):
+class LoanAdmin(LoanSearchMixin, admin.ModelAdmin):
     list_display = (
         "user",
         "book",
@@ -27,6 +102,36 @@ class LoanAdmin(admin.ModelAdmin):
         "returned_date",
         "is_overdue",
     )
-    list_filter = ("borrowed_date", "due_date", "returned_date")
-    search_fields = ("user__username", "book__title")
+    list_filter = (LoanStatusFilter, "borrowed_date", "due_date", "returned_date")
+    list_select_related = ("user", "book")
+    autocomplete_fields = ("user", "book")
     readonly_fields = ("borrowed_date",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    # Through the services, so users' active loan counts and the books'
+    # available copies follow admin edits.
+    def save_model(self, request, obj, form, change):
+        save_loan(obj)
+
+    def delete_model(self, request, obj):
+        delete_loans(Loan.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        delete_loans(queryset)
+
+
+@admin.register(ArchivedLoan)
+class ArchivedLoanAdmin(LoanSearchMixin, admin.ModelAdmin):
+    list_display = ("user", "book", "borrowed_date", "due_date", "returned_date")
+    list_filter = ("borrowed_date", "returned_date")
+    list_select_related = ("user", "book")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    # The archive is written by ``archive_loans`` only.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,13 @@
+from django.urls import path
+from . import async_views
+
+urlpatterns = [
+    path("", async_views.book_list, name="async-book-list"),
+    path("<int:pk>/", async_views.book_detail, name="async-book-detail"),
+    path("loans/borrow/", async_views.borrow, name="async-loan-borrow"),
+    path(
+        "loans/<int:pk>/return_book/",
+        async_views.return_book,
+        name="async-loan-return-book",
+    ),
+]
@@ -0,0 +1,257 @@
+"""
+Async implementations of the hot API endpoints, served under ``/api/async/``.
+
+They return the same bodies as the DRF views and run natively under an ASGI
+server: reads go through Django's async ORM, while borrowing and returning
+call the transactional services through ``sync_to_async`` because the async
+ORM cannot open transactions. Reads always use the primary; borrowing and
+returning pin the user to it, as the DRF views do, so the user's next reads
+from those views skip the replicas too.
+"""
+
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from LibraryManager.replicas import apin_to_primary
+from LibraryManager.throttling import check_request, default_tier
+from user.authentication import AsyncJWTAuthentication
+
+from .cache import (
+    BOOK_VERSION_KEY,
+    CATALOG_VERSION_KEY,
+    acatalog_cache_key,
+    catalog_cache_stats,
+    get_catalog_cache,
+)
+from .models import Book, Loan
+from .renderers import FastJSONRenderer
+from .serializers import BorrowBookSerializer, LoanSerializer
+from .services import BorrowError, ReturnError, borrow_book, return_loan
+from .views import BookViewSet
+
+authenticator = AsyncJWTAuthentication()
+
+
+def json_response(data, status=status.HTTP_200_OK, headers=None):
+    return HttpResponse(
+        FastJSONRenderer().render(data),
+        status=status,
+        content_type="application/json",
+        headers=headers,
+    )
+
+
+def async_api(methods, authenticated=False, tier=None):
+    """
+    Wrap an async view with JWT authentication, throttling and DRF-style
+    error bodies.
+
+    ``request.user`` is set from the bearer token, never from the session, so
+    nothing on the request path falls back to synchronous database access.
+    Public views (``authenticated=False``) skip the token and its user
+    lookup altogether. ``tier`` is the view's throttle tier, as
+    ``throttle_tier`` is for the DRF views.
+    """
+
+    def decorator(view):
+        @csrf_exempt
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                if request.method not in methods:
+                    raise exceptions.MethodNotAllowed(request.method)
+                request.user = AnonymousUser()
+                if authenticated:
+                    result = await authenticator.aauthenticate(request)
+                    if result is None:
+                        raise exceptions.NotAuthenticated()
+                    request.user = result[0]
+                check_request(request, tier or default_tier(request))
+                return await view(request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                return error_response(request, exc)
+
+        wrapper.http_method_names = [method.lower() for method in methods]
+        return wrapper
+
+    return decorator
+
+
+def error_response(request, exc):
+    headers = {}
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        headers["WWW-Authenticate"] = authenticator.authenticate_header(request)
+    if getattr(exc, "wait", None):
+        headers["Retry-After"] = "%d" % exc.wait
+    if isinstance(exc.detail, (list, dict)):
+        data = exc.detail
+    else:
+        data = {"detail": exc.detail}
+    return json_response(data, status=exc.status_code, headers=headers)
+
+
+def drf_request(request):
+    # Only used to parse bodies and query parameters the way DRF does; the
+    # user has already been authenticated by ``async_api``.
+    return Request(
+        request,
+        parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES],
+        authenticators=(),
+    )
+
+
+async def cached(request, version_keys, produce):
+    # Same keys and namespaces as ``CatalogCacheMixin``, through the async
+    # cache API so network backends never block the event loop.
+    timeout = getattr(settings, "CATALOG_CACHE_TIMEOUT", 60)
+    if not timeout:
+        return json_response(await produce())
+
+    cache = get_catalog_cache()
+    key = await acatalog_cache_key(request.path, request.GET, version_keys)
+    data = await cache.aget(key)
+    if data is not None:
+        catalog_cache_stats.record(hit=True)
+        return json_response(data, headers={"X-Cache": "HIT"})
+
+    catalog_cache_stats.record(hit=False)
+    data = await produce()
+    await cache.aset(key, data, timeout)
+    return json_response(data, headers={"X-Cache": "MISS"})
+
+
+async def paginate(request, queryset, view):
+    """
+    The same pagination and envelope as the DRF views: page numbers, or
+    keyset cursors with ``?pagination=cursor``.
+    """
+    paginator = view.paginator
+    if paginator.is_keyset_request(view.request):
+        rows = await paginator.apaginate_queryset(queryset, view.request)
+        return paginator.get_paginated_response(rows).data
+
+    page_size = api_settings.PAGE_SIZE
+    try:
+        number = int(request.GET.get("page", 1))
+    except ValueError:
+        number = 0
+    count = await queryset.acount()
+    offset = (number - 1) * page_size
+    if number < 1 or (number > 1 and offset >= count):
+        raise exceptions.NotFound("Invalid page.")
+
+    results = [row async for row in queryset[offset : offset + page_size]]
+    url = request.build_absolute_uri()
+    next_url = None
+    if offset + page_size < count:
+        next_url = replace_query_param(url, "page", number + 1)
+    previous_url = None
+    if number == 2:
+        previous_url = remove_query_param(url, "page")
+    elif number > 2:
+        previous_url = replace_query_param(url, "page", number - 1)
+    return {
+        "count": count,
+        "next": next_url,
+        "previous": previous_url,
+        "results": results,
+    }
+
+
+def catalog_view(request, action):
+    # Reuse the viewset's queryset, filter backends and sparse fields so
+    # ``?author=``, ``?search=``, ``?ordering=`` and ``?fields=`` behave
+    # exactly as on /api/books/.
+    return BookViewSet(
+        request=drf_request(request),
+        format_kwarg=None,
+        action=action,
+        args=(),
+        kwargs={},
+    )
+
+
+@async_api(["GET"])
+async def book_list(request):
+    async def produce():
+        view = catalog_view(request, "list")
+        queryset = view.filter_queryset(view.get_queryset())
+        if not getattr(settings, "FAST_LIST_RESPONSES", True):
+            page = await paginate(request, queryset, view)
+            page["results"] = view.get_serializer(page["results"], many=True).data
+            return page
+        plan = view.get_row_plan()
+        page = await paginate(request, plan.values_list(queryset), view)
+        page["results"] = plan.to_representation(page["results"])
+        return page
+
+    return await cached(request, [CATALOG_VERSION_KEY], produce)
+
+
+@async_api(["GET"])
+async def book_detail(request, pk):
+    async def produce():
+        view = catalog_view(request, "retrieve")
+        # Filtered like ``get_object()``, which also applies ``?fields=``.
+        queryset = view.filter_queryset(view.get_queryset())
+        try:
+            book = await queryset.aget(pk=pk)
+        except Book.DoesNotExist:
+            raise exceptions.NotFound("No Book matches the given query.")
+        return view.get_serializer(book).data
+
+    return await cached(
+        request, [CATALOG_VERSION_KEY, BOOK_VERSION_KEY.format(pk)], produce
+    )
+
+
+def _borrow(user, book_id, duration_days):
+    loan = borrow_book(user, book_id, duration_days)
+    return LoanSerializer(loan).data
+
+
+@async_api(["POST"], authenticated=True, tier="circulation")
+async def borrow(request):
+    serializer = BorrowBookSerializer(data=drf_request(request).data)
+    serializer.is_valid(raise_exception=True)
+    try:
+        data = await sync_to_async(_borrow)(
+            request.user,
+            serializer.validated_data["book_id"],
+            serializer.validated_data["duration_days"],
+        )
+    except BorrowError as exc:
+        raise exceptions.ValidationError({"book_id": [str(exc)]})
+    await apin_to_primary(request.user)
+    return json_response(data, status=status.HTTP_201_CREATED)
+
+
+@async_api(["POST"], authenticated=True, tier="circulation")
+async def return_book(request, pk):
+    loans = Loan.objects.select_related("user", "book")
+    if not request.user.is_staff:
+        loans = loans.filter(user=request.user)
+    try:
+        loan = await loans.aget(pk=pk)
+    except Loan.DoesNotExist:
+        raise exceptions.NotFound("No Loan matches the given query.")
+
+    if loan.returned_date:
+        return json_response(
+            {"error": "Book already returned"}, status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        await sync_to_async(return_loan)(loan)
+    except ReturnError as exc:
+        return json_response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    await apin_to_primary(request.user)
+    return json_response(LoanSerializer(loan).data)
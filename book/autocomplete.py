@@ -0,0 +1,65 @@
+"""
+Title and author completions served from prefix indexes.
+
+Migration ``0007_book_prefix_indexes`` indexes ``lower(title)`` and
+``lower(author)``, under the "C" collation on PostgreSQL. The keys are then
+ordered by code point, so every key starting with a prefix sits in one
+contiguous index range, which is scanned in order and stops after ``limit``
+distinct values. SQLite's ``lower()`` only folds ASCII letters.
+"""
+
+import sys
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.functions import Collate, Lower
+
+from .models import Book
+
+FIELDS = ("title", "author")
+
+
+def prefix_key(field, using):
+    key = Lower(field)
+    if connections[using].vendor == "postgresql":
+        return Collate(key, "C")
+    return key
+
+
+def prefix_range(prefix):
+    """
+    ``(lower, upper)`` bounds of the keys starting with ``prefix``.
+
+    ``upper`` is None when the last character is the highest code point and
+    cannot be incremented.
+    """
+    last = ord(prefix[-1])
+    if last == sys.maxunicode:
+        return prefix, None
+    return prefix, prefix[:-1] + chr(last + 1)
+
+
+def starting_with(queryset, field, prefix):
+    """``queryset`` filtered to rows whose ``field`` starts with ``prefix``."""
+    lower, upper = prefix_range(prefix.lower())
+    queryset = queryset.alias(key=prefix_key(field, queryset.db))
+    if upper is None:
+        return queryset.filter(key__startswith=lower)
+    return queryset.filter(Q(key__gte=lower) & Q(key__lt=upper))
+
+
+def complete(field, prefix, limit, queryset=None):
+    """Up to ``limit`` distinct values of ``field`` starting with ``prefix``."""
+    if queryset is None:
+        queryset = Book.objects.all()
+    rows = (
+        starting_with(queryset, field, prefix)
+        .order_by("key", field)
+        .values_list(field, flat=True)
+        .distinct()[:limit]
+    )
+    return list(rows)
+
+
+def autocomplete(prefix, limit):
+    return {f"{field}s": complete(field, prefix, limit) for field in FIELDS}
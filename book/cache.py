@@ -0,0 +1,183 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from LibraryManager.replicas import current_read_database
+
+CATALOG_VERSION_KEY = "catalog:version"
+BOOK_VERSION_KEY = "catalog:book:{}:version"
+CATALOG_CHANGED_KEY = "catalog:changed_at"
+# Title and author completions only change when books are added, edited or
+# removed, not when copies are borrowed or returned.
+AUTOCOMPLETE_VERSION_KEY = "catalog:autocomplete:version"
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+catalog_cache_stats = CacheStats()
+
+
+def get_catalog_cache():
+    return caches[getattr(settings, "CATALOG_CACHE_ALIAS", "default")]
+
+
+def _get_version(key):
+    cache = get_catalog_cache()
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so a namespace evicted from the cache can never
+        # come back with a version an old entry was stored under.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+async def _aget_version(key):
+    cache = get_catalog_cache()
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), None)
+        version = await cache.aget(key)
+    return version
+
+
+def _bump_version(key):
+    cache = get_catalog_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def invalidate_catalog(book_ids=(), completions=False):
+    """
+    Invalidate cached catalog listings and the detail entries of ``book_ids``.
+
+    Pass ``completions=True`` when titles or authors may have changed, to
+    invalidate the cached autocomplete responses too. Versions are bumped
+    straight away and again once the surrounding transaction commits, so a
+    reader that cached pre-commit rows in between is invalidated as well.
+    """
+    book_ids = list(book_ids)
+
+    def bump():
+        get_catalog_cache().set(CATALOG_CHANGED_KEY, time.time(), None)
+        _bump_version(CATALOG_VERSION_KEY)
+        for book_id in book_ids:
+            _bump_version(BOOK_VERSION_KEY.format(book_id))
+        if completions:
+            _bump_version(AUTOCOMPLETE_VERSION_KEY)
+
+    bump()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(bump)
+
+
+def cacheable_read():
+    """
+    Whether this request's catalog reads may be cached.
+
+    A replica may not have replayed a write for up to
+    ``REPLICA_STICKY_SECONDS``. Rows it returns in that window would
+    otherwise be cached under the version that write just bumped.
+    """
+    if current_read_database() is None:
+        return True
+    changed_at = get_catalog_cache().get(CATALOG_CHANGED_KEY)
+    lag = getattr(settings, "REPLICA_STICKY_SECONDS", 10)
+    return changed_at is None or time.time() - changed_at >= lag
+
+
+class CatalogCacheMixin:
+    """
+    Read-through cache for catalog ``list`` and ``retrieve`` responses.
+
+    Keys combine the request path and its normalised query string with a
+    namespace version: listings share the catalog version and each detail
+    entry also carries its book's version. Writes bump the versions instead
+    of deleting keys, and ``CATALOG_CACHE_TIMEOUT`` bounds staleness should an
+    invalidation ever be lost. Reads served by a replica shortly after a
+    write are not cached; see ``cacheable_read()``.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            request, [CATALOG_VERSION_KEY], super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        book_version_key = BOOK_VERSION_KEY.format(kwargs.get(self.lookup_field))
+        return self.cached_response(
+            request,
+            [CATALOG_VERSION_KEY, book_version_key],
+            super().retrieve,
+            *args,
+            **kwargs,
+        )
+
+    def cached_response(self, request, version_keys, handler, *args, **kwargs):
+        timeout = getattr(settings, "CATALOG_CACHE_TIMEOUT", 60)
+        if not timeout or request.method not in ("GET", "HEAD"):
+            return handler(request, *args, **kwargs)
+
+        cache = get_catalog_cache()
+        key = self.get_cache_key(request, version_keys)
+        data = cache.get(key)
+        if data is not None:
+            catalog_cache_stats.record(hit=True)
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        catalog_cache_stats.record(hit=False)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK and cacheable_read():
+            cache.set(key, response.data, timeout)
+        response["X-Cache"] = "MISS"
+        return response
+
+    def get_cache_key(self, request, version_keys):
+        return catalog_cache_key(request.path, request.query_params, version_keys)
+
+
+def catalog_cache_key(path, query_params, version_keys):
+    versions = [_get_version(key) for key in version_keys]
+    return _build_cache_key(path, query_params, versions)
+
+
+async def acatalog_cache_key(path, query_params, version_keys):
+    versions = [await _aget_version(key) for key in version_keys]
+    return _build_cache_key(path, query_params, versions)
+
+
+def _build_cache_key(path, query_params, versions):
+    params = sorted(
+        (name, value)
+        for name, values in query_params.lists()
+        for value in values
+        if value != ""
+    )
+    digest = hashlib.md5(
+        repr((path, params)).encode(), usedforsecurity=False
+    ).hexdigest()
+    return f"catalog:{':'.join(map(str, versions))}:{digest}"
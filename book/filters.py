@@ -1,5 +1,6 @@
 import django_filters
-from .models import Book, Loan
+from rest_framework.settings import api_settings
+from .models import ArchivedLoan, Book, Loan
 
 
 class BookFilter(django_filters.FilterSet):
@@ -28,14 +29,24 @@ class LoanFilter(django_filters.FilterSet):
 
     def filter_active(self, queryset, name, value):
         if value:
-            return queryset.filter(returned_date__isnull=True)
-        return queryset.filter(returned_date__isnull=False)
+            return self.order_by_due_date(queryset.active())
+        return queryset.returned()
 
     def filter_overdue(self, queryset, name, value):
-        from django.utils import timezone
-
         if value:
-            return queryset.filter(
-                returned_date__isnull=True, due_date__lt=timezone.now()
-            )
+            return self.order_by_due_date(queryset.overdue())
         return queryset
+
+    def order_by_due_date(self, queryset):
+        # Active and overdue listings are ordered by due date, which walks
+        # the partial indexes in order, unless the client asked for another
+        # ordering with ``?ordering=``.
+        params = getattr(self.request, "query_params", {})
+        if params.get(api_settings.ORDERING_PARAM):
+            return queryset
+        return queryset.order_by("due_date")
+
+
+class ArchivedLoanFilter(LoanFilter):
+    class Meta(LoanFilter.Meta):
+        model = ArchivedLoan
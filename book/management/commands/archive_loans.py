@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from book.archive import archive_loans
+
+
+class Command(BaseCommand):
+    help = "Move loans returned more than --days days ago to the loan archive"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, help="Default: the LOAN_ARCHIVE_DAYS setting."
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        moved = archive_loans(days=options["days"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Archived {moved} loan(s)"))
@@ -0,0 +1,243 @@
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from rest_framework import serializers
+
+from book.cache import invalidate_catalog
+from book.models import Book
+from book.serializers import BookSerializer
+
+# Columns refreshed when an ISBN already exists. Copy counts are only set on
+# insert so an import never resets the availability of books on loan.
+UPSERT_FIELDS = [
+    "title",
+    "author",
+    "page_count",
+    "publisher",
+    "publication_date",
+    "description",
+    "updated_at",
+]
+
+
+class BookImportSerializer(BookSerializer):
+    # Uniqueness is handled by the upsert, not by a query per row.
+    class Meta(BookSerializer.Meta):
+        extra_kwargs = {"isbn": {"validators": []}}
+
+
+def validate_chunk(records, first_number):
+    """
+    Validate a chunk of raw records with the API's rules.
+
+    Runs in worker processes, so it must not touch the database. Returns the
+    validated rows and ``(record number, error)`` pairs.
+    """
+    serializer = BookImportSerializer()
+    rows, errors = [], []
+    for number, record in enumerate(records, start=first_number):
+        if "__error__" in record:
+            errors.append((number, record["__error__"]))
+            continue
+        # Blank CSV cells mean "not provided" so optional fields get defaults.
+        data = {
+            key: value
+            for key, value in record.items()
+            if key is not None and value not in ("", None)
+        }
+        try:
+            rows.append(serializer.run_validation(data))
+        except serializers.ValidationError as exc:
+            errors.append((number, exc.detail))
+    return rows, errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream books from a CSV or JSON Lines file and upsert them by ISBN "
+        "in batches. Re-running after a crash resumes from the checkpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSONL file, or - for stdin")
+        parser.add_argument("--format", choices=["csv", "jsonl"])
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=min(4, os.cpu_count() or 1),
+            help="Processes used to validate records (1 validates in-process).",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="Progress file (default: <path>.checkpoint). Not used for stdin.",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore an existing checkpoint and start from the first record.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or self.guess_format(path)
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive")
+
+        self.source = os.path.abspath(path)
+        checkpoint = None
+        if path != "-":
+            checkpoint = options["checkpoint"] or f"{path}.checkpoint"
+        skip = 0
+        if checkpoint and not options["restart"]:
+            skip = self.read_checkpoint(checkpoint)
+            if skip:
+                self.stdout.write(f"Resuming after record {skip}")
+
+        stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+        try:
+            records = self.read_records(stream, file_format)
+            stats = self.import_records(
+                itertools.islice(records, skip, None),
+                skip,
+                batch_size,
+                checkpoint,
+                options["workers"],
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        invalidate_catalog(completions=True)
+        if checkpoint and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {stats['imported']} book(s), skipped {stats['invalid']} "
+                f"invalid record(s) in {stats['elapsed']:.1f}s "
+                f"({stats['rate']:.0f} records/s)"
+            )
+        )
+
+    def guess_format(self, path):
+        if path.endswith((".jsonl", ".ndjson")):
+            return "jsonl"
+        if path.endswith(".csv"):
+            return "csv"
+        raise CommandError("Cannot guess the file format, pass --format")
+
+    def read_records(self, stream, file_format):
+        if file_format == "csv":
+            for row in csv.DictReader(stream):
+                yield row
+            return
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield {"__error__": f"line {line_number}: invalid JSON"}
+
+    def import_records(self, records, position, batch_size, checkpoint, workers):
+        started = time.perf_counter()
+        stats = {"imported": 0, "invalid": 0}
+
+        for chunk_size, rows, errors in self.validated_chunks(
+            records, position, batch_size, workers
+        ):
+            for number, error in errors:
+                self.stderr.write(f"Record {number}: {error}")
+            # Last occurrence of an ISBN in a batch wins.
+            books = {row["isbn"]: Book(**row) for row in rows}
+
+            with transaction.atomic():
+                Book.objects.bulk_create(
+                    books.values(),
+                    update_conflicts=True,
+                    unique_fields=["isbn"],
+                    update_fields=UPSERT_FIELDS,
+                )
+            position += chunk_size
+            stats["imported"] += len(books)
+            stats["invalid"] += len(errors)
+            if checkpoint:
+                self.write_checkpoint(checkpoint, position)
+
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{position} records read, {stats['imported']} imported, "
+                f"{stats['invalid']} invalid ({stats['imported'] / elapsed:.0f} books/s)"
+            )
+
+        stats["elapsed"] = time.perf_counter() - started
+        stats["rate"] = (stats["imported"] + stats["invalid"]) / max(
+            stats["elapsed"], 1e-9
+        )
+        return stats
+
+    def validated_chunks(self, records, position, batch_size, workers):
+        """
+        Yield ``(size, rows, errors)`` per batch, in input order.
+
+        With several workers, validation runs in forked processes while the
+        main process writes; at most two batches per worker are in flight so
+        memory stays bounded whatever the input size.
+        """
+        chunks = iter(lambda: list(itertools.islice(records, batch_size)), [])
+        fork = "fork" in multiprocessing.get_all_start_methods()
+        if workers <= 1 or not fork:
+            for chunk in chunks:
+                yield (len(chunk), *validate_chunk(chunk, position + 1))
+                position += len(chunk)
+            return
+
+        # Forked workers must not inherit open database connections. One held
+        # open by an enclosing transaction stays: the workers never use it
+        # and exit without closing it.
+        for connection in connections.all(initialized_only=True):
+            if not connection.in_atomic_block:
+                connection.close()
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(
+                    (len(chunk), pool.apply_async(validate_chunk, (chunk, position + 1)))
+                )
+                position += len(chunk)
+                if len(pending) >= workers * 2:
+                    size, result = pending.popleft()
+                    yield (size, *result.get())
+            while pending:
+                size, result = pending.popleft()
+                yield (size, *result.get())
+
+    def read_checkpoint(self, checkpoint):
+        try:
+            with open(checkpoint) as fh:
+                state = json.load(fh)
+        except FileNotFoundError:
+            return 0
+        except ValueError:
+            raise CommandError(f"Corrupt checkpoint file {checkpoint}")
+        if state.get("source") != self.source:
+            raise CommandError(
+                f"{checkpoint} belongs to {state.get('source')}, pass --restart"
+            )
+        return int(state.get("records", 0))
+
+    def write_checkpoint(self, checkpoint, position):
+        state = {"source": self.source, "records": position}
+        tmp = f"{checkpoint}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump(state, fh)
+        os.replace(tmp, checkpoint)
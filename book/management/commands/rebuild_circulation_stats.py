@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from book.stats import rebuild_circulation_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily and per-book circulation rollups from the loans table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50000)
+
+    def handle(self, *args, **options):
+        books, days = rebuild_circulation_stats(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt circulation stats for {books} book(s) and {days} day(s)"
+            )
+        )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from book.services import reconcile_active_loan_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute each user's cached active loan count from the loans table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        corrected = reconcile_active_loan_counts(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Corrected active loan count for {corrected} user(s)")
+        )
@@ -0,0 +1,81 @@
+# Generated by Django 6.0 on 2026-10-18 18:05
+
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE book_book ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(author, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(isbn, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX book_book_search_idx ON book_book USING GIN (search_vector)",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS book_book_search_idx",
+    "ALTER TABLE book_book DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE book_book_fts USING fts5(
+        title, author, isbn, description,
+        content='book_book', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER book_book_fts_ai AFTER INSERT ON book_book BEGIN
+        INSERT INTO book_book_fts (rowid, title, author, isbn, description)
+        VALUES (new.id, new.title, new.author, new.isbn, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER book_book_fts_ad AFTER DELETE ON book_book BEGIN
+        INSERT INTO book_book_fts (book_book_fts, rowid, title, author, isbn, description)
+        VALUES ('delete', old.id, old.title, old.author, old.isbn, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER book_book_fts_au
+    AFTER UPDATE OF title, author, isbn, description ON book_book BEGIN
+        INSERT INTO book_book_fts (book_book_fts, rowid, title, author, isbn, description)
+        VALUES ('delete', old.id, old.title, old.author, old.isbn, old.description);
+        INSERT INTO book_book_fts (rowid, title, author, isbn, description)
+        VALUES (new.id, new.title, new.author, new.isbn, new.description);
+    END
+    """,
+    "INSERT INTO book_book_fts (book_book_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS book_book_fts_au",
+    "DROP TRIGGER IF EXISTS book_book_fts_ad",
+    "DROP TRIGGER IF EXISTS book_book_fts_ai",
+    "DROP TABLE IF EXISTS book_book_fts",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"postgresql": POSTGRES_FORWARD, "sqlite": SQLITE_FORWARD}),
+            _run({"postgresql": POSTGRES_REVERSE, "sqlite": SQLITE_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-18 18:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0004_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(condition=models.Q(('returned_date__isnull', True)), fields=['due_date'], name='loan_active_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(condition=models.Q(('returned_date__isnull', True)), fields=['user', 'due_date'], name='loan_active_user_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(condition=models.Q(('returned_date__isnull', True)), fields=['book', 'due_date'], name='loan_active_book_due_idx'),
+        ),
+    ]
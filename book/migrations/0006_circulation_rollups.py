@@ -0,0 +1,42 @@
+# Generated by Django 6.0 on 2026-10-18 19:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0005_active_loan_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookCirculation',
+            fields=[
+                ('loans', models.PositiveIntegerField(default=0)),
+                ('returns', models.PositiveIntegerField(default=0)),
+                ('late_returns', models.PositiveIntegerField(default=0)),
+                ('loan_seconds', models.BigIntegerField(default=0)),
+                ('book', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='circulation', serialize=False, to='book.book')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-loans', 'book'], name='book_circulation_loans_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyCirculation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('loans', models.PositiveIntegerField(default=0)),
+                ('returns', models.PositiveIntegerField(default=0)),
+                ('late_returns', models.PositiveIntegerField(default=0)),
+                ('loan_seconds', models.BigIntegerField(default=0)),
+                ('date', models.DateField()),
+                ('shard', models.PositiveSmallIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'shard'), name='daily_circulation_date_shard')],
+            },
+        ),
+    ]
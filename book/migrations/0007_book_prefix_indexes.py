@@ -0,0 +1,40 @@
+# Generated by Django 6.0 on 2026-10-18 20:10
+
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    'CREATE INDEX book_book_title_prefix_idx ON book_book ((lower(title) COLLATE "C"))',
+    'CREATE INDEX book_book_author_prefix_idx ON book_book ((lower(author) COLLATE "C"))',
+]
+
+SQLITE_FORWARD = [
+    "CREATE INDEX book_book_title_prefix_idx ON book_book (lower(title))",
+    "CREATE INDEX book_book_author_prefix_idx ON book_book (lower(author))",
+]
+
+REVERSE = [
+    "DROP INDEX IF EXISTS book_book_title_prefix_idx",
+    "DROP INDEX IF EXISTS book_book_author_prefix_idx",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0006_circulation_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            _run({"postgresql": POSTGRES_FORWARD, "sqlite": SQLITE_FORWARD}),
+            _run({"postgresql": REVERSE, "sqlite": REVERSE}),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-18 20:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('book', '0007_book_prefix_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedLoan',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('borrowed_date', models.DateTimeField()),
+                ('due_date', models.DateTimeField()),
+                ('returned_date', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('book', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_loans', to='book.book')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_loans', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-borrowed_date'],
+                'indexes': [models.Index(fields=['user', 'borrowed_date'], name='book_archiv_user_id_263074_idx'), models.Index(fields=['book', 'borrowed_date'], name='book_archiv_book_id_24459a_idx'), models.Index(fields=['borrowed_date', 'id'], name='book_archiv_borrowe_8c790f_idx')],
+            },
+        ),
+    ]
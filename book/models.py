@@ -23,6 +23,7 @@ class Book(models.Model):
             models.Index(fields=["isbn"]),
             models.Index(fields=["title"]),
             models.Index(fields=["author"]),
+            models.Index(fields=["created_at", "id"]),
         ]
 
     def __str__(self):
@@ -33,6 +34,22 @@ class Book(models.Model):
         return self.available_copies > 0
 
 
+# Condition of the partial indexes below. Filtering with it lets the planner
+# use those indexes instead of scanning the whole loan history.
+ACTIVE_LOAN = models.Q(returned_date__isnull=True)
+
+
+class LoanQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(ACTIVE_LOAN)
+
+    def returned(self):
+        return self.filter(returned_date__isnull=False)
+
+    def overdue(self, now=None):
+        return self.active().filter(due_date__lt=now or timezone.now())
+
+
 class Loan(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="loans"
@@ -42,11 +59,28 @@ class Loan(models.Model):
     due_date = models.DateTimeField()
     returned_date = models.DateTimeField(null=True, blank=True)
 
+    objects = LoanQuerySet.as_manager()
+
     class Meta:
         ordering = ["-borrowed_date"]
         indexes = [
             models.Index(fields=["user", "returned_date"]),
             models.Index(fields=["book", "returned_date"]),
+            models.Index(fields=["borrowed_date", "id"]),
+            # Partial indexes over the small set of loans still out.
+            models.Index(
+                fields=["due_date"], condition=ACTIVE_LOAN, name="loan_active_due_idx"
+            ),
+            models.Index(
+                fields=["user", "due_date"],
+                condition=ACTIVE_LOAN,
+                name="loan_active_user_due_idx",
+            ),
+            models.Index(
+                fields=["book", "due_date"],
+                condition=ACTIVE_LOAN,
+                name="loan_active_book_due_idx",
+            ),
         ]
 
     def __str__(self):
@@ -61,3 +95,88 @@ class Loan(models.Model):
     @property
     def is_active(self):
         return self.returned_date is None
+
+
+class ArchivedLoan(models.Model):
+    """
+    A returned loan moved out of ``Loan`` by ``book.archive``.
+
+    Rows keep their ``Loan`` id and field names, so the loan row plan and
+    filters work on both tables.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="archived_loans",
+    )
+    book = models.ForeignKey(
+        Book, on_delete=models.CASCADE, related_name="archived_loans"
+    )
+    borrowed_date = models.DateTimeField()
+    due_date = models.DateTimeField()
+    returned_date = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = LoanQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["-borrowed_date"]
+        indexes = [
+            models.Index(fields=["user", "borrowed_date"]),
+            models.Index(fields=["book", "borrowed_date"]),
+            models.Index(fields=["borrowed_date", "id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.book.title}"
+
+    is_overdue = False
+    is_active = False
+
+
+class CirculationCounts(models.Model):
+    """
+    Loan counters kept up to date by ``book.stats``.
+
+    ``loan_seconds`` adds up the length of the returned loans, so the average
+    duration is ``loan_seconds / returns``.
+    """
+
+    loans = models.PositiveIntegerField(default=0)
+    returns = models.PositiveIntegerField(default=0)
+    late_returns = models.PositiveIntegerField(default=0)
+    loan_seconds = models.BigIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class DailyCirculation(CirculationCounts):
+    # Each day is spread over a few shard rows so concurrent borrows do not
+    # all queue on one row lock; readers add the shards up.
+    date = models.DateField()
+    shard = models.PositiveSmallIntegerField(default=0)
+
+    KEY_FIELDS = ("date", "shard")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "shard"], name="daily_circulation_date_shard"
+            )
+        ]
+
+
+class BookCirculation(CirculationCounts):
+    book = models.OneToOneField(
+        Book, on_delete=models.CASCADE, primary_key=True, related_name="circulation"
+    )
+
+    KEY_FIELDS = ("book",)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-loans", "book"], name="book_circulation_loans_idx")
+        ]
@@ -0,0 +1,218 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework import exceptions
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination with an opt-in keyset (cursor) mode.
+
+    ``?pagination=cursor`` starts a keyset walk and every ``next``/``previous``
+    link carries an opaque ``?cursor=``. Pages are fetched with
+    ``WHERE (key, id) < (last_key, last_id)`` on the active ordering field
+    plus an id tiebreaker, so every page costs the same however deep the
+    client goes. The ``COUNT(*)`` is skipped unless ``?count=true`` is given.
+
+    The ordering must start with a non-null column. Orderings that cannot be
+    keyed on, such as the relevance rank of ``?search=``, answer ``400``
+    rather than silently paging in another order.
+    """
+
+    cursor_query_param = "cursor"
+    mode_query_param = "pagination"
+    count_query_param = "count"
+    invalid_cursor_message = "Invalid cursor"
+    invalid_ordering_message = (
+        "Cursor pagination cannot follow this ordering; pass a field with "
+        "?ordering= or use page numbers."
+    )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_keyset_request(request):
+            self.keyset = False
+            return super().paginate_queryset(queryset, request, view)
+
+        page_queryset = self.get_keyset_queryset(queryset, request)
+        self.count = queryset.count() if self.wants_count(request) else None
+        return self.finish_keyset_page(list(page_queryset))
+
+    async def apaginate_queryset(self, queryset, request):
+        """``paginate_queryset()`` in cursor mode, for async views."""
+        page_queryset = self.get_keyset_queryset(queryset, request)
+        self.count = await queryset.acount() if self.wants_count(request) else None
+        return self.finish_keyset_page([row async for row in page_queryset])
+
+    def get_keyset_queryset(self, queryset, request):
+        """The query for one page in cursor mode, plus one row to spot a next page."""
+        self.keyset = True
+        self.request = request
+        self.base_url = remove_query_param(
+            request.build_absolute_uri(), self.mode_query_param
+        )
+        self.keyset_page_size = self.get_page_size(request)
+
+        field, descending = self.get_keyset_ordering(queryset)
+        self.field = field
+        self.pk_attname = queryset.model._meta.pk.attname
+        self.position, self.reverse = self.decode_cursor(request)
+
+        # Walking backwards flips both the comparison and the sort.
+        before = descending != self.reverse
+        queryset = queryset.order_by(
+            *(f"-{name}" if before else name for name in (field.name, "pk"))
+        )
+        if self.position is not None:
+            value, pk = self.position
+            op = "lt" if before else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{field.name}__{op}": value})
+                | Q(**{field.name: value, f"pk__{op}": pk})
+            )
+        return queryset[: self.keyset_page_size + 1]
+
+    def finish_keyset_page(self, rows):
+        has_more = len(rows) > self.keyset_page_size
+        rows = rows[: self.keyset_page_size]
+        if self.reverse:
+            rows.reverse()
+        self.page = rows
+
+        started = self.position is not None
+        self.has_next = has_more if not self.reverse else started
+        self.has_previous = started if not self.reverse else has_more
+        return rows
+
+    def is_keyset_request(self, request):
+        return (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.mode_query_param) == "cursor"
+        )
+
+    def wants_count(self, request):
+        return request.query_params.get(self.count_query_param, "").lower() in (
+            "1",
+            "true",
+        )
+
+    def get_keyset_ordering(self, queryset):
+        model = queryset.model
+        ordering = list(queryset.query.order_by) or list(model._meta.ordering)
+        if not ordering:
+            return model._meta.pk, True
+        term = ordering[0]
+        field = None
+        if isinstance(term, str):
+            try:
+                field = model._meta.get_field(term.lstrip("-"))
+            except FieldDoesNotExist:
+                pass
+        if field is None or not field.concrete or field.null or field.is_relation:
+            raise exceptions.ValidationError(
+                {self.mode_query_param: [self.invalid_ordering_message]}
+            )
+        return field, term.startswith("-")
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            value = self.field.to_python(payload["v"])
+            pk = int(payload["id"])
+            reverse = bool(payload.get("r"))
+        except (
+            BinasciiError,
+            KeyError,
+            TypeError,
+            UnicodeError,
+            ValueError,
+            ValidationError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return (value, pk), reverse
+
+    def encode_cursor(self, row, reverse):
+        # Rows are model instances or named ``values_list()`` tuples.
+        value = getattr(row, self.field.attname)
+        if hasattr(value, "isoformat"):
+            value = value.isoformat()
+        payload = {"v": value, "id": getattr(row, self.pk_attname)}
+        if reverse:
+            payload["r"] = 1
+        encoded = urlsafe_b64encode(
+            json.dumps(payload, separators=(",", ":")).encode()
+        ).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        body = {}
+        if self.count is not None:
+            body["count"] = self.count
+        body["next"] = self.get_next_link()
+        body["previous"] = self.get_previous_link()
+        body["results"] = data
+        return Response(body)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["required"] = ["results"]
+        return response_schema
+
+    def get_html_context(self):
+        if not self.keyset:
+            return super().get_html_context()
+        return {
+            "previous_url": self.get_previous_link(),
+            "next_url": self.get_next_link(),
+            "page_links": [],
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.mode_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to `cursor` to page with keyset cursors.",
+                "schema": {"type": "string", "enum": ["cursor"]},
+            },
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Include the total count in cursor mode.",
+                "schema": {"type": "boolean"},
+            },
+        ]
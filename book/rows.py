@@ -0,0 +1,291 @@
+"""
+Serializer-equivalent output built straight from ``values_list()`` rows.
+
+Listing pages through ``BookSerializer`` and ``LoanSerializer`` builds a
+model instance and runs every field's ``to_representation`` for each row.
+A ``RowPlan`` resolves the fields once, when the module is imported, and
+then turns row tuples into the same dicts with one getter per field.
+"""
+
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .serializers import BookSerializer, LoanSerializer
+
+
+def encode_datetime(value, tz):
+    # ``serializers.DateTimeField.to_representation`` with the default
+    # ISO 8601 format, in time zone ``tz``.
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = timezone.make_aware(value, tz) if tz is not None else value
+    elif tz is not None:
+        value = value.astimezone(tz)
+    value = value.isoformat()
+    return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+
+def encode_date(value):
+    return None if value is None else value.isoformat()
+
+
+def _column_getter(field, index):
+    # Returns a factory taking the current time zone, so it is looked up once
+    # per page rather than once per value.
+    get = itemgetter(index)
+    if isinstance(field, serializers.DateTimeField):
+        return lambda tz: lambda row: encode_datetime(get(row), tz)
+    if isinstance(field, serializers.DateField):
+        return lambda tz: lambda row: encode_date(get(row))
+    return lambda tz: get
+
+
+def _computed_getter(function, indexes):
+    getters = [itemgetter(index) for index in indexes]
+
+    def getter(row):
+        return function(*[get(row) for get in getters])
+
+    return lambda tz: getter
+
+
+class RowPlan:
+    """
+    Maps ``values_list()`` rows to the dicts an API serializer produces.
+
+    ``columns`` maps output names to ORM lookups; ``computed`` maps output
+    names to ``(lookups, function)`` pairs for serializer properties, the
+    function taking the raw values of those lookups. Field order and the
+    date and datetime formats come from ``serializer``. ``fields`` limits
+    the output, and the columns read, to a subset of the serializer's fields.
+    """
+
+    def __init__(self, serializer, columns, computed=None, fields=None):
+        self.serializer = serializer
+        self.columns = columns
+        self.computed = computed = computed or {}
+        serializer_fields = serializer.fields
+        self.fields = [
+            name for name in serializer_fields if fields is None or name in fields
+        ]
+        lookups = []
+        for name in self.fields:
+            if name in computed:
+                lookups.extend(computed[name][0])
+            else:
+                lookups.append(columns[name])
+        self.lookups = list(dict.fromkeys(lookups))
+        position = {lookup: index for index, lookup in enumerate(self.lookups)}
+        self._getters = []
+        for name in self.fields:
+            if name in computed:
+                lookups, function = computed[name]
+                getter = _computed_getter(
+                    function, [position[lookup] for lookup in lookups]
+                )
+            else:
+                getter = _column_getter(
+                    serializer_fields[name], position[columns[name]]
+                )
+            self._getters.append(getter)
+
+    def project(self, fields):
+        """A plan for just ``fields``, in serializer order."""
+        return RowPlan(self.serializer, self.columns, self.computed, fields)
+
+    def query_lookups(self, queryset):
+        """
+        ``lookups`` plus the primary key and the ordering fields.
+
+        The keyset paginator reads the last row's ordering value and primary
+        key, so they are fetched even when the output leaves them out.
+        """
+        opts = queryset.model._meta
+        names = [opts.pk.attname]
+        for term in queryset.query.order_by or opts.ordering:
+            if not isinstance(term, str):
+                continue
+            try:
+                field = opts.get_field(term.lstrip("-"))
+            except FieldDoesNotExist:
+                continue
+            if field.concrete and not field.is_relation:
+                names.append(field.name)
+        return list(dict.fromkeys([*self.lookups, *names]))
+
+    def values_list(self, queryset):
+        # Named rows let the keyset paginator read the cursor fields by name.
+        return queryset.values_list(*self.query_lookups(queryset), named=True)
+
+    def iter_rows(self, rows):
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        names = self.fields
+        getters = [make_getter(tz) for make_getter in self._getters]
+        for row in rows:
+            yield dict(zip(names, [get(row) for get in getters]))
+
+    def to_representation(self, rows):
+        return list(self.iter_rows(rows))
+
+
+BOOK_ROWS = RowPlan(
+    BookSerializer(),
+    columns={
+        "id": "id",
+        "title": "title",
+        "author": "author",
+        "isbn": "isbn",
+        "page_count": "page_count",
+        "publisher": "publisher",
+        "publication_date": "publication_date",
+        "description": "description",
+        "available_copies": "available_copies",
+        "total_copies": "total_copies",
+        "created_at": "created_at",
+        "updated_at": "updated_at",
+    },
+    computed={
+        "is_available": (["available_copies"], lambda available: available > 0),
+    },
+)
+
+LOAN_ROWS = RowPlan(
+    LoanSerializer(),
+    columns={
+        "id": "id",
+        "user": "user",
+        "user_username": "user__username",
+        "book": "book",
+        "book_title": "book__title",
+        "borrowed_date": "borrowed_date",
+        "due_date": "due_date",
+        "returned_date": "returned_date",
+    },
+    computed={
+        "is_overdue": (
+            ["returned_date", "due_date"],
+            lambda returned, due: returned is None and timezone.now() > due,
+        ),
+        "is_active": (["returned_date"], lambda returned: returned is None),
+    },
+)
+
+
+class RowPlanListMixin:
+    """
+    ``list`` that renders rows through ``row_plan`` instead of the serializer.
+
+    Filtering, ordering and pagination are unchanged; only the rows are read
+    with ``values_list()``. ``FAST_LIST_RESPONSES = False`` goes back to the
+    serializer.
+    """
+
+    row_plan = None
+
+    def get_row_plan(self):
+        return self.row_plan
+
+    def list(self, request, *args, **kwargs):
+        if not getattr(settings, "FAST_LIST_RESPONSES", True):
+            return super().list(request, *args, **kwargs)
+
+        plan = self.get_row_plan()
+        queryset = plan.values_list(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(plan.to_representation(page))
+        return Response(plan.to_representation(queryset))
+
+
+class SparseFieldsMixin:
+    """
+    ``?fields=`` and ``?omit=`` for views with a ``row_plan``.
+
+    Both take comma-separated serializer field names. Reads return only the
+    selected fields and fetch only the columns those fields need, through
+    the row plan's ``values_list()`` or, where the serializer renders the
+    response, through ``only()``.
+    """
+
+    fields_query_param = "fields"
+    omit_query_param = "omit"
+    sparse_field_actions = ("list", "retrieve", "export")
+
+    def get_sparse_fields(self):
+        if not hasattr(self, "_sparse_fields"):
+            self._sparse_fields = self.parse_sparse_fields()
+        return self._sparse_fields
+
+    def parse_sparse_fields(self):
+        params = self.request.query_params
+        if self.action not in self.sparse_field_actions:
+            return None
+        if not params.get(self.fields_query_param) and not params.get(
+            self.omit_query_param
+        ):
+            return None
+
+        available = self.row_plan.fields
+        selected, errors = {}, {}
+        for param in (self.fields_query_param, self.omit_query_param):
+            names = [
+                name.strip()
+                for name in params.get(param, "").split(",")
+                if name.strip()
+            ]
+            unknown = [name for name in names if name not in available]
+            if unknown:
+                errors[param] = [f"Unknown field(s): {', '.join(unknown)}."]
+            selected[param] = set(names)
+        if errors:
+            raise ValidationError(errors)
+
+        fields = [
+            name
+            for name in available
+            if (
+                not selected[self.fields_query_param]
+                or name in selected[self.fields_query_param]
+            )
+            and name not in selected[self.omit_query_param]
+        ]
+        if not fields:
+            raise ValidationError(
+                {self.omit_query_param: ["At least one field must remain."]}
+            )
+        return fields
+
+    def get_row_plan(self):
+        fields = self.get_sparse_fields()
+        plan = super().get_row_plan()
+        return plan if fields is None else plan.project(fields)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.get_sparse_fields() is None:
+            return queryset
+        lookups = self.get_row_plan().query_lookups(queryset)
+        if queryset.query.select_related:
+            # A deferred relation cannot also be followed by select_related().
+            related = {lookup.split("__")[0] for lookup in lookups if "__" in lookup}
+            queryset = queryset.select_related(None)
+            if related:
+                queryset = queryset.select_related(*related)
+        return queryset.only(*lookups)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            target = getattr(serializer, "child", serializer)
+            for name in list(target.fields):
+                if name not in fields:
+                    target.fields.pop(name)
+        return serializer
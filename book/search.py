@@ -0,0 +1,133 @@
+from django.conf import settings
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from rest_framework.filters import SearchFilter
+
+from .models import Book
+
+FTS_TABLE = f"{Book._meta.db_table}_fts"
+
+
+class PostgresSearchBackend:
+    """
+    Ranked search over the ``search_vector`` generated column.
+
+    The column and its GIN index are created by migration
+    ``0003_book_search_index`` and are maintained by PostgreSQL itself.
+    """
+
+    def search(self, queryset, terms):
+        table = queryset.model._meta.db_table
+        # Every term must match; the last one also as a prefix, so results
+        # follow the user while they type.
+        tsquery = "(websearch_to_tsquery('english', %s) && to_tsquery('english', %s))"
+        params = [" ".join(terms[:-1]), self.prefix_query(terms[-1])]
+        return (
+            queryset.filter(
+                RawSQL(
+                    f'"{table}"."search_vector" @@ {tsquery}',
+                    params,
+                    output_field=BooleanField(),
+                )
+            )
+            .annotate(
+                search_rank=RawSQL(
+                    f'ts_rank("{table}"."search_vector", {tsquery})',
+                    params,
+                    output_field=FloatField(),
+                )
+            )
+            .order_by("-search_rank", "-created_at")
+        )
+
+    @staticmethod
+    def prefix_query(term):
+        # A quoted tsquery lexeme, so user input is never parsed as operators.
+        term = term.replace("\\", "\\\\").replace("'", "''")
+        return f"'{term}':*"
+
+
+class SQLiteSearchBackend:
+    """
+    Ranked search over the FTS5 shadow table ``book_book_fts``.
+
+    Triggers created by migration ``0003_book_search_index`` keep the shadow
+    table in sync with inserts, deletes and updates of the indexed columns.
+    """
+
+    # bm25() weights for title, author, isbn and description.
+    weights = (10.0, 10.0, 10.0, 1.0)
+
+    def search(self, queryset, terms):
+        table = queryset.model._meta.db_table
+        weights = ", ".join(str(weight) for weight in self.weights)
+        # A join lets FTS5 drive the query from its index and score each
+        # match once; a correlated rank subquery re-runs MATCH per row.
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[
+                f'"{FTS_TABLE}".rowid = "{table}"."id"',
+                f'"{FTS_TABLE}" MATCH %s',
+            ],
+            params=[self.match_expression(terms)],
+            # bm25() scores better matches with more negative numbers.
+            select={"search_rank": f'bm25("{FTS_TABLE}", {weights})'},
+        ).order_by("search_rank", "-created_at")
+
+    @staticmethod
+    def match_expression(terms):
+        # Quote every term so user input can never be parsed as FTS5 query
+        # syntax, and let the last one match as a prefix for search-as-you-type.
+        phrases = ['"{}"'.format(term.replace('"', '""')) for term in terms]
+        phrases[-1] += "*"
+        return " ".join(phrases)
+
+
+class IContainsSearchBackend:
+    """The pre-full-text behaviour, kept for benchmarks and comparisons."""
+
+    fields = ("title", "author", "isbn", "description")
+
+    def search(self, queryset, terms):
+        for term in terms:
+            condition = Q()
+            for field in self.fields:
+                condition |= Q(**{f"{field}__icontains": term})
+            queryset = queryset.filter(condition)
+        return queryset
+
+
+SEARCH_BACKENDS = {
+    "postgresql": PostgresSearchBackend,
+    "sqlite": SQLiteSearchBackend,
+}
+
+
+def get_search_backend(using):
+    backend_path = getattr(settings, "BOOK_SEARCH_BACKEND", None)
+    if backend_path:
+        return import_string(backend_path)()
+    backend_class = SEARCH_BACKENDS.get(connections[using].vendor)
+    return backend_class() if backend_class else None
+
+
+class BookSearchFilter(SearchFilter):
+    """
+    ``?search=`` backed by the database's full-text index.
+
+    Results are ordered by relevance unless the client also passes
+    ``?ordering=``. Databases without a registered backend fall back to
+    DRF's ``icontains`` search.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = [term for term in self.get_search_terms(request) if term]
+        if not terms:
+            return queryset
+
+        backend = get_search_backend(queryset.db)
+        if backend is None:
+            return super().filter_queryset(request, queryset, view)
+        return backend.search(queryset, terms)
@@ -1,7 +1,13 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
 from .models import Book, Loan
-from django.utils import timezone
-from datetime import timedelta
+from .services import BorrowError, borrow_book, save_loan
+
+MAX_BULK_ITEMS = 50
+DEFAULT_STATS_DAYS = 30
+MAX_STATS_DAYS = 366
 
 
 class BookSerializer(serializers.ModelSerializer):
@@ -37,28 +43,67 @@ class LoanSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("This book is not available for loan")
         return value
 
+    def update(self, instance, validated_data):
+        # Through the service, so changing the book moves the claimed copy.
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        return save_loan(instance)
+
 
 class BorrowBookSerializer(serializers.Serializer):
     book_id = serializers.IntegerField()
     duration_days = serializers.IntegerField(default=14, min_value=1, max_value=90)
 
-    def validate_book_id(self, value):
+    def create(self, validated_data):
         try:
-            book = Book.objects.get(id=value)
-            if not book.is_available:
-                raise serializers.ValidationError("This book is not available")
-        except Book.DoesNotExist:
-            raise serializers.ValidationError("Book not found")
-        return value
+            return borrow_book(
+                self.context["request"].user,
+                validated_data["book_id"],
+                validated_data["duration_days"],
+            )
+        except BorrowError as exc:
+            raise serializers.ValidationError({"book_id": [str(exc)]})
+
+
+class BulkBorrowSerializer(serializers.Serializer):
+    book_ids = serializers.ListField(
+        child=serializers.IntegerField(), min_length=1, max_length=MAX_BULK_ITEMS
+    )
+    duration_days = serializers.IntegerField(default=14, min_value=1, max_value=90)
+
+
+class BulkReturnSerializer(serializers.Serializer):
+    loan_ids = serializers.ListField(
+        child=serializers.IntegerField(), min_length=1, max_length=MAX_BULK_ITEMS
+    )
+
+
+class DailyStatsQuerySerializer(serializers.Serializer):
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        end = attrs.get("end") or timezone.localdate()
+        start = attrs.get("start") or end - timedelta(days=DEFAULT_STATS_DAYS - 1)
+        if start > end:
+            raise serializers.ValidationError("start must not be after end")
+        if (end - start).days >= MAX_STATS_DAYS:
+            raise serializers.ValidationError(
+                f"Choose a range of at most {MAX_STATS_DAYS} days"
+            )
+        return {"start": start, "end": end}
+
+
+class SummaryStatsQuerySerializer(serializers.Serializer):
+    days = serializers.IntegerField(
+        default=DEFAULT_STATS_DAYS, min_value=1, max_value=MAX_STATS_DAYS
+    )
 
-    def create(self, validated_data):
-        user = self.context["request"].user
-        book = Book.objects.get(id=validated_data["book_id"])
-        due_date = timezone.now() + timedelta(days=validated_data["duration_days"])
 
-        loan = Loan.objects.create(user=user, book=book, due_date=due_date)
+class MostBorrowedQuerySerializer(serializers.Serializer):
+    limit = serializers.IntegerField(default=10, min_value=1, max_value=100)
 
-        book.available_copies -= 1
-        book.save()
 
-        return loan
+class AutocompleteQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=100)
+    limit = serializers.IntegerField(default=10, min_value=1, max_value=25)
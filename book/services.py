@@ -0,0 +1,299 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from user.authentication import invalidate_users
+
+from .cache import invalidate_catalog
+from .models import Book, Loan
+from .stats import record_borrows, record_returns
+
+
+class BorrowError(Exception):
+    pass
+
+
+class ReturnError(Exception):
+    pass
+
+
+def borrow_book(user, book_id, duration_days=14):
+    """
+    Claim one copy of ``book_id`` for ``user`` and record the loan.
+
+    The copy is claimed with a single conditional ``UPDATE`` so concurrent
+    borrowers can never drive ``available_copies`` below zero, and the loan
+    is inserted in the same transaction.
+    """
+    due_date = timezone.now() + timedelta(days=duration_days)
+
+    with transaction.atomic():
+        claimed = Book.objects.filter(pk=book_id, available_copies__gt=0).update(
+            available_copies=F("available_copies") - 1
+        )
+        if not claimed:
+            if Book.objects.filter(pk=book_id).exists():
+                raise BorrowError("This book is not available")
+            raise BorrowError("Book not found")
+
+        loan = Loan.objects.create(user=user, book_id=book_id, due_date=due_date)
+        _adjust_active_loans({user.pk: 1})
+        record_borrows([loan])
+        invalidate_catalog([book_id])
+        return loan
+
+
+def borrow_books(user, book_ids, duration_days=14):
+    """
+    Borrow several books in one transaction.
+
+    Returns ``(book_id, loan, error)`` for every distinct id, in request order.
+    Availability is read (and the rows locked) with one query, copies are
+    claimed with one set-based ``UPDATE`` and the loans are bulk inserted.
+    """
+    book_ids = list(dict.fromkeys(book_ids))
+    due_date = timezone.now() + timedelta(days=duration_days)
+
+    with transaction.atomic():
+        copies = dict(
+            Book.objects.select_for_update()
+            .filter(pk__in=book_ids)
+            .values_list("pk", "available_copies")
+        )
+        claim = [pk for pk in book_ids if copies.get(pk, 0) > 0]
+
+        loans = {}
+        if claim:
+            claimed = Book.objects.filter(pk__in=claim, available_copies__gt=0).update(
+                available_copies=F("available_copies") - 1
+            )
+            if claimed != len(claim):
+                raise BorrowError("Availability changed during checkout, please retry")
+            created = Loan.objects.bulk_create(
+                [Loan(user=user, book_id=pk, due_date=due_date) for pk in claim]
+            )
+            _adjust_active_loans({user.pk: len(created)})
+            record_borrows(created)
+            invalidate_catalog(claim)
+            loans = {
+                loan.book_id: loan
+                for loan in Loan.objects.select_related("user", "book").filter(
+                    pk__in=[loan.pk for loan in created]
+                )
+            }
+
+    results = []
+    for pk in book_ids:
+        if pk in loans:
+            results.append((pk, loans[pk], None))
+        elif pk in copies:
+            results.append((pk, None, "This book is not available"))
+        else:
+            results.append((pk, None, "Book not found"))
+    return results
+
+
+def return_loan(loan):
+    now = timezone.now()
+
+    with transaction.atomic():
+        returned = Loan.objects.filter(pk=loan.pk, returned_date__isnull=True).update(
+            returned_date=now
+        )
+        if not returned:
+            raise ReturnError("Book already returned")
+        _release_copies(Counter([loan.book_id]))
+        _adjust_active_loans({loan.user_id: -1})
+        record_returns([(loan.book_id, loan.borrowed_date, loan.due_date)], now)
+
+    loan.returned_date = now
+    return loan
+
+
+def return_loans(user, loan_ids):
+    """
+    Return several loans in one transaction.
+
+    Returns ``(loan_id, loan, error)`` for every distinct id, in request order.
+    Non-staff users can only return their own loans.
+    """
+    loan_ids = list(dict.fromkeys(loan_ids))
+    now = timezone.now()
+
+    with transaction.atomic():
+        queryset = Loan.objects.select_for_update().filter(pk__in=loan_ids)
+        if not user.is_staff:
+            queryset = queryset.filter(user=user)
+        # pk -> (book_id, user_id, returned_date, borrowed_date, due_date)
+        found = {
+            pk: loan
+            for pk, *loan in queryset.values_list(
+                "pk", "book_id", "user_id", "returned_date", "borrowed_date", "due_date"
+            )
+        }
+        returnable = [pk for pk in loan_ids if pk in found and found[pk][2] is None]
+
+        loans = {}
+        if returnable:
+            returned = Loan.objects.filter(
+                pk__in=returnable, returned_date__isnull=True
+            ).update(returned_date=now)
+            if returned != len(returnable):
+                raise ReturnError("Loans changed during return, please retry")
+            _release_copies(Counter(found[pk][0] for pk in returnable))
+            _adjust_active_loans(
+                {
+                    user_id: -count
+                    for user_id, count in Counter(
+                        found[pk][1] for pk in returnable
+                    ).items()
+                }
+            )
+            record_returns(
+                [(found[pk][0], found[pk][3], found[pk][4]) for pk in returnable], now
+            )
+            loans = Loan.objects.select_related("user", "book").in_bulk(returnable)
+
+    results = []
+    for pk in loan_ids:
+        if pk in loans:
+            results.append((pk, loans[pk], None))
+        elif pk in found:
+            results.append((pk, None, "Book already returned"))
+        else:
+            results.append((pk, None, "Loan not found"))
+    return results
+
+
+def save_loan(loan):
+    """
+    Save a loan edited outside borrowing and returning, e.g. in the admin.
+
+    Moves ``active_loans_count`` and ``available_copies`` with it: a loan
+    that stops being active, or moves to another user or book, gives back
+    what it held and takes it from its new user and book. New loans and
+    returns are counted in the circulation rollups; other edits to loans
+    already counted there, such as reopening a returned loan, are not, so
+    run ``rebuild_circulation_stats`` after those.
+    """
+    with transaction.atomic():
+        created = loan.pk is None
+        before = []
+        if not created:
+            before = list(
+                Loan.objects.select_for_update()
+                .active()
+                .filter(pk=loan.pk)
+                .values_list("user_id", "book_id")
+            )
+        loan.save()
+        after = [(loan.user_id, loan.book_id)] if loan.returned_date is None else []
+        _move_active_loans(before, after)
+        if created:
+            record_borrows([loan])
+        if loan.returned_date is not None and (created or before):
+            record_returns(
+                [(loan.book_id, loan.borrowed_date, loan.due_date)],
+                loan.returned_date,
+            )
+    return loan
+
+
+def delete_loans(queryset):
+    """
+    Delete the loans in ``queryset``, releasing what the active ones held.
+
+    The circulation rollups keep counting the deleted loans until
+    ``rebuild_circulation_stats`` runs.
+    """
+    with transaction.atomic():
+        active = list(
+            queryset.select_for_update().active().values_list("user_id", "book_id")
+        )
+        deleted, _ = queryset.delete()
+        _move_active_loans(active, [])
+    return deleted
+
+
+def _move_active_loans(removed, added):
+    # Both are lists of (user_id, book_id) for active loans.
+    users, books = Counter(), Counter()
+    for user_id, book_id in removed:
+        users[user_id] -= 1
+        books[book_id] += 1
+    for user_id, book_id in added:
+        users[user_id] += 1
+        books[book_id] -= 1
+    users = {user_id: delta for user_id, delta in users.items() if delta}
+    books = {book_id: delta for book_id, delta in books.items() if delta}
+    if books:
+        _release_copies(books)
+    if users:
+        _adjust_active_loans(users)
+
+
+def _release_copies(book_counts):
+    # One UPDATE per distinct increment; a visit rarely returns two copies of
+    # the same title, so this is almost always a single statement.
+    by_increment = defaultdict(list)
+    for book_id, count in book_counts.items():
+        by_increment[count].append(book_id)
+    for increment, book_ids in by_increment.items():
+        Book.objects.filter(pk__in=book_ids).update(
+            available_copies=F("available_copies") + increment
+        )
+    invalidate_catalog(book_counts)
+
+
+def _adjust_active_loans(deltas):
+    User = get_user_model()
+    for user_id, delta in deltas.items():
+        User.objects.filter(pk=user_id).update(
+            active_loans_count=Greatest(F("active_loans_count") + delta, 0)
+        )
+    invalidate_users(deltas)
+
+
+def reconcile_active_loan_counts(batch_size=10000):
+    """
+    Recompute every user's ``active_loans_count`` from the loans table.
+
+    Users are processed in primary-key batches so each ``UPDATE`` stays
+    short on large tables. Returns the number of users whose counter was
+    corrected.
+    """
+    User = get_user_model()
+    active = (
+        Loan.objects.active()
+        .filter(user=OuterRef("pk"))
+        .order_by()
+        .values("user")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    expected = Coalesce(Subquery(active), 0)
+
+    corrected = 0
+    last_pk = 0
+    while True:
+        pks = list(
+            User.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not pks:
+            return corrected
+        last_pk = pks[-1]
+        with transaction.atomic():
+            corrected += (
+                User.objects.filter(pk__in=pks)
+                .alias(expected=expected)
+                .exclude(active_loans_count=F("expected"))
+                .update(active_loans_count=expected)
+            )
+            invalidate_users(pks)
@@ -0,0 +1,297 @@
+"""
+Circulation statistics served from rollup tables.
+
+Borrows and returns update ``DailyCirculation`` and ``BookCirculation`` in
+the same transaction as the loans, so the statistics endpoints never
+aggregate over the ``Loan`` table. ``rebuild_circulation_stats`` recomputes
+both tables from the loan history in chunks.
+"""
+
+import random
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ArchivedLoan, Book, BookCirculation, DailyCirculation, Loan
+
+# Rows each day's counters are spread over; see DailyCirculation.
+DAILY_SHARDS = 8
+
+COUNTERS = ("loans", "returns", "late_returns", "loan_seconds")
+
+# Every loan is in exactly one of these.
+LOAN_TABLES = (Loan, ArchivedLoan)
+
+
+def _increment(model, rows):
+    """
+    Add ``rows`` (``{key: {counter: delta}}``, keyed on ``model.KEY_FIELDS``)
+    to ``model``'s counters, creating rows as needed.
+
+    PostgreSQL and SQLite take every row in one ``INSERT ... ON CONFLICT DO
+    UPDATE``. Keys are sorted so concurrent transactions lock shared rows in
+    the same order and cannot deadlock.
+    """
+    connection = connections[router.db_for_write(model)]
+    keys = sorted(rows)
+    key_fields = [model._meta.get_field(name) for name in model.KEY_FIELDS]
+    if connection.vendor not in ("postgresql", "sqlite"):
+        attnames = [field.attname for field in key_fields]
+        for key in keys:
+            _increment_row(model, dict(zip(attnames, key)), rows[key])
+        return
+
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    columns = [field.column for field in key_fields] + list(COUNTERS)
+    placeholders = "({})".format(", ".join(["%s"] * len(columns)))
+    params = []
+    for key in keys:
+        params.extend(
+            field.get_db_prep_value(value, connection)
+            for field, value in zip(key_fields, key)
+        )
+        params.extend(rows[key].get(counter, 0) for counter in COUNTERS)
+    updates = ", ".join(
+        f"{qn(counter)} = {table}.{qn(counter)} + EXCLUDED.{qn(counter)}"
+        for counter in COUNTERS
+    )
+    sql = (
+        f"INSERT INTO {table} ({', '.join(qn(column) for column in columns)}) "
+        f"VALUES {', '.join([placeholders] * len(keys))} "
+        f"ON CONFLICT ({', '.join(qn(field.column) for field in key_fields)}) "
+        f"DO UPDATE SET {updates}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def _increment_row(model, key, deltas):
+    updates = {field: F(field) + value for field, value in deltas.items()}
+    if model.objects.filter(**key).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **deltas)
+    except IntegrityError:
+        # Another transaction created the row first.
+        model.objects.filter(**key).update(**updates)
+
+
+def _apply(by_book, by_day):
+    _increment(
+        BookCirculation, {(book_id,): deltas for book_id, deltas in by_book.items()}
+    )
+    shard = random.randrange(DAILY_SHARDS)
+    _increment(
+        DailyCirculation, {(day, shard): deltas for day, deltas in by_day.items()}
+    )
+
+
+def record_borrows(loans):
+    """Count new ``loans`` in the rollups. Call inside the borrow transaction."""
+    by_book = Counter(loan.book_id for loan in loans)
+    by_day = Counter(timezone.localdate(loan.borrowed_date) for loan in loans)
+    _apply(
+        {book_id: {"loans": count} for book_id, count in by_book.items()},
+        {day: {"loans": count} for day, count in by_day.items()},
+    )
+
+
+def record_returns(loans, returned_date):
+    """
+    Count the return of ``loans`` at ``returned_date`` in the rollups.
+
+    ``loans`` are ``(book_id, borrowed_date, due_date)`` tuples. Call inside
+    the return transaction.
+    """
+    by_book = defaultdict(Counter)
+    for book_id, borrowed_date, due_date in loans:
+        by_book[book_id].update(
+            returns=1,
+            late_returns=int(returned_date > due_date),
+            loan_seconds=int((returned_date - borrowed_date).total_seconds()),
+        )
+    day = Counter()
+    for counts in by_book.values():
+        day.update(counts)
+    _apply(by_book, {timezone.localdate(returned_date): day})
+
+
+def _loan_seconds():
+    duration = ExpressionWrapper(
+        F("returned_date") - F("borrowed_date"), output_field=DurationField()
+    )
+    return Sum(duration, filter=Q(returned_date__isnull=False))
+
+
+def _seconds(duration):
+    return int(duration.total_seconds()) if duration else 0
+
+
+def rebuild_circulation_stats(batch_size=50000):
+    """
+    Recompute the rollups from the loans table and the loan archive.
+
+    Per-book rows are rebuilt for one primary-key range of books at a time
+    and the daily rows from per-chunk aggregates of the loans, so every query
+    stays short on large tables. Loans borrowed or returned while a rebuild
+    runs may be missed; run it again once the library is quiet. Returns the
+    number of book and day rows written.
+    """
+    books = 0
+    last_pk = 0
+    while True:
+        pks = list(
+            Book.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not pks:
+            break
+        counts = defaultdict(Counter)
+        for model in LOAN_TABLES:
+            rows = (
+                model.objects.filter(book__gt=last_pk, book__lte=pks[-1])
+                .order_by()
+                .values("book")
+                .annotate(
+                    loans=Count("pk"),
+                    returns=Count("returned_date"),
+                    late_returns=Count("pk", filter=Q(returned_date__gt=F("due_date"))),
+                    loan_seconds=_loan_seconds(),
+                )
+            )
+            for row in rows:
+                counts[row["book"]].update(
+                    loans=row["loans"],
+                    returns=row["returns"],
+                    late_returns=row["late_returns"],
+                    loan_seconds=_seconds(row["loan_seconds"]),
+                )
+        with transaction.atomic():
+            BookCirculation.objects.filter(book__gt=last_pk, book__lte=pks[-1]).delete()
+            BookCirculation.objects.bulk_create(
+                BookCirculation(
+                    book_id=book_id, **{field: row[field] for field in COUNTERS}
+                )
+                for book_id, row in counts.items()
+            )
+        books += len(counts)
+        last_pk = pks[-1]
+
+    days = defaultdict(Counter)
+    for model in LOAN_TABLES:
+        last_pk = 0
+        while True:
+            chunk = model.objects.filter(pk__gt=last_pk).order_by("pk")
+            bounds = list(chunk.values_list("pk", flat=True)[:batch_size])
+            if not bounds:
+                break
+            chunk = model.objects.filter(pk__gt=last_pk, pk__lte=bounds[-1]).order_by()
+            borrowed = chunk.values(day=TruncDate("borrowed_date")).annotate(
+                loans=Count("pk")
+            )
+            for row in borrowed:
+                days[row["day"]]["loans"] += row["loans"]
+            returned = (
+                chunk.filter(returned_date__isnull=False)
+                .values(day=TruncDate("returned_date"))
+                .annotate(
+                    returns=Count("pk"),
+                    late_returns=Count("pk", filter=Q(returned_date__gt=F("due_date"))),
+                    loan_seconds=_loan_seconds(),
+                )
+            )
+            for row in returned:
+                days[row["day"]].update(
+                    returns=row["returns"],
+                    late_returns=row["late_returns"],
+                    loan_seconds=_seconds(row["loan_seconds"]),
+                )
+            last_pk = bounds[-1]
+
+    with transaction.atomic():
+        DailyCirculation.objects.all().delete()
+        DailyCirculation.objects.bulk_create(
+            DailyCirculation(date=day, **{field: counts[field] for field in COUNTERS})
+            for day, counts in days.items()
+        )
+    return books, len(days)
+
+
+def _average_days(loan_seconds, returns):
+    if not returns:
+        return None
+    return round(loan_seconds / returns / 86400, 2)
+
+
+def _rate(part, whole):
+    return round(part / whole, 4) if whole else None
+
+
+def daily_stats(start, end):
+    """Per-day counters from ``start`` to ``end`` inclusive, oldest first."""
+    rows = {
+        row["date"]: row
+        for row in DailyCirculation.objects.filter(date__range=(start, end))
+        .values("date")
+        .annotate(**{field: Sum(field) for field in COUNTERS})
+        .order_by()
+    }
+    empty = dict.fromkeys(COUNTERS, 0)
+    results = []
+    for offset in range((end - start).days + 1):
+        day = start + timedelta(days=offset)
+        row = rows.get(day, empty)
+        results.append(
+            {
+                "date": day,
+                "loans": row["loans"],
+                "returns": row["returns"],
+                "late_returns": row["late_returns"],
+                "average_loan_days": _average_days(row["loan_seconds"], row["returns"]),
+            }
+        )
+    return results
+
+
+def summary_stats(days):
+    """Totals over the last ``days`` days and the loans out right now."""
+    today = timezone.localdate()
+    totals = DailyCirculation.objects.filter(
+        date__gt=today - timedelta(days=days)
+    ).aggregate(**{field: Sum(field, default=0) for field in COUNTERS})
+    # Both counts are answered from the partial indexes on active loans.
+    active = Loan.objects.active().count()
+    overdue = Loan.objects.overdue().count()
+    return {
+        "days": days,
+        "loans": totals["loans"],
+        "returns": totals["returns"],
+        "average_loan_days": _average_days(totals["loan_seconds"], totals["returns"]),
+        "late_return_rate": _rate(totals["late_returns"], totals["returns"]),
+        "active_loans": active,
+        "overdue_loans": overdue,
+        "overdue_rate": _rate(overdue, active),
+    }
+
+
+def most_borrowed(limit):
+    """The ``limit`` books with the most loans, most borrowed first."""
+    return [
+        {
+            "book": row.book_id,
+            "title": row.book.title,
+            "author": row.book.author,
+            "loans": row.loans,
+            "average_loan_days": _average_days(row.loan_seconds, row.returns),
+        }
+        for row in BookCirculation.objects.select_related("book")
+        .only("loans", "returns", "loan_seconds", "book__title", "book__author")
+        .order_by("-loans", "book")[:limit]
+    ]
@@ -0,0 +1,202 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from book.models import Book, Loan
+from LibraryManager.paginators import EstimatedCountPaginator
+from user.models import User
+
+
+@pytest.fixture
+def admin_client():
+    admin = User.objects.create_superuser(
+        username="admin", email="admin@example.com", password="pass123"
+    )
+    client = Client()
+    client.force_login(admin)
+    return client
+
+
+def seed(count):
+    Loan.objects.all().delete()
+    Book.objects.all().delete()
+    User.objects.exclude(username="admin").delete()
+    users = User.objects.bulk_create(
+        User(username=f"reader{i}", email=f"reader{i}@example.com")
+        for i in range(count)
+    )
+    books = Book.objects.bulk_create(
+        Book(title=f"Title {i}", author="Author", isbn=f"{i:013d}", page_count=100)
+        for i in range(count)
+    )
+    due = timezone.now() + timedelta(days=7)
+    return Loan.objects.bulk_create(
+        Loan(user=user, book=book, due_date=due) for user, book in zip(users, books)
+    )
+
+
+def changelist(client, path, **params):
+    response = client.get(path, params)
+    assert response.status_code == 200
+    return response
+
+
+def result_ids(response):
+    return sorted(obj.pk for obj in response.context["cl"].result_list)
+
+
+@pytest.mark.django_db
+class TestLoanAdmin:
+    def test_changelist_queries_do_not_grow_with_rows(self, admin_client):
+        counts = []
+        for rows in (2, 30):
+            seed(rows)
+            with CaptureQueriesContext(connection) as ctx:
+                changelist(admin_client, "/admin/book/loan/")
+            counts.append(len(ctx.captured_queries))
+        assert counts[0] == counts[1]
+
+    def test_search_by_id_username_and_title_prefix(self, admin_client):
+        loans = seed(12)
+        path = "/admin/book/loan/"
+
+        response = changelist(admin_client, path, q="reader1")
+        assert result_ids(response) == sorted([loans[1].pk, loans[10].pk, loans[11].pk])
+
+        response = changelist(admin_client, path, q="title 1")
+        assert result_ids(response) == sorted([loans[1].pk, loans[10].pk, loans[11].pk])
+
+        response = changelist(admin_client, path, q=str(loans[5].pk))
+        assert loans[5].pk in result_ids(response)
+
+        # Prefixes only; substrings would need a scan.
+        assert result_ids(changelist(admin_client, path, q="eader")) == []
+
+    def test_change_form_uses_autocomplete_widgets(self, admin_client):
+        loan = seed(1)[0]
+        response = admin_client.get(f"/admin/book/loan/{loan.pk}/change/")
+        assert response.status_code == 200
+        assert b'data-field-name="user"' in response.content
+        assert b'data-field-name="book"' in response.content
+
+    def test_autocomplete_searches(self, admin_client):
+        seed(3)
+        params = {"app_label": "book", "model_name": "loan", "term": ""}
+        response = admin_client.get(
+            "/admin/autocomplete/", {**params, "field_name": "user", "term": "reader2"}
+        )
+        assert [row["text"] for row in response.json()["results"]] == ["reader2"]
+        response = admin_client.get(
+            "/admin/autocomplete/", {**params, "field_name": "book", "term": "title"}
+        )
+        assert len(response.json()["results"]) == 3
+
+    def test_edits_move_the_loan_counters(self, admin_client):
+        reader = User.objects.create_user(
+            username="reader", email="reader@example.com", password="x"
+        )
+        book = Book.objects.create(
+            title="Title", author="Author", isbn="1" * 13, page_count=100
+        )
+        due = timezone.localtime() + timedelta(days=7)
+        form = {
+            "user": reader.pk,
+            "book": book.pk,
+            "due_date_0": due.date().isoformat(),
+            "due_date_1": due.time().strftime("%H:%M:%S"),
+        }
+
+        def counters():
+            reader.refresh_from_db()
+            book.refresh_from_db()
+            return reader.active_loans_count, book.available_copies
+
+        assert admin_client.post("/admin/book/loan/add/", form).status_code == 302
+        loan = Loan.objects.get()
+        assert counters() == (1, 0)
+
+        returned = {**form, "returned_date_0": form["due_date_0"]}
+        returned["returned_date_1"] = form["due_date_1"]
+        response = admin_client.post(f"/admin/book/loan/{loan.pk}/change/", returned)
+        assert response.status_code == 302
+        assert counters() == (0, 1)
+
+        admin_client.post(f"/admin/book/loan/{loan.pk}/change/", form)
+        assert counters() == (1, 0)
+        response = admin_client.post(
+            "/admin/book/loan/",
+            {"action": "delete_selected", "_selected_action": [loan.pk], "post": "yes"},
+        )
+        assert response.status_code == 302
+        assert not Loan.objects.exists()
+        assert counters() == (0, 1)
+
+    def test_archive_changelist(self, admin_client):
+        seed(2)
+        changelist(admin_client, "/admin/book/archivedloan/", q="reader")
+
+
+@pytest.mark.django_db
+class TestBookAndUserAdmin:
+    def test_book_search_uses_the_full_text_index(self, admin_client):
+        seed(3)
+        Book.objects.create(
+            title="Dragons of Autumn", author="Weis", isbn="9", page_count=100
+        )
+        response = changelist(admin_client, "/admin/book/book/", q="dragon")
+        assert [book.title for book in response.context["cl"].result_list] == [
+            "Dragons of Autumn"
+        ]
+
+    def test_user_search_by_prefix_or_email(self, admin_client):
+        seed(3)
+        response = changelist(admin_client, "/admin/user/user/", q="reader")
+        assert len(response.context["cl"].result_list) == 3
+        response = changelist(
+            admin_client, "/admin/user/user/", q="reader1@example.com"
+        )
+        assert [user.username for user in response.context["cl"].result_list] == [
+            "reader1"
+        ]
+
+
+@pytest.mark.django_db
+class TestEstimatedCountPaginator:
+    def test_counts_small_results_exactly(self):
+        seed(5)
+        assert EstimatedCountPaginator(Loan.objects.all(), 2).count == 5
+
+    def test_estimates_large_results_on_postgresql(self, monkeypatch):
+        seed(5)
+        monkeypatch.setattr(EstimatedCountPaginator, "exact_below", 0)
+        with CaptureQueriesContext(connection) as ctx:
+            count = EstimatedCountPaginator(Loan.objects.all(), 2).count
+        if connection.vendor == "postgresql":
+            assert ctx.captured_queries[0]["sql"].startswith("EXPLAIN")
+            assert count > 0
+        else:
+            assert count == 5
+
+    def test_add_user_asks_for_an_email(self, admin_client):
+        form = {
+            "usable_password": "true",
+            "password1": "Str0ng-pass-123",
+            "password2": "Str0ng-pass-123",
+        }
+        for name in ("first", "second"):
+            response = admin_client.post(
+                "/admin/user/user/add/",
+                {**form, "username": name, "email": f"{name}@example.com"},
+            )
+            assert response.status_code == 302
+        assert User.objects.get(username="second").email == "second@example.com"
+
+        response = admin_client.post(
+            "/admin/user/user/add/", {**form, "username": "third"}
+        )
+        assert response.status_code == 200
+        assert "email" in response.context["adminform"].form.errors
@@ -0,0 +1,147 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from book.archive import archive_loans
+from book.models import ArchivedLoan, Book, BookCirculation, Loan
+from book.stats import rebuild_circulation_stats
+from user.models import User
+
+
+@pytest.fixture
+def other_reader():
+    return User.objects.create_user(
+        username="other", email="other@example.com", password="pass123"
+    )
+
+
+@pytest.fixture
+def book():
+    return Book.objects.create(
+        title="Book", author="Author", isbn="1234567890123", page_count=100
+    )
+
+
+def make_loan(user, book, returned_days_ago=None):
+    now = timezone.now()
+    loan = Loan.objects.create(user=user, book=book, due_date=now + timedelta(days=7))
+    if returned_days_ago is not None:
+        returned = now - timedelta(days=returned_days_ago)
+        Loan.objects.filter(pk=loan.pk).update(
+            borrowed_date=returned - timedelta(days=10),
+            due_date=returned - timedelta(days=3),
+            returned_date=returned,
+        )
+        loan.refresh_from_db()
+    return loan
+
+
+@pytest.fixture
+def loans(user, other_reader, book):
+    return {
+        "active": make_loan(user, book),
+        "recent": make_loan(user, book, returned_days_ago=5),
+        "old": make_loan(user, book, returned_days_ago=400),
+        "older": make_loan(user, book, returned_days_ago=500),
+        "other": make_loan(other_reader, book, returned_days_ago=400),
+    }
+
+
+def ids(response):
+    assert response.status_code == 200
+    return sorted(row["id"] for row in response.data["results"])
+
+
+@pytest.mark.django_db
+class TestArchiveLoans:
+    def test_moves_loans_returned_before_the_cutoff(self, loans):
+        assert archive_loans(days=180, batch_size=2) == 3
+
+        assert set(Loan.objects.values_list("pk", flat=True)) == {
+            loans["active"].pk,
+            loans["recent"].pk,
+        }
+        archived = ArchivedLoan.objects.get(pk=loans["old"].pk)
+        for field in ("user_id", "book_id", "borrowed_date", "due_date"):
+            assert getattr(archived, field) == getattr(loans["old"], field)
+        assert archived.returned_date == loans["old"].returned_date
+
+    def test_is_idempotent(self, loans):
+        archive_loans(days=180)
+        assert archive_loans(days=180) == 0
+        assert ArchivedLoan.objects.count() == 3
+
+    def test_command_uses_the_setting(self, loans, settings, capsys):
+        settings.LOAN_ARCHIVE_DAYS = 1
+        call_command("archive_loans")
+        assert "Archived 4 loan(s)" in capsys.readouterr().out
+        assert list(Loan.objects.values_list("pk", flat=True)) == [loans["active"].pk]
+
+    def test_rebuilt_rollups_include_the_archive(self, loans):
+        rebuild_circulation_stats()
+        before = list(BookCirculation.objects.values_list())
+        archive_loans(days=180)
+        rebuild_circulation_stats()
+        assert list(BookCirculation.objects.values_list()) == before
+
+
+@pytest.mark.django_db
+class TestLoanHistoryAPI:
+    @pytest.fixture
+    def client(self, user, loans):
+        archive_loans(days=180)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client
+
+    def test_lists_the_hot_table_by_default(self, client, loans):
+        response = client.get("/api/books/loans/")
+        assert ids(response) == sorted([loans["active"].pk, loans["recent"].pk])
+
+    def test_history_lists_own_archived_loans(self, client, loans):
+        response = client.get("/api/books/loans/", {"history": "true"})
+        assert ids(response) == sorted([loans["old"].pk, loans["older"].pk])
+        row = response.data["results"][0]
+        assert row["is_active"] is False
+        assert row["is_overdue"] is False
+        assert row["book_title"] == "Book"
+
+    def test_history_filters(self, client, loans, book):
+        response = client.get(
+            "/api/books/loans/", {"history": "true", "is_active": "false"}
+        )
+        assert ids(response) == sorted([loans["old"].pk, loans["older"].pk])
+        response = client.get("/api/books/loans/", {"history": "1", "book": book.pk})
+        assert len(response.data["results"]) == 2
+
+    def test_staff_see_every_archived_loan(self, loans):
+        staff = User.objects.create_user(
+            username="staff", email="staff@example.com", password="x", is_staff=True
+        )
+        archive_loans(days=180)
+        client = APIClient()
+        client.force_authenticate(user=staff)
+        response = client.get("/api/books/loans/", {"history": "true"})
+        assert len(response.data["results"]) == 3
+
+    def test_retrieve_archived_loan(self, client, loans):
+        path = f"/api/books/loans/{loans['old'].pk}/"
+        assert client.get(path).status_code == 404
+        response = client.get(path, {"history": "true"})
+        assert response.status_code == 200
+        assert response.data["id"] == loans["old"].pk
+        assert response.data["is_active"] is False
+
+    def test_history_export(self, client, loans):
+        response = client.get("/api/books/loans/export/", {"history": "true"})
+        body = b"".join(response.streaming_content).decode()
+        assert len(body.splitlines()) == 2
+
+    def test_writes_ignore_history_mode(self, client, loans):
+        response = client.post(
+            f"/api/books/loans/{loans['active'].pk}/return_book/?history=true"
+        )
+        assert response.status_code == 200
@@ -0,0 +1,173 @@
+import asyncio
+
+import pytest
+from rest_framework_simplejwt.tokens import AccessToken
+
+from book.cache import get_catalog_cache
+from book.models import Book, Loan
+from user.models import User
+
+
+@pytest.fixture
+def token_client(api_client, user):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+    return api_client
+
+
+@pytest.fixture
+def books(make_books):
+    return make_books(
+        15,
+        author=lambda i: "Ann Author" if i % 2 else "Bob Writer",
+        available_copies=2,
+        total_copies=2,
+    )
+
+
+@pytest.mark.django_db
+class TestAsyncCatalog:
+    @pytest.mark.parametrize(
+        "params", [{}, {"page": 2}, {"author": "Ann"}, {"ordering": "title"}]
+    )
+    def test_list_matches_sync_view(self, api_client, books, params):
+        sync = api_client.get("/api/books/", params)
+        response = api_client.get("/api/async/books/", params)
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["results"] == sync.json()["results"]
+        assert body["count"] == sync.data["count"]
+
+    def test_list_links(self, api_client, books):
+        body = api_client.get("/api/async/books/", {"page": 2}).json()
+
+        assert body["next"] is None
+        assert body["previous"] == "http://testserver/api/async/books/"
+
+    def test_invalid_page(self, api_client, books):
+        response = api_client.get("/api/async/books/", {"page": 9})
+
+        assert response.status_code == 404
+        assert response.json() == {"detail": "Invalid page."}
+
+    def test_detail_is_cached_and_invalidated(self, api_client, books):
+        url = f"/api/async/books/{books[0].pk}/"
+        assert api_client.get(url)["X-Cache"] == "MISS"
+        assert api_client.get(url)["X-Cache"] == "HIT"
+
+        Book.objects.get(pk=books[0].pk).save()
+
+        response = api_client.get(url)
+        assert response["X-Cache"] == "MISS"
+        assert response.json() == api_client.get(f"/api/books/{books[0].pk}/").json()
+
+    def test_cursor_pages_match_sync_view(self, api_client, books):
+        params = {"pagination": "cursor", "ordering": "title"}
+        sync = api_client.get("/api/books/", params).json()
+        body = api_client.get("/api/async/books/", params).json()
+        assert body["results"] == sync["results"]
+        assert "count" not in body
+
+        sync_next = sync["next"].replace("http://testserver", "")
+        body = api_client.get(body["next"].replace("/api/books/", "/api/async/books/"))
+        assert body.json()["results"] == api_client.get(sync_next).json()["results"]
+
+    def test_cache_stays_off_the_event_loop(self, api_client, books, monkeypatch):
+        cache = get_catalog_cache()
+
+        def guard(method):
+            def call(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                except RuntimeError:
+                    return method(*args, **kwargs)
+                raise AssertionError("blocking cache call inside the event loop")
+
+            return call
+
+        for name in ("get", "set", "add"):
+            monkeypatch.setattr(cache, name, guard(getattr(cache, name)))
+
+        assert api_client.get("/api/async/books/")["X-Cache"] == "MISS"
+        assert api_client.get("/api/async/books/")["X-Cache"] == "HIT"
+
+    def test_detail_not_found(self, api_client):
+        response = api_client.get("/api/async/books/999/")
+
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+class TestAsyncLoans:
+    def test_borrow_and_return(self, token_client, user, books):
+        response = token_client.post(
+            "/api/async/books/loans/borrow/", {"book_id": books[0].pk}, format="json"
+        )
+        assert response.status_code == 201
+        loan_id = response.json()["id"]
+        assert response.json()["book_title"] == books[0].title
+
+        response = token_client.post(f"/api/async/books/loans/{loan_id}/return_book/")
+        assert response.status_code == 200
+        assert response.json()["is_active"] is False
+
+        response = token_client.post(f"/api/async/books/loans/{loan_id}/return_book/")
+        assert response.status_code == 400
+        user.refresh_from_db()
+        assert user.active_loans_count == 0
+
+    def test_borrow_errors(self, token_client, books):
+        response = token_client.post(
+            "/api/async/books/loans/borrow/", {"book_id": 999}, format="json"
+        )
+
+        assert response.status_code == 400
+        assert response.json() == {"book_id": ["Book not found"]}
+
+    def test_cannot_return_other_users_loan(self, token_client, books):
+        other = User.objects.create_user(
+            username="other", email="other@example.com", password="testpass123"
+        )
+        loan = Loan.objects.create(
+            user=other, book=books[0], due_date="2030-01-01T00:00Z"
+        )
+
+        response = token_client.post(f"/api/async/books/loans/{loan.pk}/return_book/")
+
+        assert response.status_code == 404
+
+    def test_requires_a_token(self, api_client, books):
+        response = api_client.post(
+            "/api/async/books/loans/borrow/", {"book_id": books[0].pk}
+        )
+
+        assert response.status_code == 401
+        assert response["WWW-Authenticate"].startswith("Bearer")
+
+    def test_rejects_wrong_method(self, token_client):
+        response = token_client.get("/api/async/books/loans/borrow/")
+
+        assert response.status_code == 405
+
+
+@pytest.mark.django_db
+class TestAsyncProfile:
+    def test_profile(self, token_client, user):
+        response = token_client.get("/api/async/users/profile/")
+
+        assert response.status_code == 200
+        assert response.json()["data"]["username"] == user.username
+
+    def test_invalid_token(self, api_client):
+        api_client.credentials(HTTP_AUTHORIZATION="Bearer nope")
+
+        response = api_client.get("/api/async/users/profile/")
+
+        assert response.status_code == 401
+
+    def test_inactive_user_is_rejected(self, token_client, user):
+        User.objects.filter(pk=user.pk).update(is_active=False)
+
+        response = token_client.get("/api/async/users/profile/")
+
+        assert response.status_code == 401
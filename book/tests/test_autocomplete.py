@@ -0,0 +1,114 @@
+import pytest
+from django.db import connection
+
+from book.autocomplete import complete, prefix_key, prefix_range
+from book.models import Book
+from book.services import borrow_book
+
+
+@pytest.fixture
+def books():
+    rows = [
+        ("The Hobbit", "J. R. R. Tolkien"),
+        ("The Silmarillion", "J. R. R. Tolkien"),
+        ("the two towers", "J. R. R. Tolkien"),
+        ("Thud!", "Terry Pratchett"),
+        ("Mort", "Terry Pratchett"),
+        ("Another Hobbit Story", "Anonymous"),
+        ("100%_Pure", "Jane Doe"),
+    ]
+    return Book.objects.bulk_create(
+        Book(title=title, author=author, isbn=f"{i:013d}", page_count=100)
+        for i, (title, author) in enumerate(rows)
+    )
+
+
+def autocomplete(api_client, q, **params):
+    response = api_client.get("/api/books/autocomplete/", {"q": q, **params})
+    assert response.status_code == 200
+    return response.data
+
+
+@pytest.mark.django_db
+class TestAutocomplete:
+    def test_completes_titles_and_authors_by_prefix(self, api_client, books):
+        assert autocomplete(api_client, "THE ") == {
+            "titles": ["The Hobbit", "The Silmarillion", "the two towers"],
+            "authors": [],
+        }
+        assert autocomplete(api_client, "t") == {
+            "titles": ["The Hobbit", "The Silmarillion", "the two towers", "Thud!"],
+            "authors": ["Terry Pratchett"],
+        }
+
+    def test_matches_prefixes_only(self, api_client, books):
+        assert autocomplete(api_client, "hobbit") == {"titles": [], "authors": []}
+
+    def test_authors_are_distinct(self, api_client, books):
+        assert autocomplete(api_client, "j. r")["authors"] == ["J. R. R. Tolkien"]
+
+    def test_limit(self, api_client, books):
+        assert autocomplete(api_client, "t", limit=2)["titles"] == [
+            "The Hobbit",
+            "The Silmarillion",
+        ]
+
+    def test_like_wildcards_are_literal(self, api_client, books):
+        assert autocomplete(api_client, "100%_")["titles"] == ["100%_Pure"]
+        assert autocomplete(api_client, "10_")["titles"] == []
+
+    def test_requires_a_prefix(self, api_client):
+        response = api_client.get("/api/books/autocomplete/", {"q": ""})
+        assert response.status_code == 400
+
+    def test_new_books_show_up(self, api_client, books):
+        assert autocomplete(api_client, "dis")["titles"] == []
+        Book.objects.create(
+            title="Discworld", author="Terry Pratchett", isbn="9", page_count=100
+        )
+        assert autocomplete(api_client, "dis")["titles"] == ["Discworld"]
+
+    def test_circulation_keeps_completions_cached(self, api_client, user, books):
+        autocomplete(api_client, "th")
+        borrow_book(user, books[0].pk)
+        response = api_client.get("/api/books/autocomplete/", {"q": "th"})
+        assert response["X-Cache"] == "HIT"
+
+        Book.objects.get(pk=books[0].pk).save()
+        response = api_client.get("/api/books/autocomplete/", {"q": "th"})
+        assert response["X-Cache"] == "MISS"
+
+    def test_prefix_ending_in_the_last_code_point(self, api_client, books):
+        Book.objects.create(
+            title="Edge\U0010ffff Case", author="Author", isbn="8", page_count=100
+        )
+        titles = autocomplete(api_client, "edge\U0010ffff")["titles"]
+        assert titles == ["Edge\U0010ffff Case"]
+
+    @pytest.mark.parametrize("field", ["title", "author"])
+    def test_scans_the_prefix_index(self, books, field):
+        lower, upper = prefix_range("th")
+        queryset = (
+            Book.objects.alias(key=prefix_key(field, "default"))
+            .filter(key__gte=lower, key__lt=upper)
+            .order_by("key", field)
+            .values_list(field, flat=True)
+            .distinct()[:10]
+        )
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                # The test table is tiny, so a sequential scan would be cheaper.
+                cursor.execute("SET LOCAL enable_seqscan = off")
+                cursor.execute("EXPLAIN " + sql, params)
+            else:
+                cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+        assert f"book_book_{field}_prefix_idx" in plan
+        assert complete(field, "TH", 10) == list(queryset)
+
+
+def test_prefix_range():
+    assert prefix_range("ab") == ("ab", "ac")
+    assert prefix_range("a!") == ("a!", 'a"')
+    assert prefix_range("a\U0010ffff") == ("a\U0010ffff", None)
@@ -0,0 +1,72 @@
+import pytest
+from book.cache import catalog_cache_stats
+from book.models import Book
+from book.services import borrow_book, return_loan
+from user.models import User
+
+
+@pytest.fixture
+def book():
+    return Book.objects.create(
+        title="Cached Book",
+        author="Author",
+        isbn="1234567890123",
+        page_count=100,
+        available_copies=2,
+        total_copies=2,
+    )
+
+
+@pytest.mark.django_db
+class TestCatalogCache:
+    def test_second_read_is_served_from_cache(
+        self, api_client, book, django_assert_num_queries
+    ):
+        before = catalog_cache_stats.snapshot()
+        first = api_client.get("/api/books/", {"author": "Author", "page": 1})
+        assert first["X-Cache"] == "MISS"
+
+        with django_assert_num_queries(0):
+            second = api_client.get("/api/books/", {"page": 1, "author": "Author"})
+        assert second["X-Cache"] == "HIT"
+        assert second.data == first.data
+
+        after = catalog_cache_stats.snapshot()
+        assert after["hits"] - before["hits"] == 1
+        assert after["misses"] - before["misses"] == 1
+
+    def test_query_params_are_part_of_the_key(self, api_client, book):
+        api_client.get("/api/books/")
+        response = api_client.get("/api/books/", {"author": "Nobody"})
+        assert response["X-Cache"] == "MISS"
+        assert response.data["results"] == []
+
+    def test_borrow_and_return_invalidate_listing_and_detail(self, api_client, book):
+        user = User.objects.create_user(username="reader", password="pass123")
+        api_client.get("/api/books/")
+        api_client.get(f"/api/books/{book.id}/")
+
+        loan = borrow_book(user, book.id)
+        listing = api_client.get("/api/books/")
+        detail = api_client.get(f"/api/books/{book.id}/")
+        assert listing["X-Cache"] == detail["X-Cache"] == "MISS"
+        assert listing.data["results"][0]["available_copies"] == 1
+        assert detail.data["available_copies"] == 1
+
+        return_loan(loan)
+        assert api_client.get(f"/api/books/{book.id}/").data["available_copies"] == 2
+
+    def test_book_save_and_delete_invalidate(self, api_client, book):
+        api_client.get(f"/api/books/{book.id}/")
+        book.title = "Renamed"
+        book.save()
+        assert api_client.get(f"/api/books/{book.id}/").data["title"] == "Renamed"
+
+        book.delete()
+        assert api_client.get("/api/books/").data["count"] == 0
+
+    def test_disabled_by_zero_timeout(self, api_client, book, settings):
+        settings.CATALOG_CACHE_TIMEOUT = 0
+        api_client.get("/api/books/")
+        response = api_client.get("/api/books/")
+        assert "X-Cache" not in response
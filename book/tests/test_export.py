@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from book.models import Book, Loan
+from book.serializers import BookSerializer, LoanSerializer
+from user.models import User
+
+
+@pytest.fixture
+def books(make_books):
+    return make_books(
+        6,
+        author=lambda i: "Ann Author" if i % 2 else "Bob Writer",
+        available_copies=lambda i: i % 3,
+    )
+
+
+def read_ndjson(response):
+    body = b"".join(response.streaming_content).decode()
+    return [json.loads(line) for line in body.splitlines()]
+
+
+def read_csv(response):
+    body = b"".join(response.streaming_content).decode()
+    return list(csv.DictReader(io.StringIO(body)))
+
+
+@pytest.mark.django_db
+class TestBookExport:
+    def test_ndjson_matches_the_serializer(self, api_client, books):
+        response = api_client.get("/api/books/export/")
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/x-ndjson"
+        assert 'filename="books.ndjson"' in response["Content-Disposition"]
+        rows = {row["id"]: row for row in read_ndjson(response)}
+        for book in Book.objects.all():
+            assert rows[book.pk] == json.loads(json.dumps(BookSerializer(book).data))
+
+    def test_csv_has_a_header_and_one_line_per_book(self, api_client, books):
+        response = api_client.get("/api/books/export/", {"output": "csv"})
+
+        assert response["Content-Type"] == "text/csv"
+        rows = read_csv(response)
+        assert len(rows) == len(books)
+        assert list(rows[0]) == list(BookSerializer().fields)
+        assert {row["is_available"] for row in rows} == {"true", "false"}
+
+    def test_filters_apply(self, api_client, books):
+        response = api_client.get("/api/books/export/", {"author": "Ann"})
+
+        rows = read_ndjson(response)
+        assert len(rows) == 3
+        assert {row["author"] for row in rows} == {"Ann Author"}
+
+    def test_search_applies(self, api_client, books):
+        response = api_client.get("/api/books/export/", {"search": "Bob"})
+
+        assert {row["author"] for row in read_ndjson(response)} == {"Bob Writer"}
+
+    def test_rejects_unknown_output(self, api_client, books):
+        response = api_client.get("/api/books/export/", {"output": "xml"})
+
+        assert response.status_code == 400
+        assert "output" in response.data
+
+
+@pytest.mark.django_db
+class TestLoanExport:
+    def test_only_exports_the_users_loans(self, api_client, user, books):
+        other = User.objects.create_user(
+            username="other", email="other@example.com", password="testpass123"
+        )
+        now = timezone.now()
+        mine = Loan.objects.create(
+            user=user, book=books[0], due_date=now - timedelta(days=1)
+        )
+        Loan.objects.create(user=other, book=books[1], due_date=now)
+        api_client.force_authenticate(user=user)
+
+        response = api_client.get("/api/books/loans/export/")
+
+        rows = read_ndjson(response)
+        assert rows == [json.loads(json.dumps(LoanSerializer(mine).data))]
+        assert rows[0]["is_overdue"] is True
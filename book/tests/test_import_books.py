@@ -0,0 +1,83 @@
+import json
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from book.models import Book
+
+CSV_HEADER = "title,author,isbn,page_count,publication_date,available_copies,total_copies\n"
+
+
+def run_import(path, *args):
+    out, err = StringIO(), StringIO()
+    call_command("import_books", str(path), *args, stdout=out, stderr=err)
+    return out.getvalue(), err.getvalue()
+
+
+@pytest.mark.django_db
+class TestImportBooks:
+    def test_imports_csv_and_reports_invalid_rows(self, tmp_path):
+        path = tmp_path / "books.csv"
+        path.write_text(
+            CSV_HEADER
+            + "Dune,Herbert,0000000000001,412,1965-08-01,2,2\n"
+            + "No Pages,Nobody,0000000000002,0,,1,1\n"
+            + "Too Many,Somebody,0000000000003,10,,5,1\n"
+            + "Dune (2nd ed.),Herbert,0000000000001,420,,,\n"
+        )
+
+        out, err = run_import(path, "--workers", "1")
+
+        assert "Imported 1 book(s), skipped 2 invalid record(s)" in out
+        assert "Record 2" in err and "Record 3" in err
+        book = Book.objects.get()
+        assert book.title == "Dune (2nd ed.)"
+        assert book.page_count == 420
+        assert not (tmp_path / "books.csv.checkpoint").exists()
+
+    def test_upsert_keeps_copy_counts_of_existing_books(self, tmp_path):
+        Book.objects.create(
+            title="Old",
+            author="Author",
+            isbn="0000000000001",
+            page_count=10,
+            available_copies=0,
+            total_copies=3,
+        )
+        path = tmp_path / "books.jsonl"
+        path.write_text(
+            json.dumps(
+                {
+                    "title": "New",
+                    "author": "Author",
+                    "isbn": "0000000000001",
+                    "page_count": 20,
+                    "available_copies": 3,
+                    "total_copies": 3,
+                }
+            )
+            + "\n{not json\n"
+        )
+
+        out, err = run_import(path, "--workers", "2")
+
+        book = Book.objects.get()
+        assert (book.title, book.page_count, book.available_copies) == ("New", 20, 0)
+        assert "invalid JSON" in err
+
+    def test_resumes_from_checkpoint(self, tmp_path):
+        path = tmp_path / "books.csv"
+        path.write_text(
+            CSV_HEADER
+            + "".join(f"Book {i},Author,{i:013d},100,,1,1\n" for i in range(5))
+        )
+        checkpoint = tmp_path / "books.csv.checkpoint"
+        checkpoint.write_text(json.dumps({"source": str(path), "records": 3}))
+
+        out, _ = run_import(path, "--batch-size", "2", "--workers", "1")
+
+        assert "Resuming after record 3" in out
+        assert sorted(Book.objects.values_list("title", flat=True)) == [
+            "Book 3",
+            "Book 4",
+        ]
+        assert not checkpoint.exists()
@@ -0,0 +1,108 @@
+import pytest
+from django.utils import timezone
+from datetime import timedelta
+from book.models import Book, Loan
+from user.models import User
+
+
+@pytest.fixture
+def books(make_books):
+    created = make_books(
+        25, title=lambda i: f"Book {i:02d}", available_copies=lambda i: i % 3
+    )
+    # Give several books the same timestamp to exercise the id tiebreaker.
+    now = timezone.now()
+    Book.objects.filter(pk__in=[book.pk for book in created[5:15]]).update(
+        created_at=now
+    )
+    return created
+
+
+def walk(api_client, url, params=None):
+    pages = []
+    response = api_client.get(url, params)
+    while True:
+        assert response.status_code == 200
+        pages.append(response.data)
+        if not response.data["next"]:
+            return pages
+        response = api_client.get(response.data["next"])
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    def test_walks_every_row_once_in_default_order(self, api_client, books):
+        pages = walk(api_client, "/api/books/", {"pagination": "cursor"})
+        ids = [row["id"] for page in pages for row in page["results"]]
+
+        expected = list(
+            Book.objects.order_by("-created_at", "-pk").values_list("pk", flat=True)
+        )
+        assert ids == expected
+        assert [len(page["results"]) for page in pages] == [10, 10, 5]
+        assert "count" not in pages[0]
+        assert pages[0]["previous"] is None
+
+    def test_previous_link_returns_the_previous_page(self, api_client, books):
+        pages = walk(api_client, "/api/books/", {"pagination": "cursor"})
+
+        response = api_client.get(pages[2]["previous"])
+        assert response.data["results"] == pages[1]["results"]
+        response = api_client.get(response.data["previous"])
+        assert response.data["results"] == pages[0]["results"]
+        assert response.data["previous"] is None
+
+    def test_respects_filters_ordering_and_optional_count(self, api_client, books):
+        pages = walk(
+            api_client,
+            "/api/books/",
+            {
+                "pagination": "cursor",
+                "available_only": "true",
+                "ordering": "title",
+                "count": "true",
+            },
+        )
+        titles = [row["title"] for page in pages for row in page["results"]]
+
+        expected = list(
+            Book.objects.filter(available_copies__gt=0)
+            .order_by("title")
+            .values_list("title", flat=True)
+        )
+        assert titles == expected
+        assert pages[0]["count"] == len(expected)
+
+    def test_loans_use_borrowed_date(self, api_client, books):
+        user = User.objects.create_user(username="reader", password="pass123")
+        Loan.objects.bulk_create(
+            Loan(user=user, book=book, due_date=timezone.now() + timedelta(days=7))
+            for book in books[:12]
+        )
+        api_client.force_authenticate(user=user)
+
+        pages = walk(api_client, "/api/books/loans/", {"pagination": "cursor"})
+        ids = [row["id"] for page in pages for row in page["results"]]
+        assert ids == list(
+            Loan.objects.order_by("-borrowed_date", "-pk").values_list("pk", flat=True)
+        )
+
+    def test_invalid_cursor(self, api_client, books):
+        response = api_client.get("/api/books/", {"cursor": "not-a-cursor"})
+        assert response.status_code == 404
+
+    def test_rejects_the_search_ordering(self, api_client, books):
+        params = {"pagination": "cursor", "search": "book"}
+        for url in ("/api/books/", "/api/async/books/"):
+            response = api_client.get(url, params)
+            assert response.status_code == 400
+            assert "pagination" in response.json()
+
+        # An explicit ordering replaces the relevance rank.
+        response = api_client.get("/api/books/", {**params, "ordering": "title"})
+        assert response.status_code == 200
+
+    def test_page_number_mode_is_unchanged(self, api_client, books):
+        response = api_client.get("/api/books/", {"page": 2})
+        assert response.data["count"] == 25
+        assert len(response.data["results"]) == 10
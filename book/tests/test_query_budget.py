@@ -0,0 +1,139 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, resolve, reverse
+from django.utils import timezone
+from datetime import timedelta
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from book import async_urls as book_async_urls
+from book import urls as book_urls
+from book.models import Book, Loan
+from user import async_urls as user_async_urls
+from user import urls as user_urls
+from user.authentication import user_cache
+
+# Maximum queries per GET endpoint, independent of how many rows exist or
+# how large the page is. Every GET route in the book and user URLconfs must
+# have an entry here.
+QUERY_BUDGETS = {
+    "book-list": 2,
+    "book-detail": 1,
+    "book-export": 1,
+    # Title and author completions.
+    "book-autocomplete": 2,
+    "loan-list": 2,
+    "loan-detail": 1,
+    "loan-export": 1,
+    "profile": 0,
+    # Rollups, plus the active and overdue counts for the summary.
+    "circulation-stats-summary": 3,
+    "circulation-stats-daily": 1,
+    "circulation-stats-most-borrowed": 1,
+    # Async views authenticate from the token, which costs the user lookup.
+    "async-book-list": 2,
+    "async-book-detail": 1,
+    "async-profile": 1,
+}
+
+# Query parameters for routes that require some.
+QUERY_PARAMS = {
+    "book-autocomplete": {"q": "budget"},
+}
+
+
+def _get_routes(patterns):
+    routes = {}
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            routes.update(_get_routes(pattern.url_patterns))
+            continue
+        if not isinstance(pattern, URLPattern) or not pattern.name:
+            continue
+        if "format" in pattern.pattern.regex.groupindex:
+            continue
+        callback = pattern.callback
+        actions = getattr(callback, "actions", None)
+        if actions is not None:
+            allows_get = "get" in actions
+        elif hasattr(callback, "http_method_names"):
+            allows_get = "get" in callback.http_method_names
+        else:
+            view_class = getattr(callback, "view_class", None)
+            allows_get = view_class is not None and hasattr(view_class, "get")
+        if allows_get:
+            routes[pattern.name] = "pk" in pattern.pattern.regex.groupindex
+    return routes
+
+
+GET_ROUTES = {
+    **_get_routes(book_urls.urlpatterns),
+    **_get_routes(user_urls.urlpatterns),
+    **_get_routes(book_async_urls.urlpatterns),
+    **_get_routes(user_async_urls.urlpatterns),
+}
+
+
+def _seed(count, user):
+    books = Book.objects.bulk_create(
+        Book(
+            title=f"Budget Book {i}",
+            author=f"Author {i}",
+            isbn=f"{i:013d}",
+            page_count=100,
+            available_copies=1,
+            total_copies=1,
+        )
+        for i in range(count)
+    )
+    loans = Loan.objects.bulk_create(
+        Loan(user=user, book=book, due_date=timezone.now() + timedelta(days=14))
+        for book in books
+    )
+    return {"book": books[0].pk, "loan": loans[0].pk}
+
+
+def _count_queries(client, name, kwargs):
+    path = reverse(name, kwargs=kwargs)
+    if resolve(path).url_name != name:
+        pytest.skip(f"{name} is shadowed by {resolve(path).url_name}")
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(path, QUERY_PARAMS.get(name))
+        if response.streaming:
+            b"".join(response.streaming_content)
+    assert response.status_code == 200, (path, response.status_code)
+    return len(ctx.captured_queries)
+
+
+def test_every_get_route_has_a_budget():
+    reachable = {
+        name
+        for name, has_pk in GET_ROUTES.items()
+        if has_pk or resolve(reverse(name)).url_name == name
+    }
+    assert reachable <= set(QUERY_BUDGETS), reachable - set(QUERY_BUDGETS)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name", sorted(GET_ROUTES))
+def test_query_budget(name, staff):
+    client = APIClient()
+    client.force_authenticate(user=staff)
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(staff)}")
+
+    counts = []
+    for rows in (2, 25):
+        Loan.objects.all().delete()
+        Book.objects.all().delete()
+        ids = _seed(rows, staff)
+        # Both rounds start with a cold authentication cache.
+        user_cache.clear()
+        kwargs = {}
+        if GET_ROUTES[name]:
+            kwargs["pk"] = ids[name.split("-")[-2]]
+        counts.append(_count_queries(client, name, kwargs))
+
+    assert counts[0] == counts[1], f"{name} query count grows with rows: {counts}"
+    assert (
+        counts[1] <= QUERY_BUDGETS[name]
+    ), f"{name} ran {counts[1]} queries, budget is {QUERY_BUDGETS[name]}"
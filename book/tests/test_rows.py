@@ -0,0 +1,112 @@
+import datetime
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from book.models import Loan
+from book.renderers import FastJSONRenderer
+
+pytestmark = pytest.mark.usefixtures("no_catalog_cache")
+
+
+@pytest.fixture
+def books(make_books):
+    return make_books(
+        25,
+        title=lambda i: f'Book {i} "quoted" é\u2028',
+        author=lambda i: "Ann Author" if i % 2 else "Bob Writer",
+        page_count=lambda i: 100 + i,
+        publication_date=lambda i: datetime.date(1990, 1, 1 + i) if i % 3 else None,
+        description="line\nbreak\ttab \\ slash",
+        available_copies=lambda i: i % 3,
+        total_copies=2,
+    )
+
+
+@pytest.fixture
+def loans(staff, books):
+    now = timezone.now()
+    return Loan.objects.bulk_create(
+        Loan(
+            user=staff,
+            book=book,
+            due_date=now + timedelta(days=7 if i % 2 else -7),
+            returned_date=now - timedelta(days=1) if i % 3 == 0 else None,
+        )
+        for i, book in enumerate(books)
+    )
+
+
+def fetch_both(client, settings, path, params):
+    bodies = []
+    for fast in (True, False):
+        settings.FAST_LIST_RESPONSES = fast
+        response = client.get(path, params)
+        assert response.status_code == 200
+        bodies.append(response.content)
+    return bodies
+
+
+LIST_PARAMS = [
+    {},
+    {"page": 2},
+    {"ordering": "title"},
+    {"author": "Ann", "available_only": "true"},
+    {"search": "book"},
+    {"pagination": "cursor", "ordering": "-available_copies"},
+    {"pagination": "cursor", "count": "true"},
+]
+
+
+@pytest.mark.django_db
+class TestRowPlanResponses:
+    @pytest.mark.parametrize("params", LIST_PARAMS)
+    def test_book_list_is_byte_identical(self, api_client, settings, books, params):
+        fast, slow = fetch_both(api_client, settings, "/api/books/", params)
+        assert fast == slow
+
+    @pytest.mark.parametrize(
+        "params",
+        [{}, {"is_active": "true"}, {"is_overdue": "true"}, {"pagination": "cursor"}],
+    )
+    def test_loan_list_is_byte_identical(
+        self, api_client, settings, staff, loans, params
+    ):
+        api_client.force_authenticate(user=staff)
+        fast, slow = fetch_both(api_client, settings, "/api/books/loans/", params)
+        assert fast == slow
+
+    def test_cursor_links_are_followed_the_same(self, api_client, settings, books):
+        settings.FAST_LIST_RESPONSES = True
+        page = api_client.get("/api/books/", {"pagination": "cursor"}).json()
+        fast, slow = fetch_both(api_client, settings, page["next"], {})
+        assert fast == slow
+
+    def test_async_list_is_byte_identical(self, api_client, settings, books):
+        fast, slow = fetch_both(api_client, settings, "/api/async/books/", {})
+        assert fast == slow
+
+
+class TestFastJSONRenderer:
+    @pytest.mark.parametrize(
+        "data",
+        [
+            {"text": 'café \u2028 \u2029 "q" \\ \n \x01', "n": None},
+            [1, True, False, {"nested": [{"a": -5}]}],
+            {1: "int key", "lazy": gettext_lazy("Not found.")},
+            {"when": datetime.datetime(2024, 5, 1, 12, 30, 15, 123456)},
+            {"day": datetime.date(2024, 5, 1), "big": 2**70},
+        ],
+    )
+    def test_matches_json_renderer(self, data):
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_indented_output_falls_back(self):
+        data = {"a": [1, 2]}
+        media_type = "application/json; indent=2"
+        assert FastJSONRenderer().render(data, media_type) == JSONRenderer().render(
+            data, media_type
+        )
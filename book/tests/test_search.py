@@ -0,0 +1,57 @@
+import pytest
+from book.models import Book
+from book.search import SQLiteSearchBackend
+
+
+def make_book(isbn, **fields):
+    defaults = {"title": "Untitled", "author": "Anonymous", "page_count": 100}
+    defaults.update(fields)
+    return Book.objects.create(isbn=isbn, **defaults)
+
+
+def search(api_client, query, **params):
+    response = api_client.get("/api/books/", {"search": query, **params})
+    assert response.status_code == 200
+    return [row["isbn"] for row in response.data["results"]]
+
+
+@pytest.mark.django_db
+class TestBookSearch:
+    def test_ranks_title_matches_above_description_matches(self, api_client):
+        make_book("1", description="A long story that mentions dragons once")
+        make_book("2", title="Dragons of Autumn")
+        make_book("3", title="Cooking for Two")
+
+        assert search(api_client, "dragons") == ["2", "1"]
+
+    def test_matches_every_term_and_prefixes_the_last(self, api_client):
+        make_book("1", title="The Hobbit", author="Tolkien")
+        make_book("2", title="The Silmarillion", author="Tolkien")
+
+        assert search(api_client, "tolkien hob") == ["1"]
+
+    def test_explicit_ordering_overrides_relevance(self, api_client):
+        make_book("1", title="Python Basics", description="python")
+        make_book("2", title="Advanced Python")
+
+        assert search(api_client, "python", ordering="title") == ["2", "1"]
+
+    def test_index_follows_updates_and_deletes(self, api_client):
+        book = make_book("1", title="Original Title")
+        book.title = "Renamed"
+        book.save()
+        assert search(api_client, "original") == []
+        assert search(api_client, "renamed") == ["1"]
+
+        book.delete()
+        assert search(api_client, "renamed") == []
+
+    def test_query_syntax_is_treated_as_text(self, api_client):
+        make_book("1", title='Say "Hello" AND goodbye')
+
+        assert search(api_client, '"hello" AND') == ["1"]
+        assert search(api_client, "NEAR( ^ *") == []
+
+
+def test_match_expression_quotes_terms():
+    assert SQLiteSearchBackend.match_expression(['a"b', "c"]) == '"a""b" "c"*'
@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from book.models import Loan
+
+DESCRIPTION_COLUMN = '"book_book"."description"'
+
+
+pytestmark = pytest.mark.usefixtures("no_catalog_cache")
+
+
+@pytest.fixture
+def books(make_books):
+    return make_books(
+        15,
+        author="Ann Author",
+        description="A very long description. " * 50,
+        available_copies=lambda i: i % 2,
+    )
+
+
+@pytest.fixture
+def loans(staff, books):
+    return Loan.objects.bulk_create(
+        Loan(user=staff, book=book, due_date=timezone.now() + timedelta(days=7))
+        for book in books
+    )
+
+
+def get_with_sql(client, path, params):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(path, params)
+    assert response.status_code == 200, response.content
+    return response, " ".join(query["sql"] for query in ctx.captured_queries)
+
+
+@pytest.mark.django_db
+class TestSparseFields:
+    @pytest.mark.parametrize("fast", [True, False])
+    def test_fields_trim_the_list_and_the_query(
+        self, api_client, settings, books, fast
+    ):
+        settings.FAST_LIST_RESPONSES = fast
+        response, sql = get_with_sql(
+            api_client, "/api/books/", {"fields": "is_available,isbn,title"}
+        )
+        # Serializer order, whatever order the client asked in.
+        assert list(response.data["results"][0]) == ["is_available", "title", "isbn"]
+        assert DESCRIPTION_COLUMN not in sql
+
+    @pytest.mark.parametrize("fast", [True, False])
+    def test_omit(self, api_client, settings, books, fast):
+        settings.FAST_LIST_RESPONSES = fast
+        response, sql = get_with_sql(
+            api_client, "/api/books/", {"omit": "description", "search": "book"}
+        )
+        row = response.data["results"][0]
+        assert "description" not in row and "title" in row
+        assert DESCRIPTION_COLUMN not in sql
+
+    def test_fast_and_serializer_paths_match(self, api_client, settings, books):
+        bodies = []
+        for fast in (True, False):
+            settings.FAST_LIST_RESPONSES = fast
+            response = api_client.get(
+                "/api/books/", {"fields": "id,title", "omit": "id", "page": 2}
+            )
+            bodies.append(response.content)
+        assert bodies[0] == bodies[1]
+
+    def test_retrieve(self, api_client, books):
+        response, sql = get_with_sql(
+            api_client, f"/api/books/{books[0].pk}/", {"fields": "title"}
+        )
+        assert response.data == {"title": books[0].title}
+        assert DESCRIPTION_COLUMN not in sql
+
+    def test_cursor_pages_without_the_ordering_field(self, api_client, books):
+        params = {"pagination": "cursor", "fields": "title"}
+        first = api_client.get("/api/books/", params).json()
+        second = api_client.get(first["next"]).json()
+        titles = [row["title"] for row in first["results"] + second["results"]]
+        assert len(set(titles)) == len(books)
+        assert second["results"][0] == {"title": titles[10]}
+
+    @pytest.mark.parametrize("fast", [True, False])
+    def test_loans(self, api_client, settings, staff, loans, fast):
+        settings.FAST_LIST_RESPONSES = fast
+        api_client.force_authenticate(user=staff)
+        response, sql = get_with_sql(
+            api_client, "/api/books/loans/", {"fields": "id,due_date"}
+        )
+        assert list(response.data["results"][0]) == ["id", "due_date"]
+        assert "user_user" not in sql and "book_book" not in sql
+
+        response = api_client.get(
+            f"/api/books/loans/{loans[0].pk}/", {"fields": "book_title"}
+        )
+        assert response.data == {"book_title": "Book 0"}
+
+    def test_export(self, api_client, books):
+        response = api_client.get(
+            "/api/books/export/", {"output": "csv", "fields": "isbn,title"}
+        )
+        header = b"".join(response.streaming_content).decode().splitlines()[0]
+        assert header == "title,isbn"
+
+    def test_unknown_fields_are_rejected(self, api_client, books):
+        response = api_client.get("/api/books/", {"fields": "title,bogus"})
+        assert response.status_code == 400
+        assert response.data == {"fields": ["Unknown field(s): bogus."]}
+
+    def test_omitting_everything_is_rejected(self, api_client, books):
+        response = api_client.get("/api/books/", {"fields": "title", "omit": "title"})
+        assert response.status_code == 400
@@ -0,0 +1,186 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Sum
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from book.models import BookCirculation, DailyCirculation, Loan
+from book.services import borrow_book, borrow_books, return_loan, return_loans
+from book.stats import COUNTERS
+
+
+@pytest.fixture
+def books(make_books):
+    return make_books(3, available_copies=5, total_copies=5)
+
+
+@pytest.fixture
+def staff_client(staff):
+    client = APIClient()
+    client.force_authenticate(user=staff)
+    return client
+
+
+def rollups():
+    daily = {
+        row["date"]: tuple(row[field] for field in COUNTERS)
+        for row in DailyCirculation.objects.values("date").annotate(
+            **{field: Sum(field) for field in COUNTERS}
+        )
+    }
+    books = {
+        row[0]: row[1:]
+        for row in BookCirculation.objects.values_list("book", *COUNTERS)
+    }
+    return daily, books
+
+
+def age(loan, days, overdue=False):
+    # Move a loan back in time, as if it had been borrowed ``days`` ago.
+    borrowed = timezone.now() - timedelta(days=days)
+    due = borrowed + timedelta(days=days - 1 if overdue else days + 1)
+    Loan.objects.filter(pk=loan.pk).update(borrowed_date=borrowed, due_date=due)
+    loan.refresh_from_db()
+    return loan
+
+
+@pytest.mark.django_db
+class TestCirculationRollups:
+    def test_borrow_and_return_update_the_rollups(self, user, books):
+        loan = age(borrow_book(user, books[0].pk), days=3)
+        borrow_books(user, [books[0].pk, books[1].pk])
+        return_loan(loan)
+
+        daily, by_book = rollups()
+        today = timezone.localdate()
+        assert daily[today][:3] == (3, 1, 0)
+        assert by_book[books[0].pk][:3] == (2, 1, 0)
+        assert by_book[books[1].pk][:3] == (1, 0, 0)
+        assert 3 * 86400 - 5 < by_book[books[0].pk][3] <= 3 * 86400
+
+    def test_late_bulk_returns(self, user, books):
+        loans = [age(borrow_book(user, book.pk), 20, overdue=True) for book in books]
+        return_loans(user, [loan.pk for loan in loans])
+
+        daily, by_book = rollups()
+        assert daily[timezone.localdate()][1:3] == (3, 3)
+        assert all(counts[2] == 1 for counts in by_book.values())
+
+    def test_rebuild_matches_the_incremental_rollups(self, user, books):
+        loans = [borrow_book(user, book.pk) for book in books * 2]
+        age(loans[0], 40, overdue=True)
+        age(loans[1], 2)
+        # Loans written around the services only reach the rollups through a
+        # rebuild.
+        Loan.objects.create(
+            user=user, book=books[2], due_date=timezone.now() - timedelta(days=1)
+        )
+        call_command("rebuild_circulation_stats", "--batch-size", "2", stdout=None)
+        daily, by_book = rollups()
+        assert sum(counts[0] for counts in daily.values()) == 7
+        assert by_book[books[2].pk][0] == 3
+
+        return_loan(Loan.objects.get(pk=loans[0].pk))
+        return_loans(user, [loans[1].pk, loans[2].pk])
+        incremental = rollups()
+        call_command("rebuild_circulation_stats", stdout=None)
+        rebuilt = rollups()
+
+        for before, after in zip(incremental, rebuilt):
+            assert before.keys() == after.keys()
+            for key, counts in before.items():
+                assert counts[:3] == after[key][:3]
+                # Whole seconds are summed per loan, rather than per day.
+                assert abs(counts[3] - after[key][3]) <= counts[1]
+
+    def test_admin_loans_and_returns_are_counted(self, admin_client, user, books):
+        due = timezone.localtime(timezone.now() + timedelta(days=14))
+        form = {
+            "user": user.pk,
+            "book": books[0].pk,
+            "due_date_0": due.strftime("%Y-%m-%d"),
+            "due_date_1": due.strftime("%H:%M:%S"),
+        }
+        response = admin_client.post("/admin/book/loan/add/", form)
+        assert response.status_code == 302
+        loan = Loan.objects.get()
+        assert rollups()[1][books[0].pk][:2] == (1, 0)
+
+        now = timezone.localtime()
+        response = admin_client.post(
+            f"/admin/book/loan/{loan.pk}/change/",
+            {
+                **form,
+                "returned_date_0": now.strftime("%Y-%m-%d"),
+                "returned_date_1": now.strftime("%H:%M:%S"),
+            },
+        )
+        assert response.status_code == 302
+        incremental = rollups()
+        assert incremental[1][books[0].pk][:3] == (1, 1, 0)
+        assert sum(counts[1] for counts in incremental[0].values()) == 1
+
+        call_command("rebuild_circulation_stats", stdout=None)
+        rebuilt = rollups()
+        assert incremental[1].keys() == rebuilt[1].keys()
+        for key, counts in incremental[1].items():
+            assert counts[:3] == rebuilt[1][key][:3]
+
+
+@pytest.mark.django_db
+class TestCirculationStatsAPI:
+    def test_staff_only(self, user):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        assert client.get("/api/books/stats/summary/").status_code == 403
+
+    def test_summary(self, staff_client, user, books):
+        overdue = borrow_book(user, books[0].pk)
+        Loan.objects.filter(pk=overdue.pk).update(
+            due_date=timezone.now() - timedelta(days=1)
+        )
+        late = age(borrow_book(user, books[1].pk), 10, overdue=True)
+        return_loan(late)
+        borrow_book(user, books[2].pk)
+
+        response = staff_client.get("/api/books/stats/summary/", {"days": 7})
+        assert response.data == {
+            "days": 7,
+            "loans": 3,
+            "returns": 1,
+            "average_loan_days": 10.0,
+            "late_return_rate": 1.0,
+            "active_loans": 2,
+            "overdue_loans": 1,
+            "overdue_rate": 0.5,
+        }
+
+    def test_daily_fills_quiet_days(self, staff_client, user, books):
+        borrow_book(user, books[0].pk)
+        today = timezone.localdate()
+
+        response = staff_client.get(
+            "/api/books/stats/daily/",
+            {"start": str(today - timedelta(days=2)), "end": str(today)},
+        )
+        results = response.json()["results"]
+        assert [row["loans"] for row in results] == [0, 0, 1]
+        assert results[-1]["date"] == str(today)
+
+    def test_daily_rejects_long_ranges(self, staff_client):
+        response = staff_client.get(
+            "/api/books/stats/daily/", {"start": "2020-01-01", "end": "2024-01-01"}
+        )
+        assert response.status_code == 400
+
+    def test_most_borrowed(self, staff_client, user, books):
+        for book in (books[1], books[1], books[2]):
+            borrow_book(user, book.pk)
+
+        response = staff_client.get("/api/books/stats/most-borrowed/", {"limit": 2})
+        assert [(row["book"], row["loans"]) for row in response.data["results"]] == [
+            (books[1].pk, 2),
+            (books[2].pk, 1),
+        ]
@@ -4,6 +4,7 @@ from rest_framework import status
 from django.utils import timezone
 from datetime import timedelta
 from book.models import Book, Loan
+from book.services import borrow_book, reconcile_active_loan_counts
 from user.models import User
 
 
@@ -91,3 +92,154 @@ class TestLoanAPI:
         assert response.status_code == status.HTTP_200_OK
         book.refresh_from_db()
         assert book.available_copies == 5
+
+    def test_borrow_unavailable_book(self, api_client, user, book):
+        api_client.force_authenticate(user=user)
+        book.available_copies = 0
+        book.save()
+
+        response = api_client.post(
+            "/api/books/loans/borrow/", {"book_id": book.id, "duration_days": 14}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["book_id"] == ["This book is not available"]
+        assert not Loan.objects.exists()
+        book.refresh_from_db()
+        assert book.available_copies == 0
+
+    def test_borrow_missing_book(self, api_client, user):
+        api_client.force_authenticate(user=user)
+        response = api_client.post("/api/books/loans/borrow/", {"book_id": 999})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["book_id"] == ["Book not found"]
+
+    def test_borrow_claims_copy_with_conditional_update(
+        self, user, book, django_assert_num_queries
+    ):
+        # savepoint, conditional UPDATE, INSERT, loan counter UPDATE, the two
+        # circulation rollup upserts, release
+        with django_assert_num_queries(7):
+            loan = borrow_book(user, book.id)
+        assert loan.book_id == book.id
+        book.refresh_from_db()
+        assert book.available_copies == 4
+
+    def test_active_loans_count_follows_borrow_and_return(self, api_client, user, book):
+        api_client.force_authenticate(user=user)
+        response = api_client.post("/api/books/loans/borrow/", {"book_id": book.id})
+        user.refresh_from_db()
+        assert user.active_loans_count == 1
+
+        api_client.post(f"/api/books/loans/{response.data['id']}/return_book/")
+        user.refresh_from_db()
+        assert user.active_loans_count == 0
+
+    def test_deleting_an_active_loan_releases_it(self, api_client, user, book):
+        api_client.force_authenticate(user=user)
+        response = api_client.post("/api/books/loans/borrow/", {"book_id": book.id})
+
+        response = api_client.delete(f"/api/books/loans/{response.data['id']}/")
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        user.refresh_from_db()
+        book.refresh_from_db()
+        assert user.active_loans_count == 0
+        assert book.available_copies == 5
+
+    def test_loans_are_only_created_by_borrowing(self, api_client, user, book):
+        api_client.force_authenticate(user=user)
+        response = api_client.post(
+            "/api/books/loans/",
+            {"book": book.id, "due_date": timezone.now() + timedelta(days=7)},
+        )
+        assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
+        assert not Loan.objects.exists()
+
+    def test_reconcile_active_loan_counts(self, user, admin_user, book):
+        due_date = timezone.now() + timedelta(days=14)
+        Loan.objects.create(user=user, book=book, due_date=due_date)
+        Loan.objects.create(user=user, book=book, due_date=due_date)
+        Loan.objects.create(
+            user=user, book=book, due_date=due_date, returned_date=timezone.now()
+        )
+        User.objects.filter(pk=admin_user.pk).update(active_loans_count=3)
+
+        assert reconcile_active_loan_counts(batch_size=1) == 2
+        user.refresh_from_db()
+        admin_user.refresh_from_db()
+        assert user.active_loans_count == 2
+        assert admin_user.active_loans_count == 0
+        assert reconcile_active_loan_counts() == 0
+
+
+@pytest.mark.django_db
+class TestBulkLoanAPI:
+    @pytest.fixture
+    def books(self):
+        return [
+            Book.objects.create(
+                title=f"Bulk Book {i}",
+                author="Bulk Author",
+                isbn=f"555000000000{i}",
+                page_count=100,
+                available_copies=1,
+                total_copies=1,
+            )
+            for i in range(3)
+        ]
+
+    def test_bulk_borrow(self, api_client, user, books):
+        api_client.force_authenticate(user=user)
+        books[2].available_copies = 0
+        books[2].save()
+
+        response = api_client.post(
+            "/api/books/loans/bulk_borrow/",
+            {"book_ids": [books[0].id, books[1].id, books[2].id, 999]},
+            format="json",
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        results = response.data["results"]
+        assert [item["success"] for item in results] == [True, True, False, False]
+        assert results[0]["loan"]["book_title"] == "Bulk Book 0"
+        assert results[2]["error"] == "This book is not available"
+        assert results[3]["error"] == "Book not found"
+        assert Loan.objects.filter(user=user).count() == 2
+        assert Book.objects.filter(available_copies=0).count() == 3
+
+    def test_bulk_borrow_nothing_available(self, api_client, user, books):
+        api_client.force_authenticate(user=user)
+        response = api_client.post(
+            "/api/books/loans/bulk_borrow/", {"book_ids": [999]}, format="json"
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not Loan.objects.exists()
+
+    def test_bulk_return(self, api_client, user, admin_user, books):
+        api_client.force_authenticate(user=user)
+        due_date = timezone.now() + timedelta(days=14)
+        mine = [
+            Loan.objects.create(user=user, book=book, due_date=due_date)
+            for book in books[:2]
+        ]
+        other = Loan.objects.create(user=admin_user, book=books[2], due_date=due_date)
+        Book.objects.update(available_copies=0)
+
+        response = api_client.post(
+            "/api/books/loans/bulk_return/",
+            {"loan_ids": [mine[0].id, mine[1].id, other.id]},
+            format="json",
+        )
+        assert response.status_code == status.HTTP_200_OK
+        results = response.data["results"]
+        assert [item["success"] for item in results] == [True, True, False]
+        assert results[2]["error"] == "Loan not found"
+        assert Loan.objects.filter(returned_date__isnull=True).get() == other
+        assert list(
+            Book.objects.order_by("isbn").values_list("available_copies", flat=True)
+        ) == [1, 1, 0]
+
+        response = api_client.post(
+            "/api/books/loans/bulk_return/", {"loan_ids": [mine[0].id]}, format="json"
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["results"][0]["error"] == "Book already returned"
@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import BookViewSet, LoanViewSet
+from .views import BookViewSet, CirculationStatsViewSet, LoanViewSet
 
 router = DefaultRouter()
-router.register("", BookViewSet, basename="book")
 router.register("loans", LoanViewSet, basename="loan")
+router.register("stats", CirculationStatsViewSet, basename="circulation-stats")
+router.register("", BookViewSet, basename="book")
 
 urlpatterns = [
     path("", include(router.urls)),
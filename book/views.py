@@ -1,32 +1,135 @@
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import MethodNotAllowed
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
-from django.utils import timezone
-from .models import Book, Loan
-from .serializers import BookSerializer, LoanSerializer, BorrowBookSerializer
+from LibraryManager.replicas import ReplicaReadMixin
+from .models import ArchivedLoan, Book, Loan
+from .serializers import (
+    AutocompleteQuerySerializer,
+    BookSerializer,
+    LoanSerializer,
+    BorrowBookSerializer,
+    BulkBorrowSerializer,
+    BulkReturnSerializer,
+    DailyStatsQuerySerializer,
+    MostBorrowedQuerySerializer,
+    SummaryStatsQuerySerializer,
+)
+from .services import (
+    BorrowError,
+    ReturnError,
+    borrow_books,
+    delete_loans,
+    return_loan,
+    return_loans,
+)
 from .permissions import IsAdminOrReadOnly
-from .filters import BookFilter, LoanFilter
+from .filters import ArchivedLoanFilter, BookFilter, LoanFilter
+from .search import BookSearchFilter
+from .pagination import KeysetPagination
+from .cache import AUTOCOMPLETE_VERSION_KEY, CatalogCacheMixin
+from .export import export_response
+from .rows import BOOK_ROWS, LOAN_ROWS, RowPlanListMixin, SparseFieldsMixin
+from .autocomplete import autocomplete
+from .stats import daily_stats, most_borrowed, summary_stats
 
 
-class BookViewSet(viewsets.ModelViewSet):
+class BookViewSet(
+    ReplicaReadMixin,
+    CatalogCacheMixin,
+    SparseFieldsMixin,
+    RowPlanListMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
+    row_plan = BOOK_ROWS
     permission_classes = [IsAdminOrReadOnly]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, BookSearchFilter, OrderingFilter]
     filterset_class = BookFilter
     search_fields = ["title", "author", "isbn", "description"]
     ordering_fields = ["title", "author", "created_at", "available_copies"]
 
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        return export_response(request, self.get_row_plan(), queryset, "books")
+
+    @action(detail=False, methods=["get"])
+    def autocomplete(self, request):
+        return self.cached_response(
+            request, [AUTOCOMPLETE_VERSION_KEY], self.autocomplete_response
+        )
+
+    def autocomplete_response(self, request):
+        serializer = AutocompleteQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        return Response(autocomplete(params["q"], params["limit"]))
+
+
+class LoanViewSet(
+    ReplicaReadMixin, SparseFieldsMixin, RowPlanListMixin, viewsets.ModelViewSet
+):
+    """
+    Loans in the hot table; ``?history=true`` reads the archive instead.
+
+    History mode applies to ``list``, ``retrieve`` and ``export``, so loans
+    moved by ``book.archive`` stay readable without every other query
+    paying for the whole loan history.
+    """
 
-class LoanViewSet(viewsets.ModelViewSet):
     queryset = Loan.objects.all()
     serializer_class = LoanSerializer
+    row_plan = LOAN_ROWS
     permission_classes = [permissions.IsAuthenticated]
-    filterset_class = LoanFilter
+    pagination_class = KeysetPagination
+    history_query_param = "history"
+    history_actions = ("list", "retrieve", "export")
+    throttle_tiers = {
+        action: "circulation"
+        for action in ("borrow", "return_book", "bulk_borrow", "bulk_return")
+    }
+
+    def create(self, request, *args, **kwargs):
+        # Loans are created by borrowing, which claims a copy and counts the
+        # loan against the user.
+        raise MethodNotAllowed(
+            request.method, detail="Use the borrow endpoint to create loans."
+        )
+
+    def perform_destroy(self, instance):
+        delete_loans(Loan.objects.filter(pk=instance.pk))
+
+    def is_history(self):
+        value = self.request.query_params.get(self.history_query_param, "")
+        return self.action in self.history_actions and value.lower() in ("1", "true")
+
+    @property
+    def filterset_class(self):
+        return ArchivedLoanFilter if self.is_history() else LoanFilter
 
     def get_queryset(self):
+        model = ArchivedLoan if self.is_history() else Loan
+        queryset = model.objects.select_related("user", "book").only(
+            "id",
+            "user__username",
+            "book__title",
+            "borrowed_date",
+            "due_date",
+            "returned_date",
+        )
         if self.request.user.is_staff:
-            return Loan.objects.all()
-        return Loan.objects.filter(user=self.request.user)
+            return queryset
+        return queryset.filter(user=self.request.user)
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        return export_response(request, self.get_row_plan(), queryset, "loans")
 
     @action(detail=False, methods=["post"])
     def borrow(self, request):
@@ -47,17 +150,86 @@ class LoanViewSet(viewsets.ModelViewSet):
                 {"error": "Book already returned"}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        if not request.user.is_staff and loan.user != request.user:
+        if not request.user.is_staff and loan.user_id != request.user.pk:
             return Response(
                 {"error": "You can only return your own loans"},
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        loan.returned_date = timezone.now()
-        loan.save()
-
-        book = loan.book
-        book.available_copies += 1
-        book.save()
+        try:
+            return_loan(loan)
+        except ReturnError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response(LoanSerializer(loan).data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["post"])
+    def bulk_borrow(self, request):
+        serializer = BulkBorrowSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            results = borrow_books(
+                request.user,
+                serializer.validated_data["book_ids"],
+                serializer.validated_data["duration_days"],
+            )
+        except BorrowError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_409_CONFLICT)
+
+        return self._bulk_response(
+            "book_id", results, success_status=status.HTTP_201_CREATED
+        )
+
+    @action(detail=False, methods=["post"])
+    def bulk_return(self, request):
+        serializer = BulkReturnSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            results = return_loans(request.user, serializer.validated_data["loan_ids"])
+        except ReturnError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_409_CONFLICT)
+
+        return self._bulk_response(
+            "loan_id", results, success_status=status.HTTP_200_OK
+        )
+
+    def _bulk_response(self, key, results, success_status):
+        items = []
+        for pk, loan, error in results:
+            if loan is None:
+                items.append({key: pk, "success": False, "error": error})
+            else:
+                items.append(
+                    {key: pk, "success": True, "loan": LoanSerializer(loan).data}
+                )
+
+        if not any(item["success"] for item in items):
+            return Response({"results": items}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"results": items}, status=success_status)
+
+
+class CirculationStatsViewSet(ReplicaReadMixin, viewsets.ViewSet):
+    """Read-only circulation statistics for staff, served from the rollups."""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def query(self, serializer_class):
+        serializer = serializer_class(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+    @action(detail=False, methods=["get"])
+    def summary(self, request):
+        return Response(summary_stats(**self.query(SummaryStatsQuerySerializer)))
+
+    @action(detail=False, methods=["get"])
+    def daily(self, request):
+        params = self.query(DailyStatsQuerySerializer)
+        return Response({**params, "results": daily_stats(**params)})
+
+    @action(detail=False, methods=["get"], url_path="most-borrowed")
+    def most_borrowed(self, request):
+        params = self.query(MostBorrowedQuerySerializer)
+        return Response({"results": most_borrowed(**params)})
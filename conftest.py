@@ -0,0 +1,93 @@
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from rest_framework.test import APIClient
+
+from book.models import Book
+from LibraryManager.metrics import request_metrics
+from LibraryManager.throttling import load_monitor, token_buckets
+
+from user.authentication import user_cache
+from user.blacklist import token_blacklist
+from user.models import User
+
+
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix):
+    # A separate, initially empty database standing in for a read replica
+    # that has fallen behind. Only tests that ask for it create it.
+    default = settings.DATABASES["default"]
+    replica = {**default, "TEST": {}}
+    if "sqlite" not in default["ENGINE"]:
+        replica["TEST"]["NAME"] = f"test_{default['NAME']}_replica"
+    settings.DATABASES["replica"] = replica
+    # Let the connection handler fill in defaults for the new alias.
+    del connections.settings
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    for cache in caches.all():
+        cache.clear()
+    user_cache.clear()
+    token_blacklist.reset()
+    token_blacklist.background = False
+    request_metrics.reset()
+    token_buckets.reset()
+    load_monitor.reset()
+    yield
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def user():
+    return User.objects.create_user(
+        username="reader", email="reader@example.com", password="testpass123"
+    )
+
+
+@pytest.fixture
+def staff():
+    return User.objects.create_user(
+        username="staff",
+        email="staff@example.com",
+        password="testpass123",
+        is_staff=True,
+    )
+
+
+@pytest.fixture
+def make_books():
+    """
+    Bulk-create ``count`` numbered books. Keyword arguments override the
+    default fields; a callable value is called with each book's index.
+    """
+
+    def make_books(count, **fields):
+        return Book.objects.bulk_create(
+            Book(
+                **{
+                    "title": f"Book {i}",
+                    "author": "Author",
+                    "isbn": f"{i:013d}",
+                    "page_count": 100,
+                    **{
+                        name: value(i) if callable(value) else value
+                        for name, value in fields.items()
+                    },
+                }
+            )
+            for i in range(count)
+        )
+
+    return make_books
+
+
+@pytest.fixture
+def no_catalog_cache(settings):
+    settings.CATALOG_CACHE_TIMEOUT = 0
@@ -1,3 +1,60 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.db.models import Q
 
-# Register your models here.
+from LibraryManager.paginators import EstimatedCountPaginator
+
+from .models import User
+
+
+@admin.register(User)
+class UserAdmin(BaseUserAdmin):
+    fieldsets = BaseUserAdmin.fieldsets + (
+        (
+            "Library",
+            {
+                "fields": (
+                    "phone_number",
+                    "address",
+                    "date_of_birth",
+                    "active_loans_count",
+                )
+            },
+        ),
+    )
+    # The base form only asks for a username, but emails are unique, so a
+    # second user added without one would fail on the constraint.
+    add_fieldsets = (
+        (
+            None,
+            {
+                "classes": ("wide",),
+                "fields": (
+                    "username",
+                    "email",
+                    "usable_password",
+                    "password1",
+                    "password2",
+                ),
+            },
+        ),
+        (
+            "Library",
+            {
+                "classes": ("wide",),
+                "fields": ("phone_number", "address", "date_of_birth"),
+            },
+        ),
+    )
+    readonly_fields = ("active_loans_count",)
+    search_help_text = "The start of a username, or an exact email address."
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # Both branches use an index: user_username_prefix_idx and the
+        # unique email index. Also serves the loan admin's user picker.
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        return queryset.filter(Q(username__startswith=term) | Q(email=term)), False
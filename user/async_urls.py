@@ -0,0 +1,6 @@
+from django.urls import path
+from .async_views import profile
+
+urlpatterns = [
+    path("profile/", profile, name="async-profile"),
+]
@@ -0,0 +1,12 @@
+from rest_framework import status
+
+from book.async_views import async_api, json_response
+from .serializers import UserSerializer
+
+
+@async_api(["GET"], authenticated=True)
+async def profile(request):
+    return json_response(
+        {"success": True, "data": UserSerializer(request.user).data},
+        status=status.HTTP_200_OK,
+    )
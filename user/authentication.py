@@ -0,0 +1,155 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+# Written to the default cache whenever a user changes; cached entries
+# remember the stamp they were loaded under.
+USER_STAMP_KEY = "auth:user:{}:stamp"
+
+
+class UserCache:
+    """
+    Size-bounded, per-process LRU of authenticated users with a short TTL.
+
+    Entries are keyed by user id and remember the version they were loaded
+    for: the token's ``REVOKE_TOKEN_CLAIM``, so a token minted before a
+    password change never matches a fresh entry, and the user's stamp in
+    the default cache, so a change made by another worker does not either.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, user_id, version):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            entry_version, user, expires = entry
+            if entry_version != version or expires <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user
+
+    def set(self, user_id, version, user):
+        timeout = getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 30)
+        if not timeout:
+            return
+        max_size = getattr(settings, "AUTH_USER_CACHE_SIZE", 10000)
+        with self._lock:
+            self._entries[user_id] = (version, user, time.monotonic() + timeout)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def evict(self, user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+def _restamp(user_ids):
+    user_cache.evict(user_ids)
+    timeout = getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 30)
+    if timeout:
+        stamp = time.time_ns()
+        cache.set_many(
+            {USER_STAMP_KEY.format(user_id): stamp for user_id in user_ids},
+            timeout,
+        )
+
+
+def invalidate_users(user_ids):
+    """
+    Drop ``user_ids`` from the authentication cache of every process.
+
+    Evicts this process's entries and writes new stamps to the default
+    cache, which invalidates the entries other processes hold if that cache
+    is shared between them. Does so straight away and again once the
+    surrounding transaction commits, so a request that cached the
+    pre-commit row in between is dropped too.
+    """
+    user_ids = [str(user_id) for user_id in user_ids]
+    _restamp(user_ids)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _restamp(user_ids))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` that resolves users through ``user_cache``.
+
+    Authenticated requests skip the user query while the entry is fresh,
+    at the cost of one lookup of the user's stamp in the default cache.
+    Each request gets its own copy of the cached user, so views that modify
+    ``request.user`` cannot leak changes into other requests.
+    """
+
+    def cache_key(self, validated_token, stamp):
+        return (
+            str(validated_token.get(api_settings.USER_ID_CLAIM)),
+            (validated_token.get(api_settings.REVOKE_TOKEN_CLAIM), stamp),
+        )
+
+    @staticmethod
+    def stamp_key(validated_token):
+        return USER_STAMP_KEY.format(validated_token.get(api_settings.USER_ID_CLAIM))
+
+    def get_user(self, validated_token):
+        # Read before the user, so a change landing in between leaves the
+        # entry under a stale stamp rather than a fresh one.
+        stamp = cache.get(self.stamp_key(validated_token))
+        user_id, version = self.cache_key(validated_token, stamp)
+        user = user_cache.get(user_id, version)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, version, user)
+        return copy.copy(user)
+
+
+class AsyncJWTAuthentication(CachedJWTAuthentication):
+    """
+    ``CachedJWTAuthentication`` for async views.
+
+    Token parsing and validation are pure CPU work and are shared with the
+    sync class; only a cache miss leaves the event loop, to load the user
+    with the sync class's ``get_user()``.
+    """
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        stamp = await cache.aget(self.stamp_key(validated_token))
+        user_id, version = self.cache_key(validated_token, stamp)
+        user = user_cache.get(user_id, version)
+        if user is None:
+            # A miss runs simplejwt's lookup and checks off the event loop.
+            return await sync_to_async(self.get_user)(validated_token)
+        return copy.copy(user)
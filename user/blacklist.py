@@ -0,0 +1,196 @@
+"""
+Refresh-token blacklist: an in-memory Bloom filter in front of
+``RevokedToken``.
+
+Rotation is enforced by the insert itself. Revoking a token inserts its jti
+hash under a primary key, so a second use of the same refresh token fails
+on the conflict, whatever the local filter knows. The filter only lets the
+common case, a token that was never revoked, skip the database read. Each
+process loads the filter and folds in other processes' revocations every
+``TOKEN_BLACKLIST_SYNC_INTERVAL`` seconds on a background thread, so even a
+table of tens of millions of rows never holds up a request.
+"""
+
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .models import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+
+def jti_hash(jti):
+    digest = hashlib.blake2b(str(jti).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        # Double hashing over the two halves of the 64-bit value.
+        value &= 0xFFFFFFFFFFFFFFFF
+        first, second = value & 0xFFFFFFFF, (value >> 32) | 1
+        size = self.size
+        return [(first + i * second) % size for i in range(self.hashes)]
+
+    def add(self, value):
+        bits = self.bits
+        added = False
+        for position in self._positions(value):
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+
+    def __contains__(self, value):
+        bits = self.bits
+        for position in self._positions(value):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class TokenBlacklist:
+    """
+    Per-process front for ``RevokedToken``.
+
+    The filter is only ever an optimisation: a value it misses, because a
+    load is still running or a concurrent update lost a bit, falls through
+    to the insert in ``revoke()``, which rejects the replay.
+    """
+
+    # Revocations are re-read this far back so rows committed slightly out of
+    # ``revoked_at`` order are never skipped.
+    sync_overlap = timedelta(seconds=5)
+
+    def __init__(self):
+        self._sync_lock = threading.Lock()
+        # Sync on a thread of its own; tests turn this off to sync inline.
+        self.background = True
+        self.reset()
+
+    def reset(self):
+        with self._sync_lock:
+            self._filter = None
+            self._next_sync = 0.0
+            self._cursor = None
+            self._rebuild_at = 0.0
+
+    def is_revoked(self, token):
+        value = jti_hash(token[api_settings.JTI_CLAIM])
+        bloom = self.sync()
+        if bloom is not None and value not in bloom:
+            return False
+        return RevokedToken.objects.filter(pk=value).exists()
+
+    def revoke(self, token):
+        """Revoke ``token``; returns ``False`` if it already was."""
+        value = jti_hash(token[api_settings.JTI_CLAIM])
+        try:
+            with transaction.atomic():
+                RevokedToken.objects.create(
+                    jti_hash=value, expires_at=datetime_from_epoch(token["exp"])
+                )
+        except IntegrityError:
+            return False
+        bloom = self._filter
+        if bloom is not None:
+            bloom.add(value)
+        return True
+
+    def sync(self, force=False):
+        """
+        Return the filter, starting a sync first when one is due.
+
+        Syncs run on a background thread, so requests never wait for one.
+        Until the first load has finished they get ``None`` and look tokens
+        up by primary key; a rebuild is swapped in once it is complete.
+        ``force`` syncs on the calling thread instead.
+        """
+        if force:
+            with self._sync_lock:
+                self._sync()
+            return self._filter
+        if time.monotonic() < self._next_sync:
+            return self._filter
+        if not self._sync_lock.acquire(blocking=False):
+            return self._filter
+        if not self.background:
+            try:
+                self._sync()
+            finally:
+                self._sync_lock.release()
+            return self._filter
+        threading.Thread(
+            target=self._sync_in_background, name="token-blacklist-sync", daemon=True
+        ).start()
+        return self._filter
+
+    def _sync_in_background(self):
+        # The caller acquired the lock for this thread.
+        try:
+            self._sync()
+        except Exception:
+            logger.exception("Token blacklist sync failed")
+        finally:
+            connections.close_all()
+            self._sync_lock.release()
+
+    def _sync(self):
+        now = time.monotonic()
+        # Failed syncs are retried after the interval, not on every request.
+        self._next_sync = now + getattr(settings, "TOKEN_BLACKLIST_SYNC_INTERVAL", 5)
+        capacity = getattr(settings, "TOKEN_BLACKLIST_CAPACITY", 10_000_000)
+        bloom, cursor = self._filter, self._cursor
+        # Rebuild from scratch once the filter is full or once every refresh
+        # lifetime, which drops the entries of expired tokens. The old filter
+        # stays in use until the new one is complete.
+        rebuild = bloom is None or bloom.count >= capacity or now >= self._rebuild_at
+        if rebuild:
+            bloom, cursor = BloomFilter(capacity), None
+
+        started = timezone.now()
+        rows = RevokedToken.objects.filter(expires_at__gt=started)
+        if cursor is not None:
+            rows = rows.filter(revoked_at__gte=cursor - self.sync_overlap)
+        for value in rows.values_list("jti_hash", flat=True).iterator(chunk_size=10000):
+            bloom.add(value)
+
+        if rebuild:
+            self._rebuild_at = now + api_settings.REFRESH_TOKEN_LIFETIME.total_seconds()
+        self._filter, self._cursor = bloom, started
+
+
+token_blacklist = TokenBlacklist()
+
+
+def prune_revoked_tokens(batch_size=10000):
+    """Delete expired ``RevokedToken`` rows in batches; returns the count."""
+    now = timezone.now()
+    deleted = 0
+    while True:
+        pks = list(
+            RevokedToken.objects.filter(expires_at__lte=now).values_list(
+                "pk", flat=True
+            )[:batch_size]
+        )
+        if not pks:
+            return deleted
+        deleted += RevokedToken.objects.filter(pk__in=pks).delete()[0]
@@ -0,0 +1,122 @@
+"""
+A per-process limit on concurrent password hashes.
+
+PBKDF2 runs in OpenSSL with the GIL released, so a login storm hashing on
+every worker thread at once takes all of the CPU and every thread with it.
+``BoundedPBKDF2PasswordHasher`` still hashes on the request thread, but only
+``PASSWORD_HASHING_CONCURRENCY`` hashes run at once and at most
+``PASSWORD_HASHING_QUEUE`` more wait for a turn. Further logins and
+registrations fail straight away with a 503, which frees their threads for
+catalog traffic instead of queueing them behind the storm.
+"""
+
+import threading
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.views import exception_handler as drf_exception_handler
+
+
+class HashingUnavailable(Exception):
+    """Raised by the hasher, so callers outside DRF can handle it too."""
+
+    message = "Too many sign-ins in progress, please retry shortly."
+    retry_after = 1
+
+
+class HashingUnavailableError(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = HashingUnavailable.message
+    default_code = "hashing_unavailable"
+    # Sent as Retry-After by DRF's exception handler.
+    wait = HashingUnavailable.retry_after
+
+
+def exception_handler(exc, context):
+    """DRF's exception handler, answering ``HashingUnavailable`` with a 503."""
+    if isinstance(exc, HashingUnavailable):
+        exc = HashingUnavailableError()
+    return drf_exception_handler(exc, context)
+
+
+class HashingUnavailableMiddleware:
+    """Answer ``HashingUnavailable`` outside DRF, e.g. the admin login, with a 503."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, HashingUnavailable):
+            return HttpResponse(
+                HashingUnavailable.message,
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content_type="text/plain; charset=utf-8",
+                headers={"Retry-After": str(HashingUnavailable.retry_after)},
+            )
+        return None
+
+
+class HashingLimiter:
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._running = 0
+        self._waiting = 0
+
+    def run(self, fn, *args):
+        limit = getattr(settings, "PASSWORD_HASHING_CONCURRENCY", 1)
+        if not limit:
+            return fn(*args)
+        queue = getattr(settings, "PASSWORD_HASHING_QUEUE", 2)
+
+        with self._condition:
+            if self._running >= limit:
+                if self._waiting >= queue:
+                    raise HashingUnavailable()
+                self._waiting += 1
+                try:
+                    while self._running >= limit:
+                        self._condition.wait()
+                finally:
+                    self._waiting -= 1
+            self._running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._condition:
+                self._running -= 1
+                self._condition.notify()
+
+
+hashing_limiter = HashingLimiter()
+
+
+class BoundedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    Django's PBKDF2 hasher with the key derivation run through
+    ``hashing_limiter``.
+
+    Uses the same algorithm name, so existing hashes keep verifying, and
+    ``authenticate()``, ``create_user()`` and ``set_password()`` go through
+    it unchanged.
+    """
+
+    def encode(self, password, salt, iterations=None):
+        return hashing_limiter.run(super().encode, password, salt, iterations)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from user.blacklist import prune_revoked_tokens
+
+
+class Command(BaseCommand):
+    help = "Delete revoked refresh tokens that have expired anyway"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        deleted = prune_revoked_tokens(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Pruned {deleted} expired revoked token(s)")
+        )
@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-18 17:41
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_active_loans_count(apps, schema_editor):
+    User = apps.get_model("user", "User")
+    Loan = apps.get_model("book", "Loan")
+    active = (
+        Loan.objects.filter(user=OuterRef("pk"), returned_date__isnull=True)
+        .order_by()
+        .values("user")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    User.objects.update(active_loans_count=Coalesce(Subquery(active), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0001_initial'),
+        ('book', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='active_loans_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_active_loans_count, migrations.RunPython.noop),
+    ]
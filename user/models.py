@@ -7,10 +7,29 @@ class User(AbstractUser):
     phone_number = models.CharField(max_length=20, blank=True)
     address = models.TextField(blank=True)
     date_of_birth = models.DateField(null=True, blank=True)
+    # Maintained by the borrow/return paths in book.services; rebuild with
+    # ``manage.py reconcile_loan_counts`` if it ever drifts.
+    active_loans_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Serves username__startswith on PostgreSQL, whose default
+            # collation keeps LIKE off the unique index.
+            models.Index(
+                fields=["username"],
+                opclasses=["varchar_pattern_ops"],
+                name="user_username_prefix_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.username
 
-    @property
-    def active_loans_count(self):
-        return self.loans.filter(returned_date__isnull=True).count()
+
+class RevokedToken(models.Model):
+    """A refresh token that may no longer be used, kept until it expires."""
+
+    # Signed 64-bit hash of the token's jti; see ``user.blacklist.jti_hash``.
+    jti_hash = models.BigIntegerField(primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
@@ -1,6 +1,11 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth import authenticate
+from django.utils.translation import gettext_lazy as _
+from .blacklist import token_blacklist
 from .models import User
 
 
@@ -77,3 +82,22 @@ class UserSerializer(serializers.ModelSerializer):
             "date_joined",
         )
         read_only_fields = ("id", "last_login", "date_joined")
+
+
+class RotatingTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh serializer that enforces ``BLACKLIST_AFTER_ROTATION`` through
+    ``user.blacklist`` instead of simplejwt's blacklist app.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        if token_blacklist.is_revoked(refresh):
+            raise TokenError(_("Token is blacklisted"))
+
+        data = super().validate(attrs)
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            # Loses the race if the same token is being refreshed concurrently.
+            if not token_blacklist.revoke(refresh):
+                raise TokenError(_("Token is blacklisted"))
+        return data
@@ -0,0 +1,98 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from book.models import Book
+from user.authentication import USER_STAMP_KEY, user_cache
+from user.models import User
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+    return client
+
+
+def profile_queries(client):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get("/api/users/profile/")
+    return response, len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+class TestCachedJWTAuthentication:
+    def test_steady_state_costs_no_auth_queries(self, client):
+        assert profile_queries(client)[1] == 1
+        response, queries = profile_queries(client)
+
+        assert response.status_code == 200
+        assert queries == 0
+
+    def test_profile_update_is_visible(self, client):
+        client.get("/api/users/profile/")
+
+        client.patch("/api/users/profile/", {"first_name": "Ada"}, format="json")
+        response, queries = profile_queries(client)
+
+        assert response.data["data"]["first_name"] == "Ada"
+        assert queries == 1
+
+    def test_borrowing_refreshes_the_loan_counter(self, client):
+        book = Book.objects.create(
+            title="Book", author="Author", isbn="1234567890123", page_count=100
+        )
+        client.get("/api/users/profile/")
+
+        client.post("/api/books/loans/borrow/", {"book_id": book.pk})
+        response = client.get("/api/users/profile/")
+
+        assert response.data["data"]["active_loans_count"] == 1
+
+    def test_deactivation_revokes_access(self, client, user):
+        client.get("/api/users/profile/")
+
+        user.is_active = False
+        user.save()
+
+        assert client.get("/api/users/profile/").status_code == 401
+
+    def test_password_change_revokes_old_tokens(self, client, user):
+        client.get("/api/users/profile/")
+
+        user.set_password("another-pass-456")
+        user.save()
+
+        assert client.get("/api/users/profile/").status_code == 401
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        assert client.get("/api/users/profile/").status_code == 200
+
+    def test_changes_made_by_other_workers_are_seen(self, client, user):
+        client.get("/api/users/profile/")
+
+        # Another worker deactivates the user: its signal evicts its own
+        # entries and restamps the user in the shared cache.
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        cache.set(USER_STAMP_KEY.format(user.pk), 1)
+
+        assert client.get("/api/users/profile/").status_code == 401
+
+    def test_cache_is_size_bounded(self, settings):
+        settings.AUTH_USER_CACHE_SIZE = 2
+        for i in range(3):
+            user = User.objects.create_user(
+                username=f"user{i}", email=f"user{i}@example.com", password="x"
+            )
+            user_cache.set(str(user.pk), None, user)
+
+        assert len(user_cache._entries) == 2
+        assert user_cache.get(str(user.pk), None) == user
+
+    def test_entries_expire(self, client, monkeypatch):
+        client.get("/api/users/profile/")
+        monkeypatch.setattr("user.authentication.time.monotonic", lambda: 1e12)
+
+        assert profile_queries(client)[1] == 1
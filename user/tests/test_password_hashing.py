@@ -0,0 +1,129 @@
+import logging
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from django.test import AsyncClient, Client
+from rest_framework.test import APIClient
+
+from user.hashers import hashing_limiter
+from user.models import User
+
+
+@pytest.fixture
+def saturated(settings):
+    # One hash at a time, no queue, and a job that holds the slot.
+    settings.PASSWORD_HASHING_CONCURRENCY = 1
+    settings.PASSWORD_HASHING_QUEUE = 0
+    release, started = threading.Event(), threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(10)
+
+    blocker = threading.Thread(target=hashing_limiter.run, args=(hold,))
+    blocker.start()
+    started.wait(10)
+    yield
+    release.set()
+    blocker.join()
+
+
+@pytest.mark.django_db
+class TestBoundedHashing:
+    def test_login_hashes_through_the_limiter(self, user, monkeypatch):
+        threads = []
+        run = hashing_limiter.run
+
+        def recording_run(fn, *args):
+            def job(*job_args):
+                threads.append(threading.current_thread().name)
+                return fn(*job_args)
+
+            return run(job, *args)
+
+        monkeypatch.setattr(hashing_limiter, "run", recording_run)
+
+        response = APIClient().post(
+            "/api/users/login/", {"username": "reader", "password": "testpass123"}
+        )
+
+        assert response.status_code == 200
+        # On the request thread itself, not a pool.
+        assert threads and set(threads) == {threading.current_thread().name}
+        assert user.password.startswith("pbkdf2_sha256$")
+
+    def test_login_returns_503_when_saturated(self, user, saturated):
+        response = APIClient().post(
+            "/api/users/login/", {"username": "reader", "password": "testpass123"}
+        )
+
+        assert response.status_code == 503
+        assert response["Retry-After"] == "1"
+
+    def test_registration_returns_503_when_saturated(self, saturated):
+        response = APIClient().post(
+            "/api/users/register/",
+            {
+                "username": "newbie",
+                "email": "newbie@example.com",
+                "password": "Str0ng-pass-123",
+                "password2": "Str0ng-pass-123",
+            },
+        )
+
+        assert response.status_code == 503
+        assert not User.objects.filter(username="newbie").exists()
+
+    def test_disabled_limit_hashes_without_waiting(self, user, settings):
+        settings.PASSWORD_HASHING_CONCURRENCY = 0
+
+        assert User.objects.get(pk=user.pk).check_password("testpass123")
+
+    def test_waiting_hashes_get_a_turn(self, user, settings):
+        settings.PASSWORD_HASHING_CONCURRENCY = 1
+        settings.PASSWORD_HASHING_QUEUE = 1
+        release = threading.Event()
+        order = []
+
+        def hold():
+            order.append("first")
+            release.wait(10)
+
+        blocker = threading.Thread(target=hashing_limiter.run, args=(hold,))
+        blocker.start()
+        waiter = threading.Thread(
+            target=hashing_limiter.run, args=(lambda: order.append("second"),)
+        )
+        waiter.start()
+        waiter.join(0.2)
+        assert order == ["first"]
+
+        release.set()
+        blocker.join()
+        waiter.join()
+        assert order == ["first", "second"]
+
+    def test_admin_login_returns_503_when_saturated(self, saturated):
+        response = Client().post(
+            "/admin/login/", {"username": "reader", "password": "testpass123"}
+        )
+
+        assert response.status_code == 503
+        assert response["Retry-After"] == "1"
+
+    def test_async_admin_login_returns_503_when_saturated(self, saturated):
+        response = async_to_sync(AsyncClient().post)(
+            "/admin/login/", {"username": "reader", "password": "testpass123"}
+        )
+
+        assert response.status_code == 503
+
+
+def test_middleware_runs_natively_under_asgi(settings, caplog):
+    # Django only logs middleware adaptation with DEBUG on.
+    settings.DEBUG = True
+    with caplog.at_level(logging.DEBUG, logger="django.request"):
+        ASGIHandler()
+    assert "HashingUnavailableMiddleware" not in caplog.text
@@ -0,0 +1,117 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from user.blacklist import BloomFilter, jti_hash, token_blacklist
+from user.models import RevokedToken
+
+
+def refresh(client, token):
+    return client.post("/api/users/token/refresh/", {"refresh": str(token)})
+
+
+@pytest.mark.django_db
+class TestRefreshRotation:
+    def test_rotated_token_cannot_be_reused(self, user):
+        client = APIClient()
+        token = RefreshToken.for_user(user)
+
+        response = refresh(client, token)
+        assert response.status_code == 200
+        assert response.data["refresh"] != str(token)
+
+        assert refresh(client, token).status_code == 401
+        assert refresh(client, response.data["refresh"]).status_code == 200
+
+    def test_revocations_from_other_processes_are_enforced(self, user):
+        token = RefreshToken.for_user(user)
+        token_blacklist.sync(force=True)
+        # Another worker rotated the token after this one last synced.
+        RevokedToken.objects.create(
+            jti_hash=jti_hash(token["jti"]),
+            expires_at=timezone.now() + timedelta(days=1),
+        )
+
+        assert refresh(APIClient(), token).status_code == 401
+
+    def test_sync_folds_in_new_revocations(self, user):
+        token = RefreshToken.for_user(user)
+        token_blacklist.sync(force=True)
+        assert not token_blacklist.is_revoked(token)
+
+        RevokedToken.objects.create(
+            jti_hash=jti_hash(token["jti"]),
+            expires_at=timezone.now() + timedelta(days=1),
+        )
+        token_blacklist.sync(force=True)
+
+        assert token_blacklist.is_revoked(token)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_loads_in_the_background_and_falls_back_to_the_table(user, monkeypatch):
+    revoked = RefreshToken.for_user(user)
+    RevokedToken.objects.create(
+        jti_hash=jti_hash(revoked["jti"]),
+        expires_at=timezone.now() + timedelta(days=1),
+    )
+    loading = threading.Event()
+    release = threading.Event()
+    sync = token_blacklist._sync
+
+    def slow_sync():
+        loading.set()
+        release.wait(5)
+        sync()
+
+    monkeypatch.setattr(token_blacklist, "_sync", slow_sync)
+    monkeypatch.setattr(token_blacklist, "background", True)
+
+    assert token_blacklist.is_revoked(revoked)
+    assert loading.wait(5)
+    assert not token_blacklist.is_revoked(RefreshToken.for_user(user))
+    assert token_blacklist.sync() is None
+
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == "token-blacklist-sync":
+            thread.join(5)
+    assert jti_hash(revoked["jti"]) in token_blacklist.sync()
+
+
+@pytest.mark.django_db
+def test_prune_revoked_tokens():
+    now = timezone.now()
+    RevokedToken.objects.bulk_create(
+        RevokedToken(jti_hash=i, expires_at=now + timedelta(hours=1 if i >= 5 else -1))
+        for i in range(10)
+    )
+    out = StringIO()
+
+    call_command("prune_revoked_tokens", "--batch-size", "2", stdout=out)
+
+    assert "Pruned 5" in out.getvalue()
+    assert sorted(RevokedToken.objects.values_list("pk", flat=True)) == [
+        5,
+        6,
+        7,
+        8,
+        9,
+    ]
+
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(capacity=10000, error_rate=0.01)
+    members = [jti_hash(f"member-{i}") for i in range(10000)]
+    for value in members:
+        bloom.add(value)
+
+    assert all(value in bloom for value in members)
+    false_positives = sum(jti_hash(f"other-{i}") in bloom for i in range(10000))
+    assert false_positives < 300
@@ -5,6 +5,7 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from django.contrib.auth import authenticate
 from django.utils import timezone
+from LibraryManager.replicas import ReplicaReadMixin
 from .models import User
 from .serializers import UserRegistrationSerializer, UserSerializer, UserLoginSerializer
 
@@ -37,6 +38,16 @@ class RegisterView(generics.CreateAPIView):
         )
 
 
+class LoginView(TokenObtainPairView):
+    """simplejwt's login, in the throttle tier that is never shed."""
+
+    throttle_tier = "circulation"
+
+
+class RefreshView(TokenRefreshView):
+    throttle_tier = "circulation"
+
+
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = UserLoginSerializer
     permission_classes = [permissions.AllowAny]
@@ -102,7 +113,7 @@ class CustomTokenRefreshView(TokenRefreshView):
         )
 
 
-class UserProfileView(generics.RetrieveUpdateAPIView):
+class UserProfileView(ReplicaReadMixin, generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
 